@@ -1,10 +1,11 @@
 from django.contrib import admin
 from django.utils.formats import date_format
+from django.utils.html import format_html_join
 from django.utils.timezone import localtime
 from django.contrib.auth.models import User, Group
 from django.contrib.auth.admin import UserAdmin, GroupAdmin
 from NasoBiomeKnowlegeBase.admin_site import admin_site
-from .models import Species, BodySite, Disease, Product, MigrationPattern, SpeciesInteraction, ProductEvent
+from .models import Species, BodySite, Disease, Product, MigrationPattern, SpeciesInteraction, ProductEvent, SlowCypherQuery, SpeciesSummary
 
 # Register built-in Django models
 class CustomUserAdmin(UserAdmin):
@@ -191,6 +192,46 @@ class ProductEventAdmin(admin.ModelAdmin):
     has_interaction.boolean = True
 
 
+class SlowCypherQueryAdmin(admin.ModelAdmin):
+    list_display = ('query_name', 'duration_ms', 'rows', 'total_db_hits', 'created_at')
+    list_filter = ('query_name',)
+    search_fields = ('query_name', 'query')
+    ordering = ('-duration_ms',)
+    readonly_fields = ('query_name', 'query', 'parameters', 'duration_ms', 'rows', 'total_db_hits', 'plan', 'created_at')
+    exclude = ('profile',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def plan(self, obj):
+        if not obj.profile:
+            return '-'
+        return format_html_join(
+            '\n', '<div style="padding-left: {}em">{} &mdash; {} db hits, {} rows</div>',
+            ((op['depth'] * 1.5, op['operator'], op['db_hits'], op['rows']) for op in obj.profile),
+        )
+    plan.short_description = 'Profile plan'
+
+
+class SpeciesSummaryAdmin(admin.ModelAdmin):
+    list_display = ('species', 'phyla', 'body_site_count', 'disease_count', 'product_count',
+                    'interaction_count', 'migration_count', 'product_event_count')
+    list_select_related = ('species',)
+    list_filter = ('phyla',)
+    search_fields = ('species__name',)
+    ordering = ('-disease_count',)
+
+    # Maintained by signals.py; rebuild with `manage.py rebuild_species_summaries`
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # Register all models with the custom admin site
 admin_site.register(BodySite, BodySiteAdmin)
 admin_site.register(Disease, DiseaseAdmin)
@@ -199,3 +240,5 @@ admin_site.register(Product, ProductAdmin)
 admin_site.register(SpeciesInteraction, SpeciesInteractionAdmin)
 admin_site.register(MigrationPattern, MigrationPatternAdmin)
 admin_site.register(ProductEvent, ProductEventAdmin)
+admin_site.register(SlowCypherQuery, SlowCypherQueryAdmin)
+admin_site.register(SpeciesSummary, SpeciesSummaryAdmin)
@@ -0,0 +1,246 @@
+"""
+Bulk upsert of interactions, migration patterns and product events.
+
+A batch is validated as a whole before anything is written. Related species,
+body sites, diseases and products may be given by name ("species_1": "...")
+or id ("species_1_id": 3); all references to one model are resolved with a
+single query. Rows without an id are matched to existing rows by their
+natural key (the model's unique constraint), so loading the same batch twice
+updates instead of duplicating.
+Each type is then written with one bulk_create(update_conflicts=True) inside
+one transaction.
+"""
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .fragment_cache import bump_model_versions
+from .kpi import invalidate_kpis
+from .models import Species, BodySite, Disease, Product, SpeciesInteraction, MigrationPattern, ProductEvent
+from .summaries import SPECIES_FOREIGN_KEYS, schedule_summary_refresh
+
+MAX_BATCH_ROWS = 5000
+
+
+class BulkType:
+    def __init__(self, model, relations, natural_key):
+        self.model = model
+        # foreign key field -> related model
+        self.relations = relations
+        # fields identifying a row when no id is given
+        self.natural_key = natural_key
+
+    @property
+    def value_fields(self):
+        return [
+            field.name for field in self.model._meta.concrete_fields
+            if not field.is_relation and not field.primary_key and field.editable
+        ]
+
+    def key_of(self, obj):
+        return tuple(getattr(obj, self.model._meta.get_field(name).attname) for name in self.natural_key)
+
+
+# In write order: product events may refer to existing interactions and migrations
+BULK_TYPES = {
+    "interactions": BulkType(
+        SpeciesInteraction,
+        {"species_1": Species, "species_2": Species, "site": BodySite, "associated_disease": Disease},
+        natural_key=("species_1", "species_2", "site"),
+    ),
+    "migrations": BulkType(
+        MigrationPattern,
+        {"species": Species, "from_site": BodySite, "to_site": BodySite, "resulting_disease": Disease},
+        natural_key=("species", "from_site", "to_site"),
+    ),
+    "product_events": BulkType(
+        ProductEvent,
+        {
+            "species": Species, "interacting_species": Species, "site": BodySite, "product": Product,
+            "disease": Disease, "migration": MigrationPattern, "interaction": SpeciesInteraction,
+        },
+        natural_key=("species", "site", "product"),
+    ),
+}
+
+
+class BulkValidationError(Exception):
+    def __init__(self, errors):
+        super().__init__("Invalid rows in batch")
+        # [{"type", "index", "errors": {field: [messages]}}]
+        self.errors = errors
+
+
+def _is_named(model):
+    return any(field.name == "name" for field in model._meta.fields)
+
+
+def _resolve_references(batch):
+    """
+    Look up every referenced object, one query per related model.
+    Returns {model: ({name: pk}, {pk})}.
+    """
+    names, ids = {}, {}
+    for type_name, rows in batch.items():
+        for row in rows:
+            # Rows updated by id must exist
+            if isinstance(row.get("id"), int):
+                ids.setdefault(BULK_TYPES[type_name].model, set()).add(row["id"])
+            for field, related_model in BULK_TYPES[type_name].relations.items():
+                if isinstance(row.get(f"{field}_id"), int):
+                    ids.setdefault(related_model, set()).add(row[f"{field}_id"])
+                elif isinstance(row.get(field), str) and _is_named(related_model):
+                    names.setdefault(related_model, set()).add(row[field])
+
+    resolved = {}
+    for related_model in set(names) | set(ids):
+        condition = Q(pk__in=ids.get(related_model, ()))
+        if related_model in names:
+            condition |= Q(name__in=names[related_model])
+        by_name, pks = {}, set()
+        fields = ("pk", "name") if _is_named(related_model) else ("pk",)
+        for values in related_model.objects.filter(condition).values_list(*fields):
+            pks.add(values[0])
+            if len(values) > 1:
+                by_name[values[1]] = values[0]
+        resolved[related_model] = (by_name, pks)
+    return resolved
+
+
+def _build_object(bulk_type, row, resolved):
+    model = bulk_type.model
+    errors = {}
+    allowed = {"id"} | set(bulk_type.value_fields) | set(bulk_type.relations)
+    allowed |= {f"{field}_id" for field in bulk_type.relations}
+    for key in set(row) - allowed:
+        errors[key] = ["Unknown field."]
+
+    values = {name: row[name] for name in bulk_type.value_fields if name in row}
+    if row.get("id") is not None:
+        values["id"] = row["id"]
+        if row["id"] not in resolved.get(model, ({}, set()))[1]:
+            errors["id"] = [f"{model.__name__} with id {row['id']!r} does not exist."]
+
+    for field, related_model in bulk_type.relations.items():
+        by_name, pks = resolved.get(related_model, ({}, set()))
+        pk, name = row.get(f"{field}_id"), row.get(field)
+        if pk is not None:
+            if pk not in pks:
+                errors[field] = [f"{related_model.__name__} with id {pk!r} does not exist."]
+        elif name is not None:
+            if not _is_named(related_model):
+                errors[field] = [f"Refer to {related_model.__name__} by id, as {field}_id."]
+                continue
+            pk = by_name.get(name)
+            if pk is None:
+                errors[field] = [f"{related_model.__name__} named {name!r} does not exist."]
+        elif not model._meta.get_field(field).null:
+            errors[field] = ["This field is required."]
+        values[model._meta.get_field(field).attname] = pk
+
+    obj = model(**values)
+    try:
+        # Related objects were checked above; skip the per-row existence queries
+        obj.full_clean(exclude=list(bulk_type.relations) + list(errors), validate_unique=False,
+                       validate_constraints=False)
+    except ValidationError as e:
+        errors.update(e.message_dict)
+    return obj, errors
+
+
+def _match_existing(bulk_type, objects):
+    """Give rows without an id the id of the existing row with the same natural key."""
+    pending = [obj for obj in objects if obj.pk is None]
+    if not pending:
+        return objects
+
+    first = bulk_type.model._meta.get_field(bulk_type.natural_key[0]).attname
+    attnames = [bulk_type.model._meta.get_field(name).attname for name in bulk_type.natural_key]
+    existing = {
+        tuple(values[:-1]): values[-1]
+        for values in bulk_type.model.objects
+        .filter(**{f"{first}__in": {getattr(obj, first) for obj in pending}})
+        .values_list(*attnames, "pk")
+    }
+
+    # The last row with a given key wins, both against the table and within the batch
+    by_key = {}
+    for obj in objects:
+        if obj.pk is None:
+            obj.pk = existing.get(bulk_type.key_of(obj))
+        key = ("id", obj.pk) if obj.pk is not None else bulk_type.key_of(obj)
+        by_key[key] = obj
+    return list(by_key.values())
+
+
+def bulk_upsert(batch):
+    """
+    Validate and write {"interactions": [...], "migrations": [...],
+    "product_events": [...]}. Returns {type: {"created": [ids], "updated": [ids]}};
+    raises BulkValidationError without writing if any row is invalid.
+    """
+    def batch_error(message, type_name=None):
+        return {"type": type_name, "index": None, "errors": {"__all__": [message]}}
+
+    unknown = sorted(set(batch) - set(BULK_TYPES))
+    if unknown:
+        raise BulkValidationError([batch_error("Unknown type.", name) for name in unknown])
+    if any(not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows) for rows in batch.values()):
+        raise BulkValidationError([batch_error("Each type must be a list of objects.")])
+    if sum(len(rows) for rows in batch.values()) > MAX_BATCH_ROWS:
+        raise BulkValidationError([batch_error(f"At most {MAX_BATCH_ROWS} rows per batch.")])
+
+    resolved = _resolve_references(batch)
+    objects, errors = {}, []
+    for type_name, rows in batch.items():
+        bulk_type = BULK_TYPES[type_name]
+        objects[type_name] = []
+        for index, row in enumerate(rows):
+            obj, row_errors = _build_object(bulk_type, row, resolved)
+            if row_errors:
+                errors.append({"type": type_name, "index": index, "errors": row_errors})
+            objects[type_name].append(obj)
+    if errors:
+        raise BulkValidationError(errors)
+
+    try:
+        return _write(objects)
+    except IntegrityError:
+        # A row updated by id took another row's key, or a concurrent writer
+        # inserted the key after _match_existing looked
+        raise BulkValidationError([batch_error("A row's natural key is already used by another row.")])
+
+
+def _write(objects):
+    result = {}
+    with transaction.atomic():
+        for type_name, bulk_type in BULK_TYPES.items():
+            if not objects.get(type_name):
+                continue
+            rows = _match_existing(bulk_type, objects[type_name])
+            # Every id set at this point belongs to an existing row
+            updated = {obj.pk for obj in rows if obj.pk is not None}
+            # Recount both the species rows move away from and the ones they join
+            species_fields = SPECIES_FOREIGN_KEYS[bulk_type.model]
+            previous = bulk_type.model.objects.filter(pk__in=updated).values_list(*species_fields)
+            schedule_summary_refresh(
+                [pk for row in previous for pk in row]
+                + [getattr(obj, field) for obj in rows for field in species_fields]
+            )
+            bulk_type.model.objects.bulk_create(
+                rows, batch_size=500, update_conflicts=True, unique_fields=["id"],
+                # created_at keeps its original value on updated rows
+                update_fields=bulk_type.value_fields + ["updated_at"] + [
+                    bulk_type.model._meta.get_field(field).attname for field in bulk_type.relations
+                ],
+            )
+            result[type_name] = {
+                "created": [obj.pk for obj in rows if obj.pk not in updated],
+                "updated": sorted(updated),
+            }
+        # bulk_create skips the model signals that normally drop the KPI cache
+        # and the cached list fragments
+        transaction.on_commit(invalidate_kpis)
+        written = [BULK_TYPES[type_name].model for type_name in result]
+        transaction.on_commit(lambda: bump_model_versions(*written))
+    return result
@@ -1,4 +1,7 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.urls import reverse
 from .models import (
     BodySite,
     Disease,
@@ -27,6 +30,85 @@ SELECT_MULTIPLE = {
     'size': 6,
 }
 
+
+# Remote-data autocomplete
+#
+# Related-object fields render only their selected options; the rest are
+# fetched page by page from the lookup endpoint as the user types. The
+# fields themselves stay ModelChoiceFields, so submitted values are checked
+# by primary key.
+
+class AutocompleteLookup:
+    def __init__(self, queryset, search_fields, sort):
+        self.queryset = queryset
+        self.search_fields = search_fields
+        self.sort = sort
+
+    def search(self, text):
+        queryset = self.queryset
+        if text:
+            condition = Q()
+            for field in self.search_fields:
+                condition |= Q(**{f"{field}__icontains": text})
+            queryset = queryset.filter(condition)
+        return queryset
+
+
+AUTOCOMPLETE_LOOKUPS = {
+    'species': AutocompleteLookup(Species.objects.all(), ['name'], 'name'),
+    'body_site': AutocompleteLookup(BodySite.objects.all(), ['name'], 'name'),
+    'disease': AutocompleteLookup(Disease.objects.all(), ['name'], 'name'),
+    'product': AutocompleteLookup(Product.objects.all(), ['name'], 'name'),
+    'migration': AutocompleteLookup(
+        MigrationPattern.objects.select_related('species', 'from_site', 'to_site'),
+        ['species__name', 'from_site__name', 'to_site__name'], 'id',
+    ),
+    'interaction': AutocompleteLookup(
+        SpeciesInteraction.objects.select_related('species_1', 'species_2'),
+        ['species_1__name', 'species_2__name'], 'id',
+    ),
+}
+
+
+class AutocompleteMixin:
+    class Media:
+        js = ('js/autocomplete.js',)
+
+    def __init__(self, lookup, attrs=None):
+        self.lookup = lookup
+        super().__init__(attrs)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse('lookup_records', args=[self.lookup])
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        # Only the selected objects are rendered, in one query
+        selected = [v for v in value if v not in (None, '')]
+        options = []
+        if not self.allow_multiple_selected and not self.is_required:
+            options.append(self.create_option(name, '', '---------', not selected, 0))
+        if selected:
+            try:
+                objects = list(self.choices.queryset.filter(pk__in=selected))
+            except (ValueError, ValidationError):
+                objects = []
+            for index, obj in enumerate(objects, start=len(options)):
+                options.append(self.create_option(
+                    name, obj.pk, self.choices.field.label_from_instance(obj), True, index,
+                ))
+        return [(None, options, 0)]
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
+
+
 # BodySite Form
 class BodySiteForm(forms.ModelForm):
     class Meta:
@@ -45,7 +127,7 @@ class DiseaseForm(forms.ModelForm):
         widgets = {
             'name': forms.TextInput(attrs={**TEXT_INPUT, 'placeholder': 'e.g. Crohn\'s disease'}),
             'description': forms.Textarea(attrs={**TEXTAREA}),
-            'affected_site': forms.Select(attrs=SELECT),
+            'affected_site': AutocompleteSelect('body_site', attrs=SELECT),
             'mechanism_of_causation': forms.Textarea(attrs={**TEXTAREA}),
         }
 
@@ -62,10 +144,10 @@ class SpeciesForm(forms.ModelForm):
             'genome_reference_link': forms.URLInput(attrs={**TEXT_INPUT, 'placeholder': 'https://ncbi.nlm.nih.gov/...'}),
             'age_range': forms.TextInput(attrs={**TEXT_INPUT, 'placeholder': 'e.g. infant, adult, elderly'}),
             'description': forms.Textarea(attrs=TEXTAREA),
-            'origin_site': forms.Select(attrs=SELECT),
-            'body_sites': forms.SelectMultiple(attrs=SELECT_MULTIPLE),
-            'diseases': forms.SelectMultiple(attrs=SELECT_MULTIPLE),
-            'products': forms.SelectMultiple(attrs=SELECT_MULTIPLE),
+            'origin_site': AutocompleteSelect('body_site', attrs=SELECT),
+            'body_sites': AutocompleteSelectMultiple('body_site', attrs=SELECT_MULTIPLE),
+            'diseases': AutocompleteSelectMultiple('disease', attrs=SELECT_MULTIPLE),
+            'products': AutocompleteSelectMultiple('product', attrs=SELECT_MULTIPLE),
         }
 
 # Product Form
@@ -85,13 +167,13 @@ class SpeciesInteractionForm(forms.ModelForm):
         model = SpeciesInteraction
         fields = "__all__"
         widgets = {
-            'species_1': forms.Select(attrs=SELECT),
-            'species_2': forms.Select(attrs=SELECT),
-            'site': forms.Select(attrs=SELECT),
+            'species_1': AutocompleteSelect('species', attrs=SELECT),
+            'species_2': AutocompleteSelect('species', attrs=SELECT),
+            'site': AutocompleteSelect('body_site', attrs=SELECT),
             'interaction_type': forms.Select(attrs=SELECT),
             'mechanism': forms.Textarea(attrs={**TEXTAREA, 'rows': 2}),
             'evidence': forms.Textarea(attrs={**TEXTAREA, 'rows': 2}),
-            'associated_disease': forms.Select(attrs=SELECT),
+            'associated_disease': AutocompleteSelect('disease', attrs=SELECT),
         }
 
 # Migration Pattern Form
@@ -100,13 +182,13 @@ class MigrationPatternForm(forms.ModelForm):
         model = MigrationPattern
         fields = "__all__"
         widgets = {
-            'species': forms.Select(attrs=SELECT),
-            'from_site': forms.Select(attrs=SELECT),
-            'to_site': forms.Select(attrs=SELECT),
+            'species': AutocompleteSelect('species', attrs=SELECT),
+            'from_site': AutocompleteSelect('body_site', attrs=SELECT),
+            'to_site': AutocompleteSelect('body_site', attrs=SELECT),
             'mechanism': forms.TextInput(attrs={**TEXT_INPUT, 'placeholder': 'e.g. aspiration, bloodstream'}),
             'trigger_conditions': forms.Textarea(attrs={**TEXTAREA, 'rows': 2}),
             'evidence': forms.Textarea(attrs={**TEXTAREA, 'rows': 2}),
-            'resulting_disease': forms.Select(attrs=SELECT),
+            'resulting_disease': AutocompleteSelect('disease', attrs=SELECT),
         }
 
 # Product Event Form
@@ -115,13 +197,20 @@ class ProductEventForm(forms.ModelForm):
         model = ProductEvent
         fields = "__all__"
         widgets = {
-            'species': forms.Select(attrs=SELECT),
-            'interacting_species': forms.Select(attrs=SELECT),
-            'site': forms.Select(attrs=SELECT),
-            'product': forms.Select(attrs=SELECT),
-            'disease': forms.Select(attrs=SELECT),
-            'migration': forms.Select(attrs=SELECT),
-            'interaction': forms.Select(attrs=SELECT),
+            'species': AutocompleteSelect('species', attrs=SELECT),
+            'interacting_species': AutocompleteSelect('species', attrs=SELECT),
+            'site': AutocompleteSelect('body_site', attrs=SELECT),
+            'product': AutocompleteSelect('product', attrs=SELECT),
+            'disease': AutocompleteSelect('disease', attrs=SELECT),
+            'migration': AutocompleteSelect('migration', attrs=SELECT),
+            'interaction': AutocompleteSelect('interaction', attrs=SELECT),
             'mechanism': forms.Textarea(attrs={**TEXTAREA, 'rows': 2}),
             'evidence': forms.Textarea(attrs={**TEXTAREA, 'rows': 2}),
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Labels of the selected migration/interaction use __str__, which
+        # follows their foreign keys; join them in the same query.
+        self.fields['migration'].queryset = AUTOCOMPLETE_LOOKUPS['migration'].queryset
+        self.fields['interaction'].queryset = AUTOCOMPLETE_LOOKUPS['interaction'].queryset
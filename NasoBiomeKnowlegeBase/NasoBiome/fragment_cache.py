@@ -0,0 +1,57 @@
+"""
+Per-model version counters for template fragment caching.
+
+Every cached fragment includes the current version of each model it shows in
+its cache key, e.g. in a template:
+
+    {% load cache extras %}
+    {% model_versions "SpeciesInteraction" "Species" "BodySite" "Disease" as versions %}
+    {% cache 86400 interaction_rows versions request.get_full_path %}
+        ...
+    {% endcache %}
+
+The post_save/post_delete/m2m_changed receivers in signals.py bump a
+model's version, so all fragments built from the old data stop matching and
+age out of the cache on their own (after a day, or sooner when the cache
+culls them); nothing has to find and delete them. Code that writes in bulk
+(bulk_create, QuerySet.update) skips those signals and should call
+bump_model_versions() itself.
+"""
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+
+
+def _version_key(model):
+    return f"nasobiome:version:{model._meta.label_lower}"
+
+
+def _new_version():
+    # Versions are timestamps rather than a running count, so a counter lost to
+    # eviction never comes back at a value that old fragments were keyed on
+    return time.time_ns()
+
+
+def _resolve(model):
+    if isinstance(model, str):
+        return apps.get_model("NasoBiome", model)
+    return model
+
+
+def model_versions(*models):
+    """Return a cache key part made of the current version of each model."""
+    models = [_resolve(model) for model in models]
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return ":".join(str(versions[key]) for key in keys)
+
+
+def bump_model_versions(*models):
+    """Invalidate every cached fragment that shows one of `models`."""
+    version = _new_version()
+    cache.set_many({_version_key(_resolve(model)): version for model in models}, None)
@@ -0,0 +1,320 @@
+"""
+Per-request performance counters for SQL, Cypher and template rendering.
+
+The counters live in a context variable that PerformanceMiddleware opens for
+each request. The Neo4j driver wrapper, the SQL execute wrapper and the
+template backend below add to whatever request is currently active, and do
+nothing outside of a request (management commands, shell).
+"""
+import logging
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import metrics
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.cypher_count = 0
+        self.cypher_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+_current_stats = ContextVar("request_stats", default=None)
+
+
+def start_request_stats():
+    stats = RequestStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request_stats(token):
+    _current_stats.reset(token)
+
+
+def current_stats():
+    return _current_stats.get()
+
+
+# SQL
+
+def sql_execute_wrapper(execute, sql, params, many, context):
+    """Hook for connection.execute_wrapper() timing every SQL statement."""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = current_stats()
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_time += time.perf_counter() - start
+
+
+budget_logger = logging.getLogger("NasoBiome.performance")
+
+
+def query_budget(max_queries):
+    """
+    Declare how many SQL queries a view may run for a GET, independent of the
+    number of rows it shows. Overruns are only logged here; the tests in
+    tests/test_query_budgets.py fail when a view exceeds its budget or its
+    query count grows with the number of seeded rows.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            stats = current_stats()
+            before = stats.sql_count if stats is not None else 0
+            response = view(request, *args, **kwargs)
+            if stats is not None and request.method == "GET":
+                used = stats.sql_count - before
+                if used > max_queries:
+                    budget_logger.warning(
+                        "%s ran %d SQL queries, over its budget of %d",
+                        view.__name__, used, max_queries,
+                    )
+            return response
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
+
+
+# NEO4J
+
+logger = logging.getLogger(__name__)
+
+WRITE_CLAUSE_RE = re.compile(r"\b(CREATE|MERGE|SET|DELETE|REMOVE|DROP|LOAD\s+CSV)\b", re.IGNORECASE)
+
+
+def _flatten_plan(plan, depth=0):
+    """Flatten a PROFILE plan tree into a list of operators, outermost first."""
+    operators = [{
+        "operator": plan.get("operatorType"),
+        "db_hits": plan.get("dbHits", 0),
+        "rows": plan.get("rows", 0),
+        "depth": depth,
+    }]
+    for child in plan.get("children", []):
+        operators.extend(_flatten_plan(child, depth + 1))
+    return operators
+
+
+# Slow statements are profiled and stored by one background thread, with its
+# own Neo4j session and database connection, so neither the PROFILE run nor
+# the insert delays the request or joins its transaction
+_slow_query_recorder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-cypher")
+
+# Stored parameters are cut down to this: batch pushes UNWIND lists of
+# thousands of rows, which would otherwise be saved whole with every query
+PARAMETER_LIST_PREVIEW = 3
+PARAMETER_STRING_LIMIT = 200
+
+
+def _summarize_parameters(value):
+    """JSON-safe copy of `value` with long lists and strings replaced by a bounded preview."""
+    if isinstance(value, dict):
+        return {str(key): _summarize_parameters(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [_summarize_parameters(item) for item in value[:PARAMETER_LIST_PREVIEW]]
+        if len(value) <= PARAMETER_LIST_PREVIEW:
+            return items
+        return {"length": len(value), "preview": items}
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = str(value)
+    if len(text) > PARAMETER_STRING_LIMIT:
+        return text[:PARAMETER_STRING_LIMIT] + f"… ({len(text)} characters)"
+    return text
+
+
+def _record_slow_query(driver, session_config, name, query, parameters, duration, rows):
+    from .models import SlowCypherQuery
+
+    try:
+        profile = total_db_hits = None
+        # PROFILE executes the statement again, so only sample read-only ones
+        if not WRITE_CLAUSE_RE.search(query) and random.random() < settings.NEO4J_SLOW_QUERY_PROFILE_RATE:
+            with driver.session(**session_config) as session:
+                summary = session.run("PROFILE " + query, parameters).consume()
+            if summary.profile:
+                profile = _flatten_plan(summary.profile)
+                total_db_hits = sum(operator["db_hits"] for operator in profile)
+
+        SlowCypherQuery.objects.create(
+            query_name=name,
+            query=query,
+            parameters=_summarize_parameters(parameters or {}),
+            duration_ms=duration * 1000,
+            rows=rows,
+            total_db_hits=total_db_hits,
+            profile=profile,
+        )
+    except Exception:
+        logger.exception("Could not record slow Cypher query %s", name)
+    finally:
+        # No request cycle closes this thread's connection
+        connection.close()
+
+
+class InstrumentedResult:
+    """
+    Wraps a neo4j Result without fetching it: records are counted as the
+    caller reads them, and the statement is recorded once the result is
+    consumed (read to the end, single(), data(), consume(), or the session
+    moving on to the next statement or closing).
+    """
+
+    def __init__(self, result, on_consumed):
+        self._result = result
+        self._on_consumed = on_consumed
+        self._rows = 0
+        self._summary = None
+
+    def __getattr__(self, name):
+        return getattr(self._result, name)
+
+    def __iter__(self):
+        for record in self._result:
+            self._rows += 1
+            yield record
+        self.consume()
+
+    def single(self, strict=False):
+        record = self._result.single(strict)
+        self._rows += record is not None
+        self.consume()
+        return record
+
+    def data(self, *keys):
+        data = self._result.data(*keys)
+        self._rows += len(data)
+        self.consume()
+        return data
+
+    def consume(self):
+        if self._summary is None:
+            self._summary = self._result.consume()
+            self._on_consumed(self._summary, self._rows)
+        return self._summary
+
+
+class InstrumentedSession:
+    def __init__(self, session, driver, config):
+        self._session = session
+        # Used to profile slow statements in a session of their own
+        self._driver = driver
+        self._config = config
+        self._result = None
+
+    def __enter__(self):
+        self._session.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._consume_pending()
+        return self._session.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def _consume_pending(self):
+        # The driver discards the rest of an open result before running the
+        # next statement or closing; consume it first so it is recorded
+        if self._result is not None:
+            result, self._result = self._result, None
+            result.consume()
+
+    def run(self, query, parameters=None, query_name=None, **kwargs):
+        """
+        session.run(), timed and counted. `query_name` names the statement in
+        the Cypher metrics and the slow query log.
+        """
+        self._consume_pending()
+        parameters = {**(parameters or {}), **kwargs}
+        name = metrics.query_template_name(query, query_name)
+        stats = current_stats()
+        start = time.perf_counter()
+        try:
+            result = self._session.run(query, parameters)
+        except Exception:
+            self._record(name, query, parameters, stats, time.perf_counter() - start, None, 0)
+            raise
+        # Time until the server answered; the time it spent streaming the
+        # records is added from the summary once the result is consumed
+        answered = time.perf_counter() - start
+
+        def on_consumed(summary, rows):
+            self._record(name, query, parameters, stats, answered, summary, rows)
+
+        self._result = InstrumentedResult(result, on_consumed)
+        return self._result
+
+    def _record(self, name, query, parameters, stats, duration, summary, rows):
+        if summary is not None and summary.result_consumed_after is not None:
+            duration += summary.result_consumed_after / 1000
+        metrics.observe_cypher(name, duration)
+        if stats is not None:
+            stats.cypher_count += 1
+            stats.cypher_time += duration
+        if duration * 1000 >= settings.NEO4J_SLOW_QUERY_MS:
+            _slow_query_recorder.submit(
+                _record_slow_query, self._driver, self._config, name, query, parameters, duration, rows,
+            )
+
+
+class InstrumentedDriver:
+    """Wraps a neo4j Driver so every session.run() is timed and counted."""
+
+    def __init__(self, driver):
+        self._driver = driver
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def session(self, **config):
+        return InstrumentedSession(self._driver.session(**config), self._driver, config)
+
+
+# TEMPLATES
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = current_stats()
+        if stats is None:
+            return super().render(context, request)
+
+        # Only the outermost render counts; nested renders are part of it
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if stats.template_depth == 0:
+                stats.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend that reports render time to the request stats."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,61 @@
+"""
+Dashboard KPIs for the landing page and the admin index.
+
+All table counts come from one SQL statement and are cached under a single
+key. The post_save/post_delete receivers in signals.py drop the cached value,
+and code that writes in bulk (bulk_create, QuerySet.update) should call
+invalidate_kpis() itself, since those skip model signals.
+"""
+from django.core.cache import cache
+from django.db import connection
+
+from .models import (
+    Species, BodySite, Disease, Product,
+    SpeciesInteraction, MigrationPattern, ProductEvent,
+)
+
+KPI_CACHE_KEY = "nasobiome:kpi"
+# Upper bound on staleness for writes that bypass invalidate_kpis()
+KPI_CACHE_TIMEOUT = 300
+
+NODE_COUNTS = {
+    "species_count": Species,
+    "body_sites_count": BodySite,
+    "diseases_count": Disease,
+    "products_count": Product,
+}
+RELATIONSHIP_COUNTS = {
+    "interactions_count": SpeciesInteraction,
+    "migrations_count": MigrationPattern,
+    "product_events_count": ProductEvent,
+}
+KPI_MODELS = tuple(NODE_COUNTS.values()) + tuple(RELATIONSHIP_COUNTS.values())
+
+
+def _count_kpis():
+    counts = {**NODE_COUNTS, **RELATIONSHIP_COUNTS}
+    quote = connection.ops.quote_name
+    columns = ", ".join(
+        f"(SELECT COUNT(*) FROM {quote(model._meta.db_table)})" for model in counts.values()
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {columns}")
+        row = cursor.fetchone()
+
+    kpi = dict(zip(counts, row))
+    kpi["total_nodes"] = sum(kpi[name] for name in NODE_COUNTS)
+    kpi["total_relationships"] = sum(kpi[name] for name in RELATIONSHIP_COUNTS)
+    return kpi
+
+
+def get_kpis():
+    """Return the dashboard counts, from the cache when possible."""
+    kpi = cache.get(KPI_CACHE_KEY)
+    if kpi is None:
+        kpi = _count_kpis()
+        cache.set(KPI_CACHE_KEY, kpi, KPI_CACHE_TIMEOUT)
+    return kpi
+
+
+def invalidate_kpis():
+    cache.delete(KPI_CACHE_KEY)
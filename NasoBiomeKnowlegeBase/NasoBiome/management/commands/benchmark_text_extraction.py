@@ -0,0 +1,51 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+from NasoBiome import text_extraction
+
+FILLER = (
+    "colonizes", "the", "anterior", "nares", "and", "skin", "Nose", "strains", "in", "children",
+    "with", "Virulence:", "causes disease", "such as", "chronic", "infection", "(MRSA)", "www.example.org",
+)
+
+
+def sample_texts(count, seed=0):
+    """Deterministic multi-line texts mixing dictionary words, species names and filler."""
+    rng = random.Random(seed)
+    vocabulary = [
+        *text_extraction.DISEASE_KEYWORDS, *text_extraction.KNOWN_PRODUCTS,
+        *text_extraction.SPECIES_ABBREVIATIONS, *text_extraction.SPECIES_ABBREVIATIONS.values(),
+        *text_extraction.ANTAGONISTIC_WORDS, *text_extraction.SYNERGISTIC_WORDS,
+    ]
+    texts = []
+    for _ in range(count):
+        lines = []
+        for _ in range(rng.randint(1, 6)):
+            words = [rng.choice(vocabulary if rng.random() < 0.3 else FILLER) for _ in range(rng.randint(2, 14))]
+            lines.append(" ".join(words) + rng.choice((".", "", ";")))
+        if rng.random() < 0.3:
+            lines.append(f"https://pubmed.ncbi.nlm.nih.gov/{rng.randint(10**7, 10**8)}/")
+        texts.append("\n".join(lines))
+    return texts
+
+
+class Command(BaseCommand):
+    help = "Time the importer's text extractors (diseases and URLs, products, species interactions)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--texts', type=int, default=2000, help="Number of generated texts")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per extractor; the best is reported")
+
+    def handle(self, *args, **options):
+        texts = sample_texts(options['texts'])
+        extractors = [
+            ("diseases and URLs", text_extraction.extract_urls_and_diseases),
+            ("products", text_extraction.extract_products_from_text),
+            ("interactions", lambda text: text_extraction.extract_interactions_from_text(text, "Staphylococcus aureus")),
+        ]
+        self.stdout.write(f"  {len(texts)} texts, {sum(map(len, texts)) // len(texts)} characters on average")
+        for label, extract in extractors:
+            best = min(timeit.repeat(lambda: [extract(text) for text in texts], number=1, repeat=options['repeat']))
+            self.stdout.write(f"  {label:<20} {best * 1e6 / len(texts):>8.1f} µs per text")
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark finished"))
@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from NasoBiome.models import Disease
+from NasoBiome.neo4j_integration import fetch_disease_pathway, node_key
+from NasoBiome.pathway import disease_pathway
+
+
+def _normalized(nodes, links):
+    """Order-independent form of a pathway; Cypher collects in no fixed order."""
+    return (
+        sorted(json.dumps(node, sort_keys=True, default=str) for node in nodes),
+        sorted(json.dumps(link, sort_keys=True, default=str) for link in links),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the disease pathways computed from Postgres with the ones read from Neo4j; "
+        "run right after a full export"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('disease_ids', type=int, nargs='*', help="Diseases to compare (default: all)")
+
+    def handle(self, *args, **options):
+        ids = options['disease_ids'] or list(Disease.objects.order_by("pk").values_list("pk", flat=True))
+        mismatches = []
+        for disease_pk in ids:
+            address = node_key("Disease", disease_pk)
+            relational = _normalized(*disease_pathway(address))
+            graph = _normalized(*fetch_disease_pathway(address))
+            if relational == graph:
+                self.stdout.write(f"  {address:<16} {len(relational[0]):>4} nodes {len(relational[1]):>4} links")
+                continue
+
+            mismatches.append(address)
+            self.stdout.write(self.style.ERROR(f"  {address:<16} differs"))
+            for name, (ours, theirs) in zip(("nodes", "links"), zip(relational, graph)):
+                for item in sorted(set(ours) - set(theirs)):
+                    self.stdout.write(f"    only in Postgres {name}: {item}")
+                for item in sorted(set(theirs) - set(ours)):
+                    self.stdout.write(f"    only in Neo4j {name}:    {item}")
+
+        if mismatches:
+            raise CommandError("Pathways differ for " + ", ".join(mismatches))
+        self.stdout.write(self.style.SUCCESS("✅ Postgres and Neo4j pathways are identical"))
@@ -1,19 +1,152 @@
-from decimal import DecimalException
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import os
-import re
-from urllib.parse import urlparse
+import time
+import numpy as np
 import pandas as pd
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from NasoBiome.models import BodySite, Disease, Species, Product, MigrationPattern, SpeciesInteraction, ProductEvent
+from django.utils import timezone
+from NasoBiome.fragment_cache import bump_model_versions
+from NasoBiome.kpi import invalidate_kpis
+from NasoBiome.models import (
+    BodySite, Disease, Species, Product, MigrationPattern, SpeciesInteraction, ProductEvent, SpeciesSummary,
+)
+from NasoBiome.summaries import schedule_summary_refresh
+from NasoBiome.text_extraction import URL_PATTERN, extract_entries
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+IMPORT_BATCH_SIZE = 1000
+# Species entries per task of the parse stage's process pool
+PARSE_CHUNK_SIZE = 500
+
+
+class ImportSession:
+    """
+    Identity map and write queue for one import run.
+
+    The body sites, diseases, products and species already in the database
+    are loaded by name once, and every later mention of a name resolves to
+    the same object in memory, so queries scale with the new entities rather
+    than with mentions. New entities, changes to existing ones, species
+    links, migrations, product events and interactions are queued and
+    written by flush() with a few bulk statements per table; as bulk writes
+    send no model signals, the caches those maintain are invalidated once,
+    on commit.
+
+    Queued objects have no primary key until flush(), so links and natural
+    keys are recorded by name, which is unique for all four models.
+    """
+
+    # In foreign key order: a body site may be referenced by a new disease or species
+    MODELS = (BodySite, Disease, Product, Species)
+    # Fields the importer changes on objects it has seen before
+    UPDATE_FIELDS = {
+        BodySite: ["description", "updated_at"],
+        Disease: ["description", "updated_at"],
+        Product: ["updated_at"],
+        Species: ["phyla", "description", "genome_reference_link", "origin_site", "updated_at"],
+    }
+
+    def __init__(self):
+        self.objects = {model: {obj.name: obj for obj in model.objects.all()} for model in self.MODELS}
+        self.new = {model: [] for model in self.MODELS}
+        self.mentions = 0
+        self.changed = {model: {} for model in self.MODELS}
+        # Species M2M field -> {(species name, other name)}
+        self.links = {"body_sites": set(), "diseases": set(), "products": set()}
+        # Model -> {natural key: row}
+        self.rows = {MigrationPattern: {}, ProductEvent: {}, SpeciesInteraction: {}}
+
+    def get_or_create(self, model, name, defaults=None):
+        """Like `model.objects.get_or_create(name=name, defaults=defaults)`, from memory."""
+        self.mentions += 1
+        known = self.objects[model]
+        obj = known.get(name)
+        if obj is not None:
+            return obj, False
+        obj = known[name] = model(name=name, **(defaults or {}))
+        self.new[model].append(obj)
+        return obj, True
+
+    def save(self, obj):
+        """Queue the changes to an object from get_or_create; new ones are written as they are at flush()."""
+        if obj.pk is not None:
+            self.changed[type(obj)][obj.pk] = obj
+
+    def link(self, species, relation, *objects):
+        self.links[relation].update((species.name, obj.name) for obj in objects)
+
+    def add(self, row, *natural_key):
+        """Queue a row; the first one queued for a natural key wins, as get_or_create would."""
+        self.rows[type(row)].setdefault(natural_key, row)
+
+    def flush(self):
+        """
+        Write everything queued. Rows whose natural key (or link) already
+        exists are left as they are.
+        """
+        now = timezone.now()
+        for model in self.MODELS:
+            # Sets the primary keys, which the rows and links below read
+            model.objects.bulk_create(self.new[model], batch_size=IMPORT_BATCH_SIZE)
+            for obj in self.changed[model].values():
+                # bulk_update skips auto_now
+                obj.updated_at = now
+            model.objects.bulk_update(
+                self.changed[model].values(), self.UPDATE_FIELDS[model], batch_size=IMPORT_BATCH_SIZE,
+            )
+
+        # Every species has a summary row (the species list inner-joins it);
+        # the counts are filled in on commit
+        SpeciesSummary.objects.bulk_create(
+            [SpeciesSummary(species=species, phyla=species.phyla) for species in self.new[Species]],
+            batch_size=IMPORT_BATCH_SIZE, ignore_conflicts=True,
+        )
+
+        species_ids = {name: species.pk for name, species in self.objects[Species].items()}
+        for relation, pairs in self.links.items():
+            field = Species._meta.get_field(relation)
+            through, other = field.remote_field.through, f"{field.m2m_reverse_field_name()}_id"
+            other_ids = {name: obj.pk for name, obj in self.objects[field.related_model].items()}
+            through.objects.bulk_create(
+                [
+                    through(species_id=species_ids[species], **{other: other_ids[name]})
+                    for species, name in pairs
+                ],
+                batch_size=IMPORT_BATCH_SIZE, ignore_conflicts=True,
+            )
+            # bulk_create sends no m2m_changed, so move updated_at on both ends
+            # of the links for conditional GETs, as touch_on_m2m_change does
+            Species.objects.filter(pk__in={species_ids[species] for species, _ in pairs}).update(updated_at=now)
+            field.related_model.objects.filter(pk__in={other_ids[name] for _, name in pairs}).update(updated_at=now)
+        for model, rows in self.rows.items():
+            model.objects.bulk_create(rows.values(), batch_size=IMPORT_BATCH_SIZE, ignore_conflicts=True)
+
+        # Bulk writes skip the model signals that maintain the KPI cache, the
+        # cached list fragments and the species summaries
+        touched = {species.pk for species in (*self.new[Species], *self.changed[Species].values())}
+        touched.update(species_ids[species] for pairs in self.links.values() for species, _ in pairs)
+        for model, key_fields in ((MigrationPattern, ("species_id",)),
+                                  (ProductEvent, ("species_id",)),
+                                  (SpeciesInteraction, ("species_1_id", "species_2_id"))):
+            touched.update(getattr(row, field) for row in self.rows[model].values() for field in key_fields)
+        schedule_summary_refresh(touched)
+        transaction.on_commit(invalidate_kpis)
+        written = [*self.MODELS, *self.rows]
+        transaction.on_commit(lambda: bump_model_versions(*written))
+
+    def summary(self):
+        created = ", ".join(f"{model.__name__} {len(objects)}" for model, objects in self.new.items())
+        return f"{self.mentions} name lookups resolved in memory; created: {created}."
 
 class Command(BaseCommand):
     help = "Import nasal microbiome data from Nasal20Microbiomes.xlsx into Django models"
 
     def add_arguments(self, parser):
         parser.add_argument('--file', type=str, help="Path to the Excel file", default="../data/Nasal20Microbiomes.xlsx")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Processes for the text parsing stage (default: one per CPU)")
 
     def handle(self, *args, **options):
         file_path = os.path.join(BASE_DIR, options['file'])
@@ -26,22 +159,10 @@ class Command(BaseCommand):
             self.stderr.write(f"Error reading Sheet1: {e}")
             return
 
-        with transaction.atomic():
-            self.import_sheet1(sheet1)
+        self.import_sheet1(sheet1, workers=options['workers'])
 
         self.stdout.write(self.style.SUCCESS("✅ Successfully imported all data!"))
 
-    def normalize(self, val):
-        if pd.isna(val) or val == "":
-            return ""
-        return str(val).strip()
-
-    def normalize_url(self, text):
-        if not text:
-            return None
-        urls = re.findall(r'https?://[^\s\)]+', str(text))
-        return urls[0] if urls else None
-
     def normalize_name(self, name):
         return str(name).strip() if pd.notna(name) else ""
 
@@ -56,12 +177,12 @@ class Command(BaseCommand):
         # Truncate name if too long (max 100 chars)
         short_name = full_name[:100]
         
-        obj, created = BodySite.objects.get_or_create(name=short_name)
+        obj, created = self.session.get_or_create(BodySite, short_name)
         
         # If created or description is empty, update description with full name if different
         if (created or not obj.description) and len(full_name) > 100:
             obj.description = full_name
-            obj.save()
+            self.session.save(obj)
             
         return obj
 
@@ -74,21 +195,16 @@ class Command(BaseCommand):
 
         site = self.get_or_create_body_site(site_name) if site_name else None
         
-        # Try to get existing disease
-        try:
-            obj = Disease.objects.get(name=name)
-            # Update description if provided and existing is empty
-            if description and not obj.description:
-                obj.description = description
-                obj.save()
-        except Disease.DoesNotExist:
-            obj = Disease.objects.create(
-                name=name,
-                mechanism_of_causation=self.normalize_name(mechanism),
-                affected_site=site,
-                description=description
-            )
-            
+        obj, created = self.session.get_or_create(Disease, name, defaults={
+            "mechanism_of_causation": self.normalize_name(mechanism),
+            "affected_site": site,
+            "description": description,
+        })
+        # Update description if provided and existing is empty
+        if not created and description and not obj.description:
+            obj.description = description
+            self.session.save(obj)
+
         return obj
 
     def get_or_create_product(self, name, mechanism=""):
@@ -97,256 +213,79 @@ class Command(BaseCommand):
         name = self.normalize_name(name)
         if not name:
             return None
-        obj, _ = Product.objects.get_or_create(
-            name=name,
+        obj, _ = self.session.get_or_create(
+            Product, name,
             defaults={"mechanism_of_action": self.normalize_name(mechanism)}
         )
         return obj
 
-    def extract_list_from_text(self, text, sep=","):
-        if pd.isna(text) or not text:
-            return []
-        items = [x.strip() for x in str(text).split(sep) if x.strip()]
-        return items
-    def is_phylum_row(self, row):
-        species = self.normalize(row["Species"])
-        if not species:
-            return False
-        other_columns = [col for col in row.index if col != "Species"]
-
-        # Check that every other column is empty/NaN after normalization
-        return all(self.normalize(row[col]) == "" for col in other_columns)
-    def parse_body_site_interactions(self, interaction_str):
-        if not interaction_str:
-            return [], ""
-        [body_sites, description] = interaction_str.split("\n")
-        pairs = []
-        for part in str(body_sites).split(","):
-            sites = [s.strip() for s in part.split("–") if s.strip()]
-            if len(sites) == 2:
-                pairs.append((sites[0], sites[1]))
-        return pairs, description
-    def extract_products_from_text(self, text):
-        """Extract known products like 'lugdunin', 'pneumolysin', etc."""
-        if not text:
-            return []
-        product_names = []
-        # Add more as needed
-        known_products = [
-            "lugdunin", "pneumolysin", "salivaricin", "phenol-soluble modulins",
-            "hemolysins", "proteases", "lipases", "biofilm", "siderophore",
-            "bacteriocin", "toxic shock syndrome toxin", "enterotoxins", "exfoliatin",
-            "collagenase", "hyaluronidase", "autolysin", "neuraminidase",
-            "staphyloxanthin", "catalase", "delta-toxin", "sarcinaxanthin"
+    def blank_mask(self, frame):
+        """True where a cell is NaN or a whitespace-only string."""
+        text = frame.astype("string")
+        return frame.isna() | text.apply(lambda col: col.str.strip().eq("")).fillna(False)
+
+    def join_non_empty(self, column, keys):
+        """Per group of `keys`, the stripped non-empty values of `column` joined by newlines."""
+        text = column.astype("string").str.strip()
+        text = text[text.ne("").fillna(False)]
+        if text.empty:
+            return pd.Series(dtype="string")
+        # groupby().agg("\n".join) builds a Series per group; split one sorted array instead
+        codes, groups = pd.factorize(keys[text.index])
+        order = np.argsort(codes, kind="stable")
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        chunks = np.split(text.to_numpy(dtype=object)[order], bounds)
+        return pd.Series(["\n".join(chunk) for chunk in chunks], index=groups, dtype="string")
+
+    def parse_migrations(self, body_interaction):
+        """Per entry, the (from site, to site) pairs of its "A – B" lines."""
+        lines = body_interaction.str.split("\n").explode()
+        lines.index = pd.MultiIndex.from_arrays([lines.index, lines.groupby(level=0).cumcount()])
+        lines = lines.str.strip()
+        lines = lines[
+            lines.str.contains("–", regex=False).fillna(False)
+            & ~lines.str.contains("detected|presence|found").fillna(True)
         ]
-        text_lower = text.lower()
-        for prod in known_products:
-            if prod in text_lower:
-                product_names.append(prod.title().replace(" ", "-"))
-        return product_names
-
-    def extract_interactions_from_text(self, text, current_species_name):
+        # (entry, line, part) -> non-empty site name; lines with exactly two are migrations
+        sites = lines.str.split("–", expand=True).stack().dropna().str.strip() if len(lines) else lines
+        sites = sites[sites.ne("")]
+        position = sites.groupby(level=[0, 1]).cumcount().to_numpy()
+        parts = sites.groupby(level=[0, 1]).transform("size").to_numpy()
+        from_sites, to_sites = sites[(parts == 2) & (position == 0)], sites[(parts == 2) & (position == 1)]
+
+        migrations = {entry: [] for entry in body_interaction.index}
+        for entry, from_site, to_site in zip(from_sites.index.get_level_values(0), from_sites, to_sites):
+            migrations[entry].append((from_site, to_site))
+        return pd.Series(migrations.values(), index=body_interaction.index, dtype=object)
+
+    def extract_text_fields(self, entries, workers=1):
         """
-        Parse sentences like:
-        - 'Inhibits S. aureus'
-        - 'Coexists with C. accolens'
-        - 'Competes with Haemophilus influenzae'
-        Returns list of (target_species_name, interaction_type, mechanism_snippet)
+        extract_entries() over all entries, in chunks spread over `workers`
+        processes. Records come back in entry order.
         """
-        if not text:
-            return []
-        interactions = []
-        text = str(text)
-        sentences = re.split(r'[.\n!;]+', text)
-        for sent in sentences:
-            sent = sent.strip()
-            if not sent:
-                continue
-            sent_lower = sent.lower()
-
-            # Antagonistic patterns
-            if any(word in sent_lower for word in ["inhibit", "suppress", "kill", "block", "antagonistic", "reduce growth"]):
-                targets = self.extract_species_names_from_text(sent, exclude=[current_species_name])
-                for target in targets:
-                    interactions.append((target, "antagonistic", sent))
-
-            # Synergistic patterns
-            elif any(word in sent_lower for word in ["synergistic", "coexist", "co-aggregate", "enhance", "promote", "support", "cooperate"]):
-                targets = self.extract_species_names_from_text(sent, exclude=[current_species_name])
-                for target in targets:
-                    interactions.append((target, "synergistic", sent))
-
-            # Neutral or unclear → skip or mark neutral if needed
-        return interactions
-
-    def extract_species_names_from_text(self, text, exclude=None):
-        """Extract likely species names like 'S. aureus', 'Corynebacterium accolens'."""
-        exclude = exclude or []
-        candidates = set()
-        # Pattern: Capital letter + . + space + lowercase word (e.g., S. aureus)
-        abbrev_pattern = re.compile(r'\b([A-Z]\.\s+[a-z]\w+)')
-        full_pattern = re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)')
-
-        for match in abbrev_pattern.findall(text):
-            name = match.replace(". ", ".")
-            if name not in exclude:
-                candidates.add(name)
-
-        for match in full_pattern.findall(text):
-            if len(match.split()) == 2 and match not in exclude:
-                candidates.add(match)
-
-        # Map common abbreviations
-        abbrev_map = {
-            "S. aureus": "Staphylococcus aureus",
-            "S. epidermidis": "Staphylococcus epidermidis",
-            "C. accolens": "Corynebacterium accolens",
-            "S. pneumoniae": "Streptococcus pneumoniae",
-            "H. influenzae": "Haemophilus influenzae",
-            "M. catarrhalis": "Moraxella catarrhalis",
-            "P. aeruginosa": "Pseudomonas aeruginosa",
-            "F. nucleatum": "Fusobacterium nucleatum",
-        }
-        resolved = set()
-        for name in candidates:
-            resolved.add(abbrev_map.get(name, name))
-        return list(resolved)
-    def agg_non_empty(self, series):
-        return "\n".join([
-            str(x).strip() for x in series
-            if pd.notna(x) and str(x).strip() != ""
-        ])
-
-    def extract_urls_and_diseases(self, text):
+        chunks = [entries[start:start + PARSE_CHUNK_SIZE] for start in range(0, len(entries), PARSE_CHUNK_SIZE)]
+        if workers <= 1 or len(chunks) <= 1:
+            return [record for chunk in chunks for record in extract_entries(chunk)]
+        # Spawned workers import only text_extraction: no Django setup, and no
+        # inherited database connection
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context) as pool:
+            return [record for records in pool.map(extract_entries, chunks) for record in records]
+
+    def parse_sheet1(self, df, workers=1):
         """
-        Extract disease names from text and return (disease_name, description) pairs.
-        Intelligently extracts disease keywords from descriptive text.
+        Parse Sheet1 into one row per species entry, without touching the database.
+
+        Sheet1 lists species under phylum heading rows (a name with every other
+        column empty); a species' information may continue over several rows
+        whose Species cell is empty. Returns a frame with string columns
+        species, phylum, description, migration_mechanism and genome_url, and
+        object columns holding lists: migrations [(from site, to site)],
+        diseases [(name, description)], products [name] and
+        interactions [(target species, type, mechanism)].
         """
-        if not text:
-            return [], ""
-        
-        # Common disease name patterns and keywords
-        disease_keywords = [
-            'sepsis', 'pneumonia', 'meningitis', 'endocarditis', 'bacteremia',
-            'sinusitis', 'otitis', 'osteomyelitis', 'abscess', 'cellulitis',
-            'peritonitis', 'empyema', 'arthritis', 'pyelonephritis',
-            'pharyngitis', 'tonsillitis', 'bronchitis', 'gastroenteritis',
-            'conjunctivitis', 'mastoiditis', 'pericarditis', 'myocarditis',
-            'encephalitis', 'nephritis', 'hepatitis', 'colitis',
-            'enteritis', 'urethritis', 'vaginitis', 'folliculitis',
-            'impetigo', 'erysipelas', 'necrotizing fasciitis',
-            'toxic shock syndrome', 'scarlet fever', 'rheumatic fever',
-        ]
-        
-        lines = [line.strip() for line in str(text).split("\n") if line.strip()]
-        urls = []
-        disease_results = []  # List of (disease_name, description) tuples
-        seen_diseases = set()  # Track to avoid duplicates
-        
-        for line in lines:
-            # Extract URLs
-            if line.startswith(("http://", "https://")):
-                urls.append(line)
-                continue
-            elif re.match(r'^\s*www\.', line):
-                urls.append("https://" + line)
-                continue
-            
-            # Skip very long descriptive sentences
-            if len(line) > 150:
-                continue
-            
-            # Skip obvious non-disease headers/labels
-            if re.match(r'^(Virulence|Antibiotic|Important|Usually|Often|Chronic|Migrates|Direct|Hematogenous):',
-                       line, re.IGNORECASE):
-                continue
-            
-            # Skip sentences with descriptive verbs
-            if re.search(r'\b(causes disease|known for|may allow|can lead|can enter|can cause|producing toxins|inducing|occur in|often occur|resemble)\b',
-                        line, re.IGNORECASE):
-                continue
-            
-            line_lower = line.lower()
-            
-            # Check if line contains disease keywords
-            found_in_line = False
-            for keyword in disease_keywords:
-                if keyword in line_lower:
-                    # Try to extract a clean disease name around the keyword
-                    # Pattern: up to 5 words before keyword + keyword + up to 3 words after
-                    pattern = r'\b(?:[\w-]+\s+){0,5}' + re.escape(keyword) + r'(?:\s+[\w-]+){0,3}\b'
-                    matches = re.findall(pattern, line, re.IGNORECASE)
-                    
-                    for match in matches:
-                        disease_name = match.strip()
-                        # Clean up
-                        disease_name = re.sub(r'\s+', ' ', disease_name)
-                        disease_name = re.sub(r'^[^\w\(]+|[^\w\)]+$', '', disease_name)
-                        
-                        # Additional filtering
-                        if (disease_name and 
-                            len(disease_name) <= 100 and
-                            disease_name.lower() not in ['infections', 'infection', 'common syndromes include'] and
-                            not disease_name.lower().startswith(('the ', 'this ', 'these ', 'it ', 'they ')) and
-                            disease_name.lower() not in seen_diseases):
-                            
-                            disease_results.append((disease_name, line))
-                            seen_diseases.add(disease_name.lower())
-                            found_in_line = True
-                            break  # Only take first disease from each line
-            
-            # If no keyword match, check if line itself looks like a disease name
-            if not found_in_line and len(line) <= 100:
-                # Check for medical suffixes or disease-related terms
-                if (re.search(r'(itis|emia|osis|pathy|oma|syndrome|disease|disorder|infection)(\s|$|\()', line_lower) and
-                    line.lower() not in seen_diseases and
-                    not re.search(r'\b(include|such as|like|example|note|see|refer)\b', line_lower)):
-                    
-                    disease_results.append((line, line))
-                    seen_diseases.add(line.lower())
-        
-        return disease_results, "\n".join(urls)
-
-
-    def normalize_url(self, text):
-        if not text:
-            return None
-        urls = re.findall(r'https?://[^\s\)]+', str(text))
-        return urls[0] if urls else None
-    
-    def import_sheet1(self, df):
-        self.stdout.write("Importing Sheet1 with full field parsing...")
-
-        # --- Step 1: Identify phylum rows BEFORE any ffill ---
-        phylum_rows = set()
-        for idx, row in df.iterrows():
-            species_val = row["Species"]
-            if pd.notna(species_val):
-                # Check if ALL other columns are empty
-                other_cols = [col for col in df.columns if col != "Species"]
-                if all(pd.isna(row[col]) or (isinstance(row[col], str) and row[col].strip() == "") for col in other_cols):
-                    phylum_rows.add(idx)
-
-        # --- Step 2: Forward-fill species column ---
-        df = df.copy()
-        df["Species"] = df["Species"].ffill()
-
-        # --- Step 3: Build phylum map ---
-        current_phylum = "Unknown"
-        phylum_map = {}
-        for idx, row in df.iterrows():
-            if idx in phylum_rows:
-                current_phylum = str(row["Species"]).strip()
-            else:
-                species_name = self.normalize(row["Species"])
-                if species_name:
-                    phylum_map[species_name] = current_phylum
-
-        # --- Step 4: Remove phylum rows ---
-        data_rows = df[~df.index.isin(phylum_rows)].copy()
-        data_rows = data_rows.dropna(subset=["Species"], how="all")
-
-        # --- Step 5: Safely extract columns by position ---
+        # Positional columns: Species, Functions, Body site interaction,
+        # Migration Mechanism, extra notes, infections caused, URLs
         cols = df.columns.tolist()
         col_map = {
             "species": cols[0] if len(cols) > 0 else "Species",
@@ -358,48 +297,94 @@ class Command(BaseCommand):
             "urls": cols[6] if len(cols) > 6 else "Unnamed: 6",              # may be empty
         }
 
-        # --- Step 6: Group by species with all real columns ---
-        agg_fields = {}
+        # Phylum rows are found before the forward fill, by mask
+        is_phylum = df["Species"].notna() & self.blank_mask(df.drop(columns="Species")).all(axis=1)
+        species = df["Species"].ffill()
+        # Each phylum row starts a group; rows before the first one are "Unknown"
+        phylum = species.where(is_phylum).astype("string").str.strip().groupby(is_phylum.cumsum()).transform("first")
+        phylum = phylum.fillna("Unknown")
+
+        data = ~is_phylum & species.notna()
+        species_name = species.astype("string").str.strip().fillna("")
+        # Later rows of a species name win, as with a dict filled row by row
+        named = data & species_name.ne("")
+        phylum_by_name = phylum[named].groupby(species_name[named], sort=False).last()
+
+        keys = species[data]
+        entries = keys.drop_duplicates()
+        parsed = pd.DataFrame({"species": pd.array(entries.astype("string").str.strip().fillna(""), dtype="string")})
         for key, col in col_map.items():
-            if key in ["species"]:
+            if key == "species":
                 continue
-            if col in data_rows.columns:
-                agg_fields[col] = self.agg_non_empty
+            if col in df.columns:
+                joined = self.join_non_empty(df.loc[data, col], keys).reindex(entries.to_numpy())
+                parsed[key] = pd.Series(joined.to_numpy(), index=parsed.index, dtype="string").fillna("")
+            else:
+                parsed[key] = pd.Series("", index=parsed.index, dtype="string")
+        parsed = parsed[parsed["species"].ne("")].reset_index(drop=True)
 
-        grouped = data_rows.groupby(col_map["species"], sort=False).agg(agg_fields).reset_index()
+        parsed["phylum"] = parsed["species"].map(phylum_by_name).astype("string").fillna("Unknown")
+        parsed["description"] = parsed["functions"].str.cat(parsed["extra_notes"], sep="\n").str.strip()
 
-        # --- Step 7: Process each species entry ---
-        for _, group in grouped.iterrows():
-            species_name = self.normalize(group[col_map["species"]])
-            if not species_name:
-                continue
+        # Per-entry text extraction (regex heuristics) over the joined cells
+        records = self.extract_text_fields(
+            list(zip(parsed["species"], parsed["description"], parsed["infections"])), workers,
+        )
+        parsed["diseases"] = pd.Series([record[0] for record in records], index=parsed.index, dtype=object)
+        disease_urls = pd.Series([record[1] for record in records], index=parsed.index, dtype="string")
+        parsed["products"] = pd.Series([record[2] for record in records], index=parsed.index, dtype=object)
+        parsed["interactions"] = pd.Series([record[3] for record in records], index=parsed.index, dtype=object)
 
-            functions = self.normalize(group.get(col_map["functions"], ""))
-            body_interaction = self.normalize(group.get(col_map["body_interaction"], ""))
-            mig_mech = self.normalize(group.get(col_map["migration_mech"], ""))
-            extra_notes = self.normalize(group.get(col_map["extra_notes"], ""))
-            infections_raw = self.normalize(group.get(col_map["infections"], ""))
-            urls_raw = self.normalize(group.get(col_map["urls"], ""))
+        all_urls = (parsed["urls"] + "\n" + disease_urls).str.strip()
+        parsed["genome_url"] = all_urls.str.extract(f"({URL_PATTERN})", expand=False).astype("string")
+        parsed["migrations"] = self.parse_migrations(parsed["body_interaction"])
 
-            full_functions = "\n".join([x for x in [functions, extra_notes] if x]).strip()
+        return parsed[[
+            "species", "phylum", "description", "migration_mech", "genome_url",
+            "migrations", "diseases", "products", "interactions",
+        ]].rename(columns={"migration_mech": "migration_mechanism"})
 
-            disease_lines, _ = self.extract_urls_and_diseases(infections_raw)
-            all_urls = "\n".join([
-                urls_raw,
-                _
-            ]).strip()
-            genome_url = self.normalize_url(all_urls)
+    def import_sheet1(self, df, workers=1):
+        """
+        Stage one parses the whole sheet, using `workers` processes for the
+        text heuristics; stage two writes the parsed entries in one short
+        transaction that does no parsing.
+        """
+        self.stdout.write("Importing Sheet1 with full field parsing...")
+
+        started = time.monotonic()
+        parsed = self.parse_sheet1(df, workers=workers)
+        self.stdout.write(
+            f"Parsed {len(parsed)} species entries from {len(df)} rows in {time.monotonic() - started:.1f}s."
+        )
+
+        started = time.monotonic()
+        with transaction.atomic():
+            self.write_sheet1(parsed)
+        self.stdout.write(f"Wrote the entries in {time.monotonic() - started:.1f}s.")
+        self.stdout.write(self.session.summary())
+        self.stdout.write("✅ Finished Sheet1 import with all 7 columns parsed.")
 
-            phylum = phylum_map.get(species_name, "Unknown")
+    def write_sheet1(self, parsed):
+        """Write parsed Sheet1 entries (see parse_sheet1); call inside a transaction."""
+        self.session = ImportSession()
+
+        nose = self.get_or_create_body_site("Nose")
+        for entry in parsed.itertuples(index=False):
+            species_name = entry.species
+            phylum = entry.phylum
+            full_functions = entry.description
+            mig_mech = entry.migration_mechanism
+            genome_url = entry.genome_url if pd.notna(entry.genome_url) else None
 
             # Create Species
-            species, created = Species.objects.get_or_create(
-                name=species_name,
+            species, created = self.session.get_or_create(
+                Species, species_name,
                 defaults={
                     "phyla": phylum,
                     "description": full_functions,
                     "genome_reference_link": genome_url,
-                    "origin_site": self.get_or_create_body_site("Nose"),
+                    "origin_site": nose,
                 }
             )
             if not created:
@@ -408,80 +393,65 @@ class Command(BaseCommand):
                 if not species.genome_reference_link and genome_url:
                     species.genome_reference_link = genome_url
                 species.phyla = phylum
-                species.save()
-
-            # Ensure Nose as origin and body site
-            nose = self.get_or_create_body_site("Nose")
-            if nose:
                 species.origin_site = nose
-                species.body_sites.add(nose)
-
-            # Parse MigrationPatterns from "Body site interaction"
-            if body_interaction:
-                for line in body_interaction.split("\n"):
-                    line = line.strip()
-                    if "–" in line and not any(skip in line for skip in ["detected", "presence", "found"]):
-                        sites = [s.strip() for s in line.split("–") if s.strip()]
-                        if len(sites) == 2:
-                            from_site = self.get_or_create_body_site(sites[0])
-                            to_site = self.get_or_create_body_site(sites[1])
-                            if from_site and to_site:
-                                mp, _ = MigrationPattern.objects.get_or_create(
-                                    species=species,
-                                    from_site=from_site,
-                                    to_site=to_site,
-                                    defaults={"mechanism": mig_mech}
-                                )
-                                species.body_sites.add(from_site, to_site)
-
-            # Parse diseases
-            # Parse diseases
-            for disease_name, description in disease_lines:
-                disease_name = self.normalize(disease_name)
-                if disease_name:
-                    disease = self.get_or_create_disease(
-                        disease_name,
-                        mechanism=mig_mech,
-                        site_name="Nose",
-                        description=description
+                self.session.save(species)
+
+            # Nose as origin and body site
+            self.session.link(species, "body_sites", nose)
+
+            # MigrationPatterns from "Body site interaction"
+            for from_name, to_name in entry.migrations:
+                from_site = self.get_or_create_body_site(from_name)
+                to_site = self.get_or_create_body_site(to_name)
+                if from_site and to_site:
+                    self.session.add(
+                        MigrationPattern(species=species, from_site=from_site, to_site=to_site, mechanism=mig_mech),
+                        species.name, from_site.name, to_site.name,
                     )
-                    if disease:
-                        species.diseases.add(disease)
+                    self.session.link(species, "body_sites", from_site, to_site)
+
+            # Diseases
+            for disease_name, description in entry.diseases:
+                disease = self.get_or_create_disease(
+                    disease_name,
+                    mechanism=mig_mech,
+                    site_name="Nose",
+                    description=description
+                )
+                if disease:
+                    self.session.link(species, "diseases", disease)
 
-            # Parse Products (e.g., lugdunin, pneumolysin) from full_functions
-            product_names = self.extract_products_from_text(full_functions)
-            for pname in product_names:
+            # Products (e.g., lugdunin, pneumolysin) named in the functions
+            for pname in entry.products:
                 product = self.get_or_create_product(pname, mechanism="")
                 if product:
-                    species.products.add(product)
-                    # Optional: create ProductEvent
-                    ProductEvent.objects.get_or_create(
-                        species=species,
-                        site=nose,
-                        product=product,
-                        defaults={
-                            "mechanism": f"Produced by {species_name} as noted in Functions.",
-                            "evidence": genome_url or ""
-                        }
+                    self.session.link(species, "products", product)
+                    self.session.add(
+                        ProductEvent(
+                            species=species,
+                            site=nose,
+                            product=product,
+                            mechanism=f"Produced by {species_name} as noted in Functions.",
+                            evidence=genome_url or "",
+                        ),
+                        species.name, nose.name, product.name,
                     )
 
-            # Parse SpeciesInteractions (e.g., "Inhibits S. aureus")
-            interactions = self.extract_interactions_from_text(full_functions, species_name)
-            for target_name, itype, mech in interactions:
-                target_species, _ = Species.objects.get_or_create(
-                    name=target_name, defaults={"phyla": "Unknown"}
+            # SpeciesInteractions (e.g., "Inhibits S. aureus")
+            for target_name, itype, mech in entry.interactions:
+                target_species, _ = self.session.get_or_create(
+                    Species, target_name, defaults={"phyla": "Unknown"}
                 )
-                SpeciesInteraction.objects.get_or_create(
-                    species_1=species,
-                    species_2=target_species,
-                    site=nose,
-                    defaults={
-                        "interaction_type": itype,
-                        "mechanism": mech,
-                        "evidence": genome_url or ""
-                    }
+                self.session.add(
+                    SpeciesInteraction(
+                        species_1=species,
+                        species_2=target_species,
+                        site=nose,
+                        interaction_type=itype,
+                        mechanism=mech,
+                        evidence=genome_url or "",
+                    ),
+                    species.name, target_species.name, nose.name,
                 )
 
-            species.save()
-
-        self.stdout.write("✅ Finished Sheet1 import with all 7 columns parsed.")
+        self.session.flush()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from NasoBiome.summaries import refresh_species_summaries
+
+
+class Command(BaseCommand):
+    help = "Recount the species summary table from the relational tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('species_ids', type=int, nargs='*', help="Species to recount (default: all)")
+
+    def handle(self, *args, **options):
+        refreshed = refresh_species_summaries(options['species_ids'] or None)
+        self.stdout.write(f"  {'species recounted':<20} {refreshed}")
+        self.stdout.write(self.style.SUCCESS("✅ Species summaries rebuilt"))
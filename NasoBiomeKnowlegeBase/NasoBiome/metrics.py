@@ -0,0 +1,156 @@
+"""
+Prometheus metrics for views, SQL, Cypher statements and Neo4j export stages.
+
+Metrics are kept in-process by prometheus_client. When PROMETHEUS_MULTIPROC_DIR
+is set, every process writes its samples to that directory and the /metrics/
+endpoint aggregates them. The Docker image sets it, and the web service
+empties it on startup so samples of earlier containers are not counted;
+outside Docker it is unset and only the serving process is reported.
+"""
+import hashlib
+import os
+import re
+import time
+from functools import lru_cache, wraps
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+EXPORT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, float("inf"))
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+REQUESTS = Counter(
+    "nasobiome_requests", "Requests served, by URL name and status code.", ["view", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "nasobiome_request_seconds", "Total request latency by URL name.", ["view"],
+)
+REQUEST_SQL_TIME = Histogram(
+    "nasobiome_request_sql_seconds", "SQL time spent per request, by URL name.", ["view"],
+)
+SQL_QUERIES = Counter(
+    "nasobiome_sql_queries", "SQL statements executed, by URL name.", ["view"],
+)
+REQUEST_CYPHER_TIME = Histogram(
+    "nasobiome_request_cypher_seconds", "Cypher time spent per request, by URL name.", ["view"],
+)
+CYPHER_LATENCY = Histogram(
+    "nasobiome_cypher_seconds", "Cypher statement latency by query template.", ["query"],
+)
+EXPORT_STAGE_LATENCY = Histogram(
+    "nasobiome_export_stage_seconds", "Neo4j export duration by stage.", ["stage"],
+    buckets=EXPORT_BUCKETS,
+)
+
+def observe_request(view, status, stats):
+    REQUESTS.labels(view=view, status=str(status)).inc()
+    REQUEST_LATENCY.labels(view=view).observe(stats.total_time)
+    REQUEST_SQL_TIME.labels(view=view).observe(stats.sql_time)
+    SQL_QUERIES.labels(view=view).inc(stats.sql_count)
+    REQUEST_CYPHER_TIME.labels(view=view).observe(stats.cypher_time)
+
+
+@lru_cache(maxsize=1024)
+def _query_fingerprint(query):
+    normalized = re.sub(r"\s+", " ", query).strip()
+    return hashlib.sha1(normalized.encode()).hexdigest()[:8]
+
+
+def query_template_name(query, query_name=None):
+    """
+    Name a Cypher statement as "<query_name>#<hash of the query text>", e.g.
+    "merge_species#3f2a9c1d". Query names are passed to session.run() by the
+    code running the statement, so the set of names is fixed and safe to use
+    as a metric label; the hash tells apart statements built per label.
+    """
+    return f"{query_name or 'unnamed'}#{_query_fingerprint(query)}"
+
+
+def observe_cypher(name, duration):
+    CYPHER_LATENCY.labels(query=name).observe(duration)
+
+
+def timed_export_stage(func):
+    """Record the duration of a Neo4j export function as an export stage."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            EXPORT_STAGE_LATENCY.labels(stage=func.__name__).observe(time.perf_counter() - start)
+    return wrapper
+
+
+def _histogram_quantile(quantile, buckets):
+    """Estimate a quantile from cumulative (upper_bound, count) buckets."""
+    total = buckets[-1][1]
+    if total == 0:
+        return None
+    rank = quantile * total
+    lower_bound, lower_count = 0.0, 0.0
+    for upper_bound, count in buckets:
+        if count >= rank:
+            if upper_bound == float("inf"):
+                return lower_bound
+            if count == lower_count:
+                return upper_bound
+            return lower_bound + (upper_bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = upper_bound, count
+    return lower_bound
+
+
+class QuantileCollector:
+    """
+    Exposes p50/p95/p99 estimates of every histogram in `source`, so latency
+    percentiles can be read straight from the endpoint without a Prometheus
+    server.
+    """
+
+    def __init__(self, source):
+        self.source = source
+
+    def collect(self):
+        for family in self.source.collect():
+            if family.type != "histogram":
+                continue
+            series = {}
+            for sample in family.samples:
+                if not sample.name.endswith("_bucket"):
+                    continue
+                labels = tuple(sorted((k, v) for k, v in sample.labels.items() if k != "le"))
+                series.setdefault(labels, []).append((float(sample.labels["le"]), sample.value))
+
+            label_names = sorted({name for labels in series for name, _ in labels}) + ["quantile"]
+            gauge = GaugeMetricFamily(
+                f"{family.name}_quantile",
+                f"Estimated quantiles of {family.name}.",
+                labels=label_names,
+            )
+            for labels, buckets in series.items():
+                buckets.sort()
+                values = dict(labels)
+                for quantile in QUANTILES:
+                    estimate = _histogram_quantile(quantile, buckets)
+                    if estimate is not None:
+                        gauge.add_metric(
+                            [values.get(name, "") for name in label_names[:-1]] + [str(quantile)],
+                            estimate,
+                        )
+            yield gauge
+
+
+def render_metrics():
+    """Return (body, content_type) in the Prometheus text format."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    quantiles = CollectorRegistry(auto_describe=False)
+    quantiles.register(QuantileCollector(registry))
+    return generate_latest(registry) + generate_latest(quantiles), CONTENT_TYPE_LATEST
@@ -0,0 +1,56 @@
+import json
+import logging
+
+from django.db import connection
+
+from . import metrics
+from .instrumentation import end_request_stats, sql_execute_wrapper, start_request_stats
+
+logger = logging.getLogger("NasoBiome.performance")
+
+
+class PerformanceMiddleware:
+    """
+    Measures SQL, Cypher and template time for each request and reports it
+    in a Server-Timing header and one JSON log line.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats, token = start_request_stats()
+        try:
+            with connection.execute_wrapper(sql_execute_wrapper):
+                response = self.get_response(request)
+        finally:
+            end_request_stats(token)
+
+        total_ms = stats.total_time * 1000
+        sql_ms = stats.sql_time * 1000
+        cypher_ms = stats.cypher_time * 1000
+        template_ms = stats.template_time * 1000
+
+        response["Server-Timing"] = ", ".join([
+            f'sql;dur={sql_ms:.1f};desc="{stats.sql_count} queries"',
+            f'cypher;dur={cypher_ms:.1f};desc="{stats.cypher_count} statements"',
+            f'tpl;dur={template_ms:.1f};desc="templates"',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unmatched"
+        metrics.observe_request(view, response.status_code, stats)
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 1),
+            "sql_count": stats.sql_count,
+            "sql_ms": round(sql_ms, 1),
+            "cypher_count": stats.cypher_count,
+            "cypher_ms": round(cypher_ms, 1),
+            "template_ms": round(template_ms, 1),
+        }))
+        return response
@@ -0,0 +1,43 @@
+# Generated by Django 5.0 on 2026-10-19 10:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NasoBiome', '0006_alter_migrationpattern_mechanism'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GraphVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Export function that produced this version.', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GraphElement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('kind', models.CharField(choices=[('node', 'Node'), ('relationship', 'Relationship')], max_length=20)),
+                ('fingerprint', models.CharField(blank=True, help_text='Hash of the exported properties.', max_length=40)),
+                ('removed', models.BooleanField(default=False)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='elements', to='NasoBiome.graphversion')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GraphChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('node', 'Node'), ('relationship', 'Relationship')], max_length=20)),
+                ('key', models.CharField(max_length=255)),
+                ('action', models.CharField(choices=[('added', 'Added'), ('changed', 'Changed'), ('removed', 'Removed')], max_length=20)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='NasoBiome.graphversion')),
+            ],
+        ),
+    ]
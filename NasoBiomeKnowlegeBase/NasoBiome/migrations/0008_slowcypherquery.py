@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-19 10:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NasoBiome', '0007_graphversion_graphchange_graphelement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowCypherQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query_name', models.CharField(help_text='Calling function and hash of the query text.', max_length=200)),
+                ('query', models.TextField()),
+                ('parameters', models.JSONField(blank=True, default=dict)),
+                ('duration_ms', models.FloatField()),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('total_db_hits', models.BigIntegerField(blank=True, null=True)),
+                ('profile', models.JSONField(blank=True, help_text='PROFILE operators with db hits and rows, outermost first.', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Slow Cypher Query',
+                'verbose_name_plural': 'Slow Cypher Queries',
+                'indexes': [models.Index(fields=['-duration_ms'], name='NasoBiome_s_duratio_a253f0_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0 on 2026-10-19 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NasoBiome', '0008_slowcypherquery'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='disease',
+            index=models.Index(fields=['affected_site', 'name'], name='disease_site_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='migrationpattern',
+            index=models.Index(fields=['from_site', 'id'], name='migration_from_site_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='migrationpattern',
+            index=models.Index(fields=['to_site', 'id'], name='migration_to_site_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productevent',
+            index=models.Index(fields=['site', 'id'], name='product_event_site_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='species',
+            index=models.Index(fields=['phyla', 'id'], name='species_phyla_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='species',
+            index=models.Index(fields=['genus', 'id'], name='species_genus_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='speciesinteraction',
+            index=models.Index(fields=['interaction_type', 'id'], name='interaction_type_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='speciesinteraction',
+            index=models.Index(fields=['site', 'id'], name='interaction_site_id_idx'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.0 on 2026-10-19 10:52
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Columns folded into each table's search_vector, by rank weight (A highest)
+SEARCH_DOCUMENTS = {
+    'NasoBiome_species': {'A': ['name'], 'B': ['phyla', 'genus', 'family'], 'C': ['description']},
+    'NasoBiome_disease': {'A': ['name'], 'C': ['description', 'mechanism_of_causation']},
+    'NasoBiome_product': {'A': ['name'], 'C': ['description', 'mechanism_of_action']},
+    'NasoBiome_speciesinteraction': {'B': ['interaction_type'], 'C': ['mechanism'], 'D': ['evidence']},
+    'NasoBiome_migrationpattern': {'C': ['mechanism', 'trigger_conditions'], 'D': ['evidence']},
+    'NasoBiome_productevent': {'C': ['mechanism'], 'D': ['evidence']},
+}
+
+
+def search_trigger_sql(table, weights):
+    function = f'{table.lower()}_search_vector_update'
+    document = ' || '.join(
+        "setweight(to_tsvector('english', {}), '{}')".format(
+            " || ' ' || ".join(f'coalesce(NEW.{column}, \'\')' for column in columns), weight
+        )
+        for weight, columns in weights.items()
+    )
+    forward = f"""
+        CREATE FUNCTION {function}() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {document};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER {function}
+            BEFORE INSERT OR UPDATE ON "{table}"
+            FOR EACH ROW EXECUTE FUNCTION {function}();
+
+        UPDATE "{table}" SET id = id;
+    """
+    reverse = f"""
+        DROP TRIGGER IF EXISTS {function} ON "{table}";
+        DROP FUNCTION IF EXISTS {function}();
+    """
+    return migrations.RunSQL(forward, reverse)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NasoBiome', '0009_list_view_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='disease',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='migrationpattern',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='productevent',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='species',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='speciesinteraction',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='disease',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='disease_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='migrationpattern',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='migration_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productevent',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_event_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='species',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='species_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='speciesinteraction',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='interaction_search_idx'),
+        ),
+    ] + [search_trigger_sql(table, weights) for table, weights in SEARCH_DOCUMENTS.items()]
@@ -0,0 +1,98 @@
+import sys
+
+from django.db import migrations
+
+# model, natural key columns, ProductEvent foreign key pointing at the model
+NATURAL_KEYS = [
+    ("SpeciesInteraction", ("species_1_id", "species_2_id", "site_id"), "interaction_id"),
+    ("MigrationPattern", ("species_id", "from_site_id", "to_site_id"), "migration_id"),
+    ("ProductEvent", ("species_id", "site_id", "product_id"), None),
+]
+
+# Columns merged from duplicates into the kept row: free text is appended
+# when the kept row does not already contain it, other values fill the kept
+# row's empty (NULL / "") columns
+TEXT_COLUMNS = {
+    "SpeciesInteraction": ("mechanism", "evidence"),
+    "MigrationPattern": ("mechanism", "trigger_conditions", "evidence"),
+    "ProductEvent": ("mechanism", "evidence"),
+}
+VALUE_COLUMNS = {
+    "SpeciesInteraction": ("interaction_type", "associated_disease_id"),
+    "MigrationPattern": ("resulting_disease_id",),
+    "ProductEvent": ("interacting_species_id", "disease_id", "migration_id", "interaction_id"),
+}
+
+
+def _merge(model_name, kept, duplicate, log):
+    """Merge `duplicate` (a column -> value dict) into `kept` in place; log values that could not be kept."""
+    for column in TEXT_COLUMNS[model_name]:
+        text = (duplicate[column] or "").strip()
+        if text and text not in (kept[column] or ""):
+            kept[column] = f"{kept[column]}\n{text}" if kept[column] else text
+    for column in VALUE_COLUMNS[model_name]:
+        value = duplicate[column]
+        if value in (None, ""):
+            continue
+        if kept[column] in (None, ""):
+            kept[column] = value
+        elif kept[column] != value:
+            log(f"    {column}={value!r} dropped (kept {kept[column]!r})")
+
+
+def dedupe_natural_keys(apps, schema_editor):
+    """
+    Merge the rows sharing a natural key into the oldest one, so migration
+    0014 can add the unique constraints. Text of the duplicates is appended
+    to the kept row and empty columns are filled from them; product events
+    pointing at a removed interaction or migration are moved to the row that
+    is kept. Every removed row, with all its values, is written to the
+    migration output.
+    """
+    def log(line):
+        sys.stdout.write(line + "\n")
+
+    ProductEvent = apps.get_model("NasoBiome", "ProductEvent")
+    for model_name, key, event_fk in NATURAL_KEYS:
+        model = apps.get_model("NasoBiome", model_name)
+        columns = ["id", *key, *TEXT_COLUMNS[model_name], *VALUE_COLUMNS[model_name]]
+        kept, replaced_by = {}, {}
+        for values in model.objects.order_by("pk").values_list(*columns).iterator():
+            row = dict(zip(columns, values))
+            keep = kept.setdefault(tuple(row[column] for column in key), row)
+            if keep is not row:
+                replaced_by.setdefault(keep["id"], []).append(row)
+        if not replaced_by:
+            continue
+
+        log(f"\n  {model_name}: merging {sum(map(len, replaced_by.values()))} duplicate rows")
+        rows = {row["id"]: row for row in kept.values() if row["id"] in replaced_by}
+        for keep, duplicates in replaced_by.items():
+            row = rows[keep]
+            before = dict(row)
+            for duplicate in duplicates:
+                log(f"    removed {model_name} {duplicate['id']} (merged into {keep}): {duplicate}")
+                _merge(model_name, row, duplicate, log)
+            changes = {column: value for column, value in row.items() if value != before[column]}
+            if changes:
+                model.objects.filter(pk=keep).update(**changes)
+
+            if event_fk:
+                ProductEvent.objects.filter(
+                    **{f"{event_fk}__in": [duplicate["id"] for duplicate in duplicates]}
+                ).update(**{event_fk: keep})
+        model.objects.filter(
+            pk__in=[duplicate["id"] for duplicates in replaced_by.values() for duplicate in duplicates]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NasoBiome', '0012_timestamps'),
+    ]
+
+    operations = [
+        # Removed rows are listed in the output; they cannot be restored automatically
+        migrations.RunPython(dedupe_natural_keys, migrations.RunPython.noop),
+    ]
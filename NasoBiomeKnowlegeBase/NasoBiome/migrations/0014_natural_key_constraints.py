@@ -0,0 +1,42 @@
+# Generated by Django 5.0 on 2026-10-19 11:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NasoBiome', '0013_dedupe_natural_keys'),
+    ]
+
+    operations = [
+        # The unique indexes lead with the species column, so its own index can go
+        migrations.AddConstraint(
+            model_name='migrationpattern',
+            constraint=models.UniqueConstraint(fields=('species', 'from_site', 'to_site'), name='migration_natural_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='productevent',
+            constraint=models.UniqueConstraint(fields=('species', 'site', 'product'), name='product_event_natural_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='speciesinteraction',
+            constraint=models.UniqueConstraint(fields=('species_1', 'species_2', 'site'), name='interaction_natural_key'),
+        ),
+        migrations.AlterField(
+            model_name='migrationpattern',
+            name='species',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='migrations', to='NasoBiome.species'),
+        ),
+        migrations.AlterField(
+            model_name='productevent',
+            name='species',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='product_events', to='NasoBiome.species'),
+        ),
+        migrations.AlterField(
+            model_name='speciesinteraction',
+            name='species_1',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='interactions_as_source', to='NasoBiome.species'),
+        ),
+    ]
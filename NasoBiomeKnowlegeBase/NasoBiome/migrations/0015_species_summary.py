@@ -0,0 +1,65 @@
+# Generated by Django 5.0 on 2026-10-19 11:11
+
+import django.db.models.deletion
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def populate_species_summaries(apps, schema_editor):
+    """Count the existing rows; later writes are recounted by the signal receivers."""
+    Species = apps.get_model("NasoBiome", "Species")
+    SpeciesInteraction = apps.get_model("NasoBiome", "SpeciesInteraction")
+    MigrationPattern = apps.get_model("NasoBiome", "MigrationPattern")
+    ProductEvent = apps.get_model("NasoBiome", "ProductEvent")
+    SpeciesSummary = apps.get_model("NasoBiome", "SpeciesSummary")
+
+    counts = {
+        "body_site_count": Counter(Species.body_sites.through.objects.values_list("species_id", flat=True)),
+        "disease_count": Counter(Species.diseases.through.objects.values_list("species_id", flat=True)),
+        "product_count": Counter(Species.products.through.objects.values_list("species_id", flat=True)),
+        "interaction_count": Counter(),
+        "migration_count": Counter(MigrationPattern.objects.values_list("species_id", flat=True)),
+        "product_event_count": Counter(),
+    }
+    for species_1, species_2 in SpeciesInteraction.objects.values_list("species_1_id", "species_2_id"):
+        counts["interaction_count"].update({species_1, species_2})
+    for species, interacting in ProductEvent.objects.values_list("species_id", "interacting_species_id"):
+        counts["product_event_count"].update({species, interacting} - {None})
+
+    SpeciesSummary.objects.bulk_create(
+        (
+            SpeciesSummary(species_id=pk, phyla=phyla, **{field: count[pk] for field, count in counts.items()})
+            for pk, phyla in Species.objects.values_list("pk", "phyla").iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NasoBiome', '0014_natural_key_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpeciesSummary',
+            fields=[
+                ('species', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='NasoBiome.species')),
+                ('phyla', models.CharField(max_length=100)),
+                ('body_site_count', models.PositiveIntegerField(default=0)),
+                ('disease_count', models.PositiveIntegerField(default=0)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('interaction_count', models.PositiveIntegerField(default=0, help_text='Interactions on either side.')),
+                ('migration_count', models.PositiveIntegerField(default=0)),
+                ('product_event_count', models.PositiveIntegerField(default=0, help_text='Product events as producer or interacting species.')),
+            ],
+            options={
+                'verbose_name': 'Species Summary',
+                'verbose_name_plural': 'Species Summaries',
+                'indexes': [models.Index(fields=['disease_count', 'species'], name='summary_disease_count_idx'), models.Index(fields=['interaction_count', 'species'], name='summary_interaction_count_idx'), models.Index(fields=['product_event_count', 'species'], name='summary_event_count_idx')],
+            },
+        ),
+        migrations.RunPython(populate_species_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,104 @@
+from django.db import migrations
+
+# Own columns of each table's search_vector, as set up in 0010
+OWN_COLUMNS = {
+    'NasoBiome_speciesinteraction': {'B': ['interaction_type'], 'C': ['mechanism'], 'D': ['evidence']},
+    'NasoBiome_migrationpattern': {'C': ['mechanism', 'trigger_conditions'], 'D': ['evidence']},
+    'NasoBiome_productevent': {'C': ['mechanism'], 'D': ['evidence']},
+}
+
+# Names of the rows each table refers to, folded in at weight B:
+# table -> [(referenced table, foreign key column)]
+RELATED_NAMES = {
+    'NasoBiome_speciesinteraction': [
+        ('NasoBiome_species', 'species_1_id'),
+        ('NasoBiome_species', 'species_2_id'),
+        ('NasoBiome_bodysite', 'site_id'),
+    ],
+    'NasoBiome_migrationpattern': [
+        ('NasoBiome_species', 'species_id'),
+        ('NasoBiome_bodysite', 'from_site_id'),
+        ('NasoBiome_bodysite', 'to_site_id'),
+    ],
+    'NasoBiome_productevent': [
+        ('NasoBiome_species', 'species_id'),
+        ('NasoBiome_species', 'interacting_species_id'),
+        ('NasoBiome_product', 'product_id'),
+        ('NasoBiome_bodysite', 'site_id'),
+    ],
+}
+RELATED_WEIGHT = 'B'
+
+
+def weighted(columns, weight):
+    return "setweight(to_tsvector('english', {}), '{}')".format(" || ' ' || ".join(columns), weight)
+
+
+def vector_function_sql(table, related):
+    """CREATE OR REPLACE the search_vector trigger function of 0010, with or without the related names."""
+    documents = {
+        weight: [f"coalesce(NEW.{column}, '')" for column in columns]
+        for weight, columns in OWN_COLUMNS[table].items()
+    }
+    if related:
+        documents.setdefault(RELATED_WEIGHT, []).extend(
+            f'coalesce((SELECT name FROM "{other}" WHERE id = NEW.{column}), \'\')'
+            for other, column in RELATED_NAMES[table]
+        )
+    document = ' || '.join(weighted(columns, weight) for weight, columns in sorted(documents.items()))
+    return f"""
+        CREATE OR REPLACE FUNCTION {table.lower()}_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {document};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+
+        UPDATE "{table}" SET id = id;
+    """
+
+
+def rename_trigger_sql(other):
+    """Recompute the vectors that contain a species, body site or product name when it is renamed."""
+    function = f'{other.lower()}_rename_search_update'
+    updates = '\n            '.join(
+        f'UPDATE "{table}" SET id = id WHERE {" OR ".join(f"{column} = NEW.id" for column in columns)};'
+        for table, columns in (
+            (table, [column for referenced, column in references if referenced == other])
+            for table, references in RELATED_NAMES.items()
+        )
+        if columns
+    )
+    forward = f"""
+        CREATE FUNCTION {function}() RETURNS trigger AS $$
+        BEGIN
+            {updates}
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER {function}
+            AFTER UPDATE OF name ON "{other}"
+            FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+            EXECUTE FUNCTION {function}();
+    """
+    reverse = f"""
+        DROP TRIGGER IF EXISTS {function} ON "{other}";
+        DROP FUNCTION IF EXISTS {function}();
+    """
+    return migrations.RunSQL(forward, reverse)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NasoBiome', '0015_species_summary'),
+    ]
+
+    operations = [
+        migrations.RunSQL(vector_function_sql(table, related=True), vector_function_sql(table, related=False))
+        for table in RELATED_NAMES
+    ] + [
+        rename_trigger_sql(other)
+        for other in sorted({other for references in RELATED_NAMES.values() for other, _ in references})
+    ]
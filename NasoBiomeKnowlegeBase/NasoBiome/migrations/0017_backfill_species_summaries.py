@@ -0,0 +1,59 @@
+from collections import Counter
+
+from django.db import migrations
+from django.db.models import Q
+
+
+def backfill_species_summaries(apps, schema_editor):
+    """
+    Count the species that have no summary row yet: species created after
+    0015 got theirs only when the transaction that created them committed.
+    """
+    Species = apps.get_model("NasoBiome", "Species")
+    SpeciesInteraction = apps.get_model("NasoBiome", "SpeciesInteraction")
+    MigrationPattern = apps.get_model("NasoBiome", "MigrationPattern")
+    ProductEvent = apps.get_model("NasoBiome", "ProductEvent")
+    SpeciesSummary = apps.get_model("NasoBiome", "SpeciesSummary")
+
+    missing = dict(Species.objects.filter(summary__isnull=True).values_list("pk", "phyla"))
+    if not missing:
+        return
+    ids = list(missing)
+
+    def count(queryset, *fields):
+        counter = Counter()
+        for row in queryset.values_list(*fields).iterator():
+            counter.update(set(row) & missing.keys())
+        return counter
+
+    counts = {
+        "body_site_count": count(Species.body_sites.through.objects.filter(species__in=ids), "species_id"),
+        "disease_count": count(Species.diseases.through.objects.filter(species__in=ids), "species_id"),
+        "product_count": count(Species.products.through.objects.filter(species__in=ids), "species_id"),
+        "interaction_count": count(
+            SpeciesInteraction.objects.filter(Q(species_1__in=ids) | Q(species_2__in=ids)), "species_1_id", "species_2_id",
+        ),
+        "migration_count": count(MigrationPattern.objects.filter(species__in=ids), "species_id"),
+        "product_event_count": count(
+            ProductEvent.objects.filter(Q(species__in=ids) | Q(interacting_species__in=ids)),
+            "species_id", "interacting_species_id",
+        ),
+    }
+    SpeciesSummary.objects.bulk_create(
+        [
+            SpeciesSummary(species_id=pk, phyla=phyla, **{field: counter[pk] for field, counter in counts.items()})
+            for pk, phyla in missing.items()
+        ],
+        batch_size=1000, ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NasoBiome', '0016_search_related_names'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_species_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-19 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NasoBiome', '0017_backfill_species_summaries'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='slowcypherquery',
+            name='query_name',
+            field=models.CharField(help_text='Query name given to session.run() and hash of the query text.', max_length=200),
+        ),
+    ]
@@ -1,9 +1,22 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 
 class BodySite(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
 
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Change validator for conditional GETs (see conditional.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Typeahead: substring and trigram similarity matches on the name
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="bodysite_name_trgm_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -18,6 +31,20 @@ class Disease(models.Model):
         blank=True,
         help_text="Explain how this disease develops (e.g., inflammation, immune response, toxin)."
     )
+    # Weighted full-text document, maintained by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Change validator for conditional GETs (see conditional.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the disease list filtered by site
+            models.Index(fields=["affected_site", "name"], name="disease_site_name_idx"),
+            GinIndex(fields=["search_vector"], name="disease_search_idx"),
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="disease_name_trgm_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -69,6 +96,22 @@ class Species(models.Model):
         blank=True,
         help_text="Molecular products secreted by this species."
     )
+    # Weighted full-text document, maintained by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Change validator for conditional GETs (see conditional.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the species list sorted by phylum or genus,
+            # and the admin phyla/genus filters
+            models.Index(fields=["phyla", "id"], name="species_phyla_id_idx"),
+            models.Index(fields=["genus", "id"], name="species_genus_id_idx"),
+            GinIndex(fields=["search_vector"], name="species_search_idx"),
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="species_name_trgm_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -80,6 +123,18 @@ class Product(models.Model):
         blank=True,
         help_text="Describe how this product contributes to disease (e.g., toxin-mediated damage)."
     )
+    # Weighted full-text document, maintained by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Change validator for conditional GETs (see conditional.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="product_search_idx"),
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="product_name_trgm_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -91,7 +146,10 @@ class SpeciesInteraction(models.Model):
         ("neutral", "Neutral (no effect)"),
     ]
 
-    species_1 = models.ForeignKey(Species, on_delete=models.CASCADE, related_name="interactions_as_source")
+    # Indexed as the leading column of interaction_natural_key
+    species_1 = models.ForeignKey(
+        Species, on_delete=models.CASCADE, related_name="interactions_as_source", db_index=False
+    )
     species_2 = models.ForeignKey(Species, on_delete=models.CASCADE, related_name="interactions_as_target")
     site = models.ForeignKey(BodySite, on_delete=models.CASCADE, related_name="interactions")
     interaction_type = models.CharField(max_length=20, choices=INTERACTION_TYPES)
@@ -101,6 +159,24 @@ class SpeciesInteraction(models.Model):
         Disease, on_delete=models.SET_NULL, null=True, blank=True,
         related_name="interaction_caused_diseases"
     )
+    # Weighted full-text document, maintained by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Change validator for conditional GETs (see conditional.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            # The importer's get_or_create key; concurrent imports cannot duplicate a row
+            models.UniqueConstraint(fields=["species_1", "species_2", "site"], name="interaction_natural_key"),
+        ]
+        indexes = [
+            # Interaction list and admin filter by type
+            models.Index(fields=["interaction_type", "id"], name="interaction_type_id_idx"),
+            models.Index(fields=["site", "id"], name="interaction_site_id_idx"),
+            GinIndex(fields=["search_vector"], name="interaction_search_idx"),
+        ]
 
     def __str__(self):
         return f"{self.species_1.name} ↔ {self.species_2.name} ({self.interaction_type})"
@@ -119,7 +195,8 @@ class SpeciesInteraction(models.Model):
  #   def __str__(self):
 #        return f"{self.species.name}: {self.from_site.name} → {self.to_site.name}"
 class MigrationPattern(models.Model):
-    species = models.ForeignKey("Species", on_delete=models.CASCADE, related_name="migrations")
+    # Indexed as the leading column of migration_natural_key
+    species = models.ForeignKey("Species", on_delete=models.CASCADE, related_name="migrations", db_index=False)
     from_site = models.ForeignKey("BodySite", on_delete=models.CASCADE, related_name="migrations_from")
     to_site = models.ForeignKey("BodySite", on_delete=models.CASCADE, related_name="migrations_to")
     
@@ -129,9 +206,25 @@ class MigrationPattern(models.Model):
 
     resulting_disease = models.ForeignKey("Disease", on_delete=models.SET_NULL, blank=True, null=True)
 
+    # Weighted full-text document, maintained by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Change validator for conditional GETs (see conditional.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
     class Meta:
         verbose_name = "Migration Pattern"
         verbose_name_plural = "Migration Patterns"
+        constraints = [
+            # The importer's get_or_create key; concurrent imports cannot duplicate a row
+            models.UniqueConstraint(fields=["species", "from_site", "to_site"], name="migration_natural_key"),
+        ]
+        indexes = [
+            models.Index(fields=["from_site", "id"], name="migration_from_site_id_idx"),
+            models.Index(fields=["to_site", "id"], name="migration_to_site_id_idx"),
+            GinIndex(fields=["search_vector"], name="migration_search_idx"),
+        ]
 
     def __str__(self):
         return f"{self.species.name} migrates from {self.from_site.name} to {self.to_site.name}"
@@ -144,7 +237,8 @@ class ProductEvent(models.Model):
     (possibly during migration or interaction), causing disease.
     """
 
-    species = models.ForeignKey(Species, on_delete=models.CASCADE, related_name="product_events")
+    # Indexed as the leading column of product_event_natural_key
+    species = models.ForeignKey(Species, on_delete=models.CASCADE, related_name="product_events", db_index=False)
     interacting_species = models.ForeignKey(
         Species, on_delete=models.SET_NULL, null=True, blank=True,
         related_name="partner_product_events", help_text="Optional partner species."
@@ -167,9 +261,143 @@ class ProductEvent(models.Model):
 
     mechanism = models.TextField(blank=True, help_text="How the product is produced (trigger mechanism).")
     evidence = models.TextField(blank=True, help_text="Literature or experimental evidence (DOI, PubMed link).")
+    # Weighted full-text document, maintained by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Change validator for conditional GETs (see conditional.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            # The importer's get_or_create key; concurrent imports cannot duplicate a row
+            models.UniqueConstraint(fields=["species", "site", "product"], name="product_event_natural_key"),
+        ]
+        indexes = [
+            models.Index(fields=["site", "id"], name="product_event_site_id_idx"),
+            GinIndex(fields=["search_vector"], name="product_event_search_idx"),
+        ]
 
     def __str__(self):
         text = f"{self.species.name} → {self.product.name} @ {self.site.name}"
         if self.interacting_species:
             text += f" + {self.interacting_species.name}"
         return text
+
+
+class SpeciesSummary(models.Model):
+    """
+    Per-species relationship counts, so the species list can sort and filter
+    on them without aggregating. Kept current by the receivers in signals.py
+    and rebuilt with `manage.py rebuild_species_summaries` (see summaries.py).
+    """
+
+    species = models.OneToOneField(Species, on_delete=models.CASCADE, primary_key=True, related_name="summary")
+    phyla = models.CharField(max_length=100)
+    body_site_count = models.PositiveIntegerField(default=0)
+    disease_count = models.PositiveIntegerField(default=0)
+    product_count = models.PositiveIntegerField(default=0)
+    interaction_count = models.PositiveIntegerField(default=0, help_text="Interactions on either side.")
+    migration_count = models.PositiveIntegerField(default=0)
+    product_event_count = models.PositiveIntegerField(
+        default=0, help_text="Product events as producer or interacting species."
+    )
+
+    class Meta:
+        verbose_name = "Species Summary"
+        verbose_name_plural = "Species Summaries"
+        indexes = [
+            # Keyset pagination of the species list sorted by these counts
+            models.Index(fields=["disease_count", "species"], name="summary_disease_count_idx"),
+            models.Index(fields=["interaction_count", "species"], name="summary_interaction_count_idx"),
+            models.Index(fields=["product_event_count", "species"], name="summary_event_count_idx"),
+        ]
+
+    def __str__(self):
+        return f"Summary of species {self.species_id}"
+
+class GraphVersion(models.Model):
+    """
+    One export or sync to Neo4j. The auto-incremented id is the graph version
+    clients pass back to the graph diff endpoint.
+    """
+
+    source = models.CharField(max_length=100, help_text="Export function that produced this version.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"v{self.id} ({self.source})"
+
+
+class GraphChange(models.Model):
+    """
+    Change log entry: a node or relationship touched by a graph version.
+    Keys look like "Species:12" or "Species:12-PRESENT_IN->BodySite:3"; an
+    INTERACTS_WITH key also names its interaction: "Species:12-INTERACTS_WITH:7->Species:4".
+    """
+
+    NODE = "node"
+    RELATIONSHIP = "relationship"
+    KINDS = [
+        (NODE, "Node"),
+        (RELATIONSHIP, "Relationship"),
+    ]
+
+    ADDED = "added"
+    CHANGED = "changed"
+    REMOVED = "removed"
+    ACTIONS = [
+        (ADDED, "Added"),
+        (CHANGED, "Changed"),
+        (REMOVED, "Removed"),
+    ]
+
+    version = models.ForeignKey(GraphVersion, on_delete=models.CASCADE, related_name="changes")
+    kind = models.CharField(max_length=20, choices=KINDS)
+    key = models.CharField(max_length=255)
+    action = models.CharField(max_length=20, choices=ACTIONS)
+
+    def __str__(self):
+        return f"v{self.version_id} {self.action} {self.key}"
+
+
+class GraphElement(models.Model):
+    """
+    Last exported state of each node or relationship, used to tell added
+    elements from changed ones without reading the whole change log.
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    kind = models.CharField(max_length=20, choices=GraphChange.KINDS)
+    fingerprint = models.CharField(max_length=40, blank=True, help_text="Hash of the exported properties.")
+    version = models.ForeignKey(GraphVersion, on_delete=models.CASCADE, related_name="elements")
+    removed = models.BooleanField(default=False)
+
+    def __str__(self):
+        return self.key
+
+
+class SlowCypherQuery(models.Model):
+    """
+    A Cypher statement that took longer than NEO4J_SLOW_QUERY_MS, with a
+    sampled PROFILE plan for read-only statements.
+    """
+
+    query_name = models.CharField(max_length=200, help_text="Query name given to session.run() and hash of the query text.")
+    query = models.TextField()
+    parameters = models.JSONField(default=dict, blank=True)
+    duration_ms = models.FloatField()
+    rows = models.PositiveIntegerField(default=0)
+    total_db_hits = models.BigIntegerField(null=True, blank=True)
+    profile = models.JSONField(
+        null=True, blank=True, help_text="PROFILE operators with db hits and rows, outermost first."
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Slow Cypher Query"
+        verbose_name_plural = "Slow Cypher Queries"
+        indexes = [models.Index(fields=["-duration_ms"])]
+
+    def __str__(self):
+        return f"{self.query_name} ({self.duration_ms:.0f} ms)"
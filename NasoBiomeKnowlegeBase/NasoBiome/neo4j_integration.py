@@ -1,5 +1,19 @@
+import hashlib
+import json
+import re
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db import transaction
+from django.db.models import Max
 from neo4j import GraphDatabase
-from .models import Species, BodySite, Disease, Product, SpeciesInteraction, MigrationPattern, ProductEvent
+from .instrumentation import InstrumentedDriver
+from .metrics import timed_export_stage
+from .models import (
+    Species, BodySite, Disease, Product, SpeciesInteraction, MigrationPattern, ProductEvent,
+    GraphVersion, GraphChange, GraphElement,
+)
 
 
 # Neo4j connection
@@ -8,75 +22,276 @@ NEO4J_URI = "bolt://neo4j:7687"  # Update if using a different host
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "neo4jpassword"
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+# Wrapped so every statement is timed for the per-request performance stats
+driver = InstrumentedDriver(GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD)))
 
 
 # UTILITY FUNCTION TO RUN CYPHER
 
-def run_cypher(query, parameters=None):
+def run_cypher(query, parameters=None, query_name=None):
     with driver.session() as session:
-        session.run(query, parameters or {})
+        session.run(query, parameters or {}, query_name=query_name)
+
+
+
+# GRAPH VERSIONING
+#
+# Every export records the nodes and relationships it touched. Elements that
+# are new or whose exported properties changed are written to the change log
+# under a new GraphVersion, so clients can fetch only the difference.
+
+GRAPH_LABELS = {"BodySite", "Disease", "Product", "Species", "Interaction", "Migration", "ProductEvent"}
+
+NODE_KEY_RE = re.compile(r"^(\w+):(\d+)$")
+RELATIONSHIP_KEY_RE = re.compile(r"^(\w+):(\d+)-(\w+)(?::(\d+))?->(\w+):(\d+)$")
+# Relationship types that can link the same two nodes more than once, and the
+# property telling those relationships apart; its value is part of the key
+RELATIONSHIP_ID_PROPERTIES = {"INTERACTS_WITH": "interaction_id"}
+
+_sync_state = threading.local()
+
+
+def node_key(label, node_id):
+    return f"{label}:{node_id}"
+
+
+def relationship_key(start_label, start_id, rel_type, end_label, end_id, rel_id=None):
+    rel = rel_type if rel_id is None else f"{rel_type}:{rel_id}"
+    return f"{start_label}:{start_id}-{rel}->{end_label}:{end_id}"
+
+
+def _touch(kind, key, properties=None):
+    touched = getattr(_sync_state, "touched", None)
+    if touched is None:
+        return
+    fingerprint = hashlib.sha1(
+        json.dumps(properties or {}, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    touched[key] = (kind, fingerprint)
+
+
+def _touch_node(label, node_id, properties=None):
+    _touch(GraphChange.NODE, node_key(label, node_id), properties)
+
+
+def _touch_relationship(start_label, start_id, rel_type, end_label, end_id, properties=None, rel_id=None):
+    _touch(
+        GraphChange.RELATIONSHIP,
+        relationship_key(start_label, start_id, rel_type, end_label, end_id, rel_id),
+        properties,
+    )
+
+
+@contextmanager
+def graph_sync(source, full=False):
+    """
+    Collect the elements touched by an export and record them as a new graph
+    version. Nested syncs are folded into the outermost one. A full sync also
+    removes elements that were not exported again from Neo4j.
+    """
+    if getattr(_sync_state, "touched", None) is not None:
+        yield
+        return
+
+    _sync_state.touched = {}
+    try:
+        yield
+        touched = _sync_state.touched
+    finally:
+        _sync_state.touched = None
+    _record_graph_version(source, touched, full=full)
+
+
+def records_graph_version(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with graph_sync(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+# Keys per `key IN (...)` lookup of the elements an incremental sync touched
+KNOWN_ELEMENTS_BATCH_SIZE = 1000
+
+
+def _known_elements(touched, full):
+    """
+    {key: (kind, fingerprint, removed)} of the recorded elements. A full sync
+    reads them all, to find the ones it did not export again; an incremental
+    one only those it touched, so its cost follows the size of the push.
+    """
+    elements = GraphElement.objects.values_list("key", "kind", "fingerprint", "removed")
+    if full:
+        rows = elements.iterator(chunk_size=KNOWN_ELEMENTS_BATCH_SIZE)
+    else:
+        keys = list(touched)
+        rows = (
+            row
+            for start in range(0, len(keys), KNOWN_ELEMENTS_BATCH_SIZE)
+            for row in elements.filter(key__in=keys[start:start + KNOWN_ELEMENTS_BATCH_SIZE])
+        )
+    return {key: (kind, fingerprint, removed) for key, kind, fingerprint, removed in rows}
+
+
+def _record_graph_version(source, touched, full=False):
+    known = _known_elements(touched, full)
+
+    changes = []
+    for key, (kind, fingerprint) in touched.items():
+        previous = known.get(key)
+        if previous is None or previous[2]:
+            changes.append((kind, key, GraphChange.ADDED, fingerprint))
+        elif previous[1] != fingerprint:
+            changes.append((kind, key, GraphChange.CHANGED, fingerprint))
+
+    if full:
+        stale = [
+            (kind, key) for key, (kind, _, removed) in known.items()
+            if not removed and key not in touched
+        ]
+        _remove_from_neo4j([key for _, key in stale])
+        changes.extend((kind, key, GraphChange.REMOVED, "") for kind, key in stale)
+
+    if not changes:
+        return None
+
+    with transaction.atomic():
+        version = GraphVersion.objects.create(source=source)
+        GraphChange.objects.bulk_create([
+            GraphChange(version=version, kind=kind, key=key, action=action)
+            for kind, key, action, _ in changes
+        ], batch_size=1000)
+        GraphElement.objects.bulk_create([
+            GraphElement(
+                key=key, kind=kind, fingerprint=fingerprint, version=version,
+                removed=action == GraphChange.REMOVED,
+            )
+            for kind, key, action, fingerprint in changes
+        ], batch_size=1000, update_conflicts=True, unique_fields=["key"],
+            update_fields=["kind", "fingerprint", "version", "removed"])
+    return version
+
+
+def _group_node_keys(keys):
+    """Group "Label:id" keys into {label: [ids]}, ignoring unknown labels."""
+    groups = {}
+    for key in keys:
+        match = NODE_KEY_RE.match(key)
+        if match and match.group(1) in GRAPH_LABELS:
+            groups.setdefault(match.group(1), []).append(int(match.group(2)))
+    return groups
+
+
+def _group_relationship_keys(keys):
+    """
+    Group relationship keys into {(start_label, type, end_label): [[start_id, end_id]]}.
+    Keys of RELATIONSHIP_ID_PROPERTIES types carry a third item, the id
+    property's value; keys of those types without one are ignored.
+    """
+    groups = {}
+    for key in keys:
+        match = RELATIONSHIP_KEY_RE.match(key)
+        if match and match.group(1) in GRAPH_LABELS and match.group(5) in GRAPH_LABELS:
+            start_label, start_id, rel_type, rel_id, end_label, end_id = match.groups()
+            if (rel_type in RELATIONSHIP_ID_PROPERTIES) != (rel_id is not None):
+                continue
+            pair = [int(start_id), int(end_id)] + ([int(rel_id)] if rel_id is not None else [])
+            groups.setdefault((start_label, rel_type, end_label), []).append(pair)
+    return groups
+
+
+def _relationship_pattern(rel_type):
+    """Cypher pattern for `r` matching grouped pairs of `rel_type`, including the id property if it has one."""
+    id_property = RELATIONSHIP_ID_PROPERTIES.get(rel_type)
+    return f"r:{rel_type} {{{id_property}: pair[2]}}" if id_property else f"r:{rel_type}"
+
+
+def _remove_from_neo4j(keys):
+    # Labels and relationship types come from the key patterns above and are
+    # checked against GRAPH_LABELS, so formatting them into Cypher is safe.
+    for (start_label, rel_type, end_label), pairs in _group_relationship_keys(keys).items():
+        run_cypher(f"""
+            UNWIND $pairs AS pair
+            MATCH (a:{start_label} {{id: pair[0]}})-[{_relationship_pattern(rel_type)}]->(b:{end_label} {{id: pair[1]}})
+            DELETE r
+        """, {"pairs": pairs}, query_name="remove_relationships")
+    for label, ids in _group_node_keys(keys).items():
+        run_cypher(f"""
+            MATCH (n:{label})
+            WHERE n.id IN $ids
+            DETACH DELETE n
+        """, {"ids": ids}, query_name="remove_nodes")
 
 
 
 # BODY SITES
 
+@timed_export_stage
+@records_graph_version
 def push_all_body_sites_to_neo4j():
     for site in BodySite.objects.all():
+        params = {"id": site.id, "name": site.name, "description": site.description or ""}
         run_cypher("""
             MERGE (b:BodySite {id: $id})
             SET b.name = $name, b.description = $description
-        """, {"id": site.id, "name": site.name, "description": site.description or ""})
+        """, params, query_name="merge_body_site")
+        _touch_node("BodySite", site.id, params)
 
 
 # DISEASES
 
+@timed_export_stage
+@records_graph_version
 def push_all_diseases_to_neo4j():
     for disease in Disease.objects.all():
-        run_cypher("""
-            MERGE (d:Disease {id: $id})
-            SET d.name = $name, d.description = $description, d.mechanism_of_causation = $mechanism
-        """, {
+        params = {
             "id": disease.id,
             "name": disease.name,
             "description": disease.description or "",
             "mechanism": disease.mechanism_of_causation or ""
-        })
+        }
+        run_cypher("""
+            MERGE (d:Disease {id: $id})
+            SET d.name = $name, d.description = $description, d.mechanism_of_causation = $mechanism
+        """, params, query_name="merge_disease")
+        _touch_node("Disease", disease.id, params)
 
         # Relationship to affected body site
         if disease.affected_site:
             run_cypher("""
                 MATCH (d:Disease {id: $disease_id}), (b:BodySite {id: $bodysite_id})
                 MERGE (d)-[:AFFECTS]->(b)
-            """, {"disease_id": disease.id, "bodysite_id": disease.affected_site.id})
+            """, {"disease_id": disease.id, "bodysite_id": disease.affected_site.id}, query_name="link_disease_site")
+            _touch_relationship("Disease", disease.id, "AFFECTS", "BodySite", disease.affected_site.id)
 
 
 # PRODUCTS
 
+@timed_export_stage
+@records_graph_version
 def push_all_products_to_neo4j():
     for product in Product.objects.all():
-        run_cypher("""
-            MERGE (p:Product {id: $id})
-            SET p.name = $name, p.description = $description, p.mechanism_of_action = $mechanism
-        """, {
+        params = {
             "id": product.id,
             "name": product.name,
             "description": product.description or "",
             "mechanism": product.mechanism_of_action or ""
-        })
+        }
+        run_cypher("""
+            MERGE (p:Product {id: $id})
+            SET p.name = $name, p.description = $description, p.mechanism_of_action = $mechanism
+        """, params, query_name="merge_product")
+        _touch_node("Product", product.id, params)
 
 
 
 # SPECIES
 
+@timed_export_stage
+@records_graph_version
 def push_all_species_to_neo4j():
     for species in Species.objects.all():
-        run_cypher("""
-            MERGE (s:Species {id: $id})
-            SET s.name = $name, s.phyla = $phyla, s.genus = $genus,
-                s.family = $family, s.genome_reference_link = $link,
-                s.age_range = $age, s.description = $desc
-        """, {
+        params = {
             "id": species.id,
             "name": species.name,
             "phyla": species.phyla,
@@ -85,51 +300,71 @@ def push_all_species_to_neo4j():
             "link": species.genome_reference_link or "",
             "age": species.age_range or "",
             "desc": species.description or ""
-        })
+        }
+        run_cypher("""
+            MERGE (s:Species {id: $id})
+            SET s.name = $name, s.phyla = $phyla, s.genus = $genus,
+                s.family = $family, s.genome_reference_link = $link,
+                s.age_range = $age, s.description = $desc
+        """, params, query_name="merge_species")
+        _touch_node("Species", species.id, params)
 
         # Origin site (RESIDES_IN)
         if species.origin_site:
             run_cypher("""
                 MATCH (s:Species {id: $species_id}), (b:BodySite {id: $bodysite_id})
                 MERGE (s)-[:RESIDES_IN]->(b)
-            """, {"species_id": species.id, "bodysite_id": species.origin_site.id})
+            """, {"species_id": species.id, "bodysite_id": species.origin_site.id},
+                query_name="link_species_origin_site")
+            _touch_relationship("Species", species.id, "RESIDES_IN", "BodySite", species.origin_site.id)
 
         # Body sites (PRESENT_IN)
         for site in species.body_sites.all():
             run_cypher("""
                 MATCH (s:Species {id: $species_id}), (b:BodySite {id: $bodysite_id})
                 MERGE (s)-[:PRESENT_IN]->(b)
-            """, {"species_id": species.id, "bodysite_id": site.id})
+            """, {"species_id": species.id, "bodysite_id": site.id}, query_name="link_species_body_site")
+            _touch_relationship("Species", species.id, "PRESENT_IN", "BodySite", site.id)
 
         # Diseases (ASSOCIATED_WITH)
         for disease in species.diseases.all():
             run_cypher("""
                 MATCH (s:Species {id: $species_id}), (d:Disease {id: $disease_id})
                 MERGE (s)-[:ASSOCIATED_WITH]->(d)
-            """, {"species_id": species.id, "disease_id": disease.id})
+            """, {"species_id": species.id, "disease_id": disease.id}, query_name="link_species_disease")
+            _touch_relationship("Species", species.id, "ASSOCIATED_WITH", "Disease", disease.id)
 
         # Products (PRODUCES)
         for product in species.products.all():
             run_cypher("""
                 MATCH (s:Species {id: $species_id}), (p:Product {id: $product_id})
                 MERGE (s)-[:PRODUCES]->(p)
-            """, {"species_id": species.id, "product_id": product.id})
+            """, {"species_id": species.id, "product_id": product.id}, query_name="link_species_product")
+            _touch_relationship("Species", species.id, "PRODUCES", "Product", product.id)
 
 
 
 # SPECIES INTERACTIONS
 
-def push_all_interactions_to_neo4j():
-    for interaction in SpeciesInteraction.objects.all():
-        run_cypher("""
-            MERGE (i:Interaction {id: $id})
-            SET i.type = $type, i.mechanism = $mechanism, i.evidence = $evidence
-        """, {
+@timed_export_stage
+@records_graph_version
+def push_all_interactions_to_neo4j(ids=None):
+    """Push all interactions, or only those with the given ids."""
+    interactions = SpeciesInteraction.objects.select_related("species_1", "species_2", "site", "associated_disease")
+    if ids is not None:
+        interactions = interactions.filter(pk__in=ids)
+    for interaction in interactions:
+        params = {
             "id": interaction.id,
             "type": interaction.interaction_type,
             "mechanism": interaction.mechanism or "",
             "evidence": interaction.evidence or ""
-        })
+        }
+        run_cypher("""
+            MERGE (i:Interaction {id: $id})
+            SET i.type = $type, i.mechanism = $mechanism, i.evidence = $evidence
+        """, params, query_name="merge_interaction")
+        _touch_node("Interaction", interaction.id, params)
 
         # Species involved
         run_cypher("""
@@ -139,55 +374,76 @@ def push_all_interactions_to_neo4j():
             MERGE (s1)-[:INTERACTS_WITH {interaction_id: $id}]->(s2)
             MERGE (i)-[:INVOLVES]->(s1)
             MERGE (i)-[:INVOLVES]->(s2)
-        """, {"id": interaction.id, "s1_id": interaction.species_1.id, "s2_id": interaction.species_2.id})
+        """, {"id": interaction.id, "s1_id": interaction.species_1.id, "s2_id": interaction.species_2.id},
+            query_name="link_interaction_species")
+        _touch_relationship(
+            "Species", interaction.species_1.id, "INTERACTS_WITH", "Species", interaction.species_2.id,
+            rel_id=interaction.id,
+        )
+        _touch_relationship("Interaction", interaction.id, "INVOLVES", "Species", interaction.species_1.id)
+        _touch_relationship("Interaction", interaction.id, "INVOLVES", "Species", interaction.species_2.id)
 
         # Body site
         run_cypher("""
             MATCH (i:Interaction {id: $id}), (b:BodySite {id: $body_id})
             MERGE (i)-[:OCCURS_AT]->(b)
-        """, {"id": interaction.id, "body_id": interaction.site.id})
+        """, {"id": interaction.id, "body_id": interaction.site.id}, query_name="link_interaction_site")
+        _touch_relationship("Interaction", interaction.id, "OCCURS_AT", "BodySite", interaction.site.id)
 
         # Associated disease
         if interaction.associated_disease:
             run_cypher("""
                 MATCH (i:Interaction {id: $id}), (d:Disease {id: $disease_id})
                 MERGE (i)-[:CAUSES]->(d)
-            """, {"id": interaction.id, "disease_id": interaction.associated_disease.id})
+            """, {"id": interaction.id, "disease_id": interaction.associated_disease.id},
+                query_name="link_interaction_disease")
+            _touch_relationship("Interaction", interaction.id, "CAUSES", "Disease", interaction.associated_disease.id)
 
 
 # MIGRATION PATTERNS
 
-def push_all_migrations_to_neo4j():
-    for migration in MigrationPattern.objects.all():
+@timed_export_stage
+@records_graph_version
+def push_all_migrations_to_neo4j(ids=None):
+    """Push all migration patterns, or only those with the given ids."""
+    migrations = MigrationPattern.objects.select_related("species", "from_site", "to_site", "resulting_disease")
+    if ids is not None:
+        migrations = migrations.filter(pk__in=ids)
+    for migration in migrations:
+        params = {
+            "id": migration.id,
+            "mechanism": migration.mechanism or "",
+            "trigger": migration.trigger_conditions or "",
+            "evidence": migration.evidence or ""
+        }
         run_cypher("""
             MERGE (m:Migration {id: $id})
             SET m.mechanism = $mechanism, 
                 m.trigger_conditions = $trigger,
                 m.evidence = $evidence
-        """, {
-            "id": migration.id,
-            "mechanism": migration.mechanism or "",
-            "trigger": migration.trigger_conditions or "",
-            "evidence": migration.evidence or ""
-        })
+        """, params, query_name="merge_migration")
+        _touch_node("Migration", migration.id, params)
 
         # Link Species
         run_cypher("""
             MATCH (m:Migration {id: $id}), (s:Species {id: $species_id})
             MERGE (m)-[:INVOLVES_SPECIES]->(s)
-        """, {"id": migration.id, "species_id": migration.species.id})
+        """, {"id": migration.id, "species_id": migration.species.id}, query_name="link_migration_species")
+        _touch_relationship("Migration", migration.id, "INVOLVES_SPECIES", "Species", migration.species.id)
 
         # Link FROM Site
         run_cypher("""
             MATCH (m:Migration {id: $id}), (from:BodySite {id: $from_id})
             MERGE (m)-[:STARTS_FROM]->(from)
-        """, {"id": migration.id, "from_id": migration.from_site.id})
+        """, {"id": migration.id, "from_id": migration.from_site.id}, query_name="link_migration_from_site")
+        _touch_relationship("Migration", migration.id, "STARTS_FROM", "BodySite", migration.from_site.id)
 
         # Link TO Site
         run_cypher("""
             MATCH (m:Migration {id: $id}), (to:BodySite {id: $to_id})
             MERGE (m)-[:MIGRATES_TO]->(to)
-        """, {"id": migration.id, "to_id": migration.to_site.id})
+        """, {"id": migration.id, "to_id": migration.to_site.id}, query_name="link_migration_to_site")
+        _touch_relationship("Migration", migration.id, "MIGRATES_TO", "BodySite", migration.to_site.id)
 
         # Optional: Link resulting disease (if exists)
         if migration.resulting_disease:
@@ -197,79 +453,136 @@ def push_all_migrations_to_neo4j():
             """, {
                 "id": migration.id,
                 "disease_id": migration.resulting_disease.id
-            })
+            }, query_name="link_migration_disease")
+            _touch_relationship("Migration", migration.id, "CAUSES", "Disease", migration.resulting_disease.id)
 
 
 # PRODUCT EVENTS
 
-def push_all_product_events_to_neo4j():
-    for event in ProductEvent.objects.all():
-        run_cypher("""
-            MERGE (e:ProductEvent {id: $id})
-            SET e.mechanism = $mechanism, e.evidence = $evidence
-        """, {
+@timed_export_stage
+@records_graph_version
+def push_all_product_events_to_neo4j(ids=None):
+    """Push all product events, or only those with the given ids."""
+    events = ProductEvent.objects.select_related(
+        "species", "interacting_species", "site", "product", "disease", "migration", "interaction"
+    )
+    if ids is not None:
+        events = events.filter(pk__in=ids)
+    for event in events:
+        params = {
             "id": event.id,
             "mechanism": event.mechanism or "",
             "evidence": event.evidence or ""
-        })
+        }
+        run_cypher("""
+            MERGE (e:ProductEvent {id: $id})
+            SET e.mechanism = $mechanism, e.evidence = $evidence
+        """, params, query_name="merge_product_event")
+        _touch_node("ProductEvent", event.id, params)
 
         # Species
         run_cypher("""
             MATCH (e:ProductEvent {id: $id}), (s:Species {id: $species_id})
             MERGE (s)-[:PRODUCES_EVENT]->(e)
-        """, {"id": event.id, "species_id": event.species.id})
+        """, {"id": event.id, "species_id": event.species.id}, query_name="link_event_species")
+        _touch_relationship("Species", event.species.id, "PRODUCES_EVENT", "ProductEvent", event.id)
 
         # Optional interacting species
         if event.interacting_species:
             run_cypher("""
                 MATCH (e:ProductEvent {id: $id}), (s:Species {id: $partner_id})
                 MERGE (s)-[:PARTICIPATES_IN]->(e)
-            """, {"id": event.id, "partner_id": event.interacting_species.id})
+            """, {"id": event.id, "partner_id": event.interacting_species.id}, query_name="link_event_partner")
+            _touch_relationship("Species", event.interacting_species.id, "PARTICIPATES_IN", "ProductEvent", event.id)
 
         # Body site
         run_cypher("""
             MATCH (e:ProductEvent {id: $id}), (b:BodySite {id: $site_id})
             MERGE (e)-[:AT_SITE]->(b)
-        """, {"id": event.id, "site_id": event.site.id})
+        """, {"id": event.id, "site_id": event.site.id}, query_name="link_event_site")
+        _touch_relationship("ProductEvent", event.id, "AT_SITE", "BodySite", event.site.id)
 
         # Product
         run_cypher("""
             MATCH (e:ProductEvent {id: $id}), (p:Product {id: $product_id})
             MERGE (e)-[:PRODUCT]->(p)
-        """, {"id": event.id, "product_id": event.product.id})
+        """, {"id": event.id, "product_id": event.product.id}, query_name="link_event_product")
+        _touch_relationship("ProductEvent", event.id, "PRODUCT", "Product", event.product.id)
 
         # Disease
         if event.disease:
             run_cypher("""
                 MATCH (e:ProductEvent {id: $id}), (d:Disease {id: $disease_id})
                 MERGE (e)-[:CAUSES]->(d)
-            """, {"id": event.id, "disease_id": event.disease.id})
+            """, {"id": event.id, "disease_id": event.disease.id}, query_name="link_event_disease")
+            _touch_relationship("ProductEvent", event.id, "CAUSES", "Disease", event.disease.id)
 
         # Migration
         if event.migration:
             run_cypher("""
                 MATCH (e:ProductEvent {id: $id}), (m:Migration {id: $migration_id})
                 MERGE (e)-[:DURING_MIGRATION]->(m)
-            """, {"id": event.id, "migration_id": event.migration.id})
+            """, {"id": event.id, "migration_id": event.migration.id}, query_name="link_event_migration")
+            _touch_relationship("ProductEvent", event.id, "DURING_MIGRATION", "Migration", event.migration.id)
 
         # Interaction
         if event.interaction:
             run_cypher("""
                 MATCH (e:ProductEvent {id: $id}), (i:Interaction {id: $interaction_id})
                 MERGE (e)-[:DURING_INTERACTION]->(i)
-            """, {"id": event.id, "interaction_id": event.interaction.id})
+            """, {"id": event.id, "interaction_id": event.interaction.id}, query_name="link_event_interaction")
+            _touch_relationship("ProductEvent", event.id, "DURING_INTERACTION", "Interaction", event.interaction.id)
+
+
+# INDEXES
+
+SEARCH_INDEX_NAME = "entity_search"
+
+def create_graph_indexes():
+    """
+    Create the indexes behind "Label:id" node lookups (also used by the
+    MERGE statements above) and the full-text index used by the name search.
+    """
+    for label in sorted(GRAPH_LABELS):
+        run_cypher(f"""
+            CREATE INDEX {label.lower()}_id IF NOT EXISTS
+            FOR (n:{label}) ON (n.id)
+        """, query_name="create_id_index")
+    run_cypher(f"""
+        CREATE FULLTEXT INDEX {SEARCH_INDEX_NAME} IF NOT EXISTS
+        FOR (n:Species|Disease|Product|BodySite)
+        ON EACH [n.name, n.description]
+    """, query_name="create_search_index")
+
+
+_graph_indexes_ready = False
+
+
+def ensure_graph_indexes():
+    """
+    create_graph_indexes() once per process, for readers that may run before
+    any export has created them; waits until the full-text index is online.
+    """
+    global _graph_indexes_ready
+    if not _graph_indexes_ready:
+        create_graph_indexes()
+        run_cypher("CALL db.awaitIndex($index, 30)", {"index": SEARCH_INDEX_NAME}, query_name="await_search_index")
+        _graph_indexes_ready = True
 
 
 # EXPORT EVERYTHING
 
+@timed_export_stage
 def export_all_to_neo4j():
-    push_all_body_sites_to_neo4j()
-    push_all_diseases_to_neo4j()
-    push_all_products_to_neo4j()
-    push_all_species_to_neo4j()
-    push_all_interactions_to_neo4j()
-    push_all_migrations_to_neo4j()
-    push_all_product_events_to_neo4j()
+    create_graph_indexes()
+    with graph_sync("export_all_to_neo4j", full=True):
+        push_all_body_sites_to_neo4j()
+        push_all_diseases_to_neo4j()
+        push_all_products_to_neo4j()
+        push_all_species_to_neo4j()
+        push_all_interactions_to_neo4j()
+        push_all_migrations_to_neo4j()
+        push_all_product_events_to_neo4j()
 
 
 # GRAPH FETCHING
@@ -280,6 +593,36 @@ def _serialize_neo4j_value(value):
         return value.iso_format()
     return value
 
+def parse_node_address(address):
+    """
+    Split a "Label:id" node address into (label, id). Returns (None, None)
+    for anything that does not name a known graph label.
+    """
+    match = NODE_KEY_RE.match(str(address).strip())
+    if not match or match.group(1) not in GRAPH_LABELS:
+        return None, None
+    return match.group(1), int(match.group(2))
+
+def _match_addresses(addresses):
+    """
+    Build a Cypher clause binding `n` to each node in `addresses`, using one
+    indexed (:Label {id}) lookup per label. Returns (clause, parameters).
+    """
+    groups = {}
+    for address in addresses:
+        label, node_id = parse_node_address(address)
+        if label:
+            groups.setdefault(label, []).append(node_id)
+    if not groups:
+        return "", {}
+
+    branches = [
+        f"UNWIND $ids_{label} AS node_id MATCH (n:{label} {{id: node_id}}) RETURN n"
+        for label in groups
+    ]
+    clause = "CALL {\n    " + "\n    UNION\n    ".join(branches) + "\n}"
+    return clause, {f"ids_{label}": ids for label, ids in groups.items()}
+
 def fetch_initial_graph(limit: int = 15) -> list:
     """Fetch initial graph data - random nodes of any type"""
     try:
@@ -289,7 +632,7 @@ def fetch_initial_graph(limit: int = 15) -> list:
                 MATCH (n)
                 WHERE n:Disease OR n:Species OR n:BodySite
                 RETURN collect({
-                        id: elementId(n),
+                        id: head(labels(n)) + ':' + toString(n.id),
                         label: n.name,
                         group: CASE 
                             WHEN n:Disease THEN 'Disease'
@@ -300,7 +643,7 @@ def fetch_initial_graph(limit: int = 15) -> list:
                         properties: properties(n)
                     }) AS nodes
             """
-            record = session.run(query, limit=limit).single()
+            record = session.run(query, limit=limit, query_name="initial_graph").single()
             nodes = record["nodes"] if record else []
             
             # Serialize properties
@@ -318,38 +661,39 @@ def fetch_initial_graph(limit: int = 15) -> list:
         raise
 
 def fetch_neighbors(node_id: str) -> tuple[list, list]:
-    """Fetch direct neighbors (1 hop) of a node"""
+    """Fetch direct neighbors (1 hop) of a node given as "Label:id" """
+    return fetch_neighbors_batch([node_id])
+
+def fetch_neighbors_batch(node_ids: list) -> tuple[list, list]:
+    """
+    Fetch direct neighbors (1 hop) of several "Label:id" nodes in a single
+    query. Nodes and relationships shared between the expansions are returned once.
+    """
+    match_clause, params = _match_addresses(node_ids)
+    if not match_clause:
+        return [], []
     try:
         with driver.session() as session:
-            try:
-                node_id_val = int(node_id)
-            except ValueError:
-                node_id_val = node_id
-
-            # Updated query to return consistent structure (label, group)
-            query = """
-            MATCH (n)
-            WHERE elementId(n) = $node_id
-            MATCH (n)-[r]-(m)
-            WITH collect(DISTINCT n) + collect(DISTINCT m) AS allNodes, collect(r) AS rels
+            query = match_clause + """
+            OPTIONAL MATCH (n)-[r]-(m)
+            WITH collect(DISTINCT n) + collect(DISTINCT m) AS allNodes,
+                 collect(DISTINCT r) AS rels
             UNWIND allNodes AS node
-            WITH DISTINCT node, rels
-            RETURN collect({
-                id: elementId(node),
+            WITH collect(DISTINCT node) AS uniqueNodes, rels
+            RETURN [node IN uniqueNodes | {
+                id: head(labels(node)) + ':' + toString(node.id),
                 label: COALESCE(node.name, node.type, head(labels(node))),
                 group: head(labels(node)),
                 properties: properties(node)
-            }) AS nodes,
-            collect([
-                rel IN rels | {
-                    from: elementId(startNode(rel)),
-                    to: elementId(endNode(rel)),
-                    label: type(rel)
-                }
-            ]) AS links
+            }] AS nodes,
+            [rel IN rels | {
+                from: head(labels(startNode(rel))) + ':' + toString(startNode(rel).id),
+                to: head(labels(endNode(rel))) + ':' + toString(endNode(rel).id),
+                label: type(rel)
+            }] AS links
             """
-            
-            record = session.run(query, node_id=node_id).single()
+
+            record = session.run(query, params, query_name="neighbors").single()
             if not record:
                 return [], []
 
@@ -363,8 +707,7 @@ def fetch_neighbors(node_id: str) -> tuple[list, list]:
                         serialized_props[k] = str(v)
                 node['properties'] = serialized_props
 
-            links = [link for sublist in record["links"] for link in sublist]
-            return nodes, links
+            return nodes, record["links"]
     except Exception as e:
         print(f"Error fetching neighbors: {str(e)}")
         raise
@@ -379,12 +722,14 @@ def fetch_disease_pathway(disease_id: str) -> tuple[list, list]:
     - Body sites involved
     - Migration patterns
     """
+    label, disease_pk = parse_node_address(disease_id)
+    if label != "Disease":
+        return [], []
     try:
         with driver.session() as session:
             query = """
             // Start with the disease
-            MATCH (d:Disease)
-            WHERE elementId(d) = $disease_id
+            MATCH (d:Disease {id: $disease_id})
             
             // --- Existing disease pathway components ---
             OPTIONAL MATCH (s_direct:Species)-[:ASSOCIATED_WITH]->(d)
@@ -480,7 +825,7 @@ def fetch_disease_pathway(disease_id: str) -> tuple[list, list]:
             // Serialize nodes
             UNWIND allNodes AS n
             WITH collect({
-                id: elementId(n),
+                id: head(labels(n)) + ':' + toString(n.id),
                 label: COALESCE(n.name, n.type, head(labels(n))),
                 group: head(labels(n)),
                 properties: properties(n)
@@ -490,8 +835,8 @@ def fetch_disease_pathway(disease_id: str) -> tuple[list, list]:
             UNWIND relationships AS rel
             WITH nodes,
                  collect({
-                    from: elementId(startNode(rel)),
-                    to: elementId(endNode(rel)),
+                    from: head(labels(startNode(rel))) + ':' + toString(startNode(rel).id),
+                    to: head(labels(endNode(rel))) + ':' + toString(endNode(rel).id),
                     label: type(rel),
                     properties: properties(rel)
                 }) AS links
@@ -499,7 +844,7 @@ def fetch_disease_pathway(disease_id: str) -> tuple[list, list]:
             RETURN nodes, links
             """
             
-            record = session.run(query, disease_id=str(disease_id)).single()
+            record = session.run(query, disease_id=disease_pk, query_name="disease_pathway").single()
             
             if not record:
                 return [], []
@@ -541,3 +886,169 @@ def fetch_disease_pathway(disease_id: str) -> tuple[list, list]:
         import traceback
         traceback.print_exc()
         raise
+
+
+def _fetch_nodes_by_key(session, keys):
+    nodes = []
+    for label, ids in _group_node_keys(keys).items():
+        record = session.run(f"""
+            MATCH (n:{label})
+            WHERE n.id IN $ids
+            RETURN collect({{
+                id: head(labels(n)) + ':' + toString(n.id),
+                label: COALESCE(n.name, n.type, head(labels(n))),
+                group: head(labels(n)),
+                properties: properties(n)
+            }}) AS nodes
+        """, ids=ids, query_name="nodes_by_key").single()
+        nodes.extend(record["nodes"] if record else [])
+
+    for node in nodes:
+        serialized_props = {}
+        for k, v in node.get('properties', {}).items():
+            try:
+                serialized_props[k] = _serialize_neo4j_value(v)
+            except:
+                serialized_props[k] = str(v)
+        node['properties'] = serialized_props
+    return nodes
+
+
+def _fetch_links_by_key(session, keys):
+    links = []
+    for (start_label, rel_type, end_label), pairs in _group_relationship_keys(keys).items():
+        record = session.run(f"""
+            UNWIND $pairs AS pair
+            MATCH (a:{start_label} {{id: pair[0]}})-[{_relationship_pattern(rel_type)}]->(b:{end_label} {{id: pair[1]}})
+            RETURN collect({{
+                from: head(labels(a)) + ':' + toString(a.id),
+                to: head(labels(b)) + ':' + toString(b.id),
+                label: type(r)
+            }}) AS links
+        """, pairs=pairs, query_name="links_by_key").single()
+        links.extend(record["links"] if record else [])
+    return links
+
+
+def fetch_graph_diff(since: int) -> dict:
+    """
+    Return the net changes recorded after graph version `since`.
+    Added and changed elements use the usual node/link shape; removed ones
+    are returned as keys: node addresses ("Species:12") and relationship
+    keys ("Species:12-PRESENT_IN->BodySite:3").
+    """
+    try:
+        current = GraphVersion.objects.aggregate(version=Max("id"))["version"] or 0
+
+        first_action, last_action, kinds = {}, {}, {}
+        changes = (
+            GraphChange.objects.filter(version_id__gt=since)
+            .order_by("version_id", "id")
+            .values_list("kind", "key", "action")
+        )
+        for kind, key, action in changes.iterator():
+            first_action.setdefault(key, action)
+            last_action[key] = action
+            kinds[key] = kind
+
+        # Collapse each element's history since the client's version into one
+        # action: added-then-removed cancels out, removed-then-added is a change.
+        net = {GraphChange.ADDED: [], GraphChange.CHANGED: [], GraphChange.REMOVED: []}
+        for key, action in last_action.items():
+            first = first_action[key]
+            if action == GraphChange.REMOVED:
+                if first != GraphChange.ADDED:
+                    net[GraphChange.REMOVED].append(key)
+            elif first == GraphChange.ADDED:
+                net[GraphChange.ADDED].append(key)
+            else:
+                net[GraphChange.CHANGED].append(key)
+
+        diff = {"version": current, "since": since, "reset": since > current}
+        with driver.session() as session:
+            for action, keys in net.items():
+                node_keys = [k for k in keys if kinds[k] == GraphChange.NODE]
+                link_keys = [k for k in keys if kinds[k] == GraphChange.RELATIONSHIP]
+                if action == GraphChange.REMOVED:
+                    diff[action] = {"nodes": node_keys, "links": link_keys}
+                else:
+                    diff[action] = {
+                        "nodes": _fetch_nodes_by_key(session, node_keys),
+                        "links": _fetch_links_by_key(session, link_keys),
+                    }
+        return diff
+    except Exception as e:
+        print(f"Error fetching graph diff: {str(e)}")
+        raise
+
+
+LUCENE_SPECIAL_CHARS_RE = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+def _build_search_query(text):
+    """Turn free text into a Lucene query matching each term or its prefix."""
+    terms = [LUCENE_SPECIAL_CHARS_RE.sub(r"\\\1", term) for term in text.lower().split()]
+    return " ".join(f"{term} {term}*" for term in terms if term)
+
+def search_nodes(text: str, limit: int = 10, neighbors: int = 10) -> tuple[list, list, list]:
+    """
+    Full-text search over Species, Disease, Product and BodySite names and
+    descriptions. Returns the graph nodes and links of the best matches and a
+    few of their neighbors, plus the ranked matches as (id, score) dicts.
+    """
+    query_string = _build_search_query(text)
+    if not query_string:
+        return [], [], []
+    try:
+        ensure_graph_indexes()
+        with driver.session() as session:
+            query = """
+            CALL db.index.fulltext.queryNodes($index, $search) YIELD node, score
+            WITH node, score
+            ORDER BY score DESC
+            LIMIT $limit
+            CALL {
+                WITH node
+                MATCH (node)-[r]-(m)
+                WITH r, m
+                LIMIT $neighbors
+                RETURN collect(r) AS rels, collect(m) AS neighborNodes
+            }
+            RETURN head(labels(node)) + ':' + toString(node.id) AS match_id, score,
+                [n IN [node] + neighborNodes | {
+                    id: head(labels(n)) + ':' + toString(n.id),
+                    label: COALESCE(n.name, n.type, head(labels(n))),
+                    group: head(labels(n)),
+                    properties: properties(n)
+                }] AS nodes,
+                [rel IN rels | {
+                    from: head(labels(startNode(rel))) + ':' + toString(startNode(rel).id),
+                    to: head(labels(endNode(rel))) + ':' + toString(endNode(rel).id),
+                    label: type(rel)
+                }] AS links
+            """
+            result = session.run(
+                query, index=SEARCH_INDEX_NAME, search=query_string,
+                limit=limit, neighbors=neighbors, query_name="search_nodes",
+            )
+
+            nodes, links, matches = {}, {}, []
+            for record in result:
+                matches.append({"id": record["match_id"], "score": record["score"]})
+                for node in record["nodes"]:
+                    nodes.setdefault(node["id"], node)
+                for link in record["links"]:
+                    links.setdefault((link["from"], link["to"], link["label"]), link)
+
+            for node in nodes.values():
+                serialized_props = {}
+                for k, v in node.get('properties', {}).items():
+                    try:
+                        serialized_props[k] = _serialize_neo4j_value(v)
+                    except:
+                        serialized_props[k] = str(v)
+                node['properties'] = serialized_props
+
+            return list(nodes.values()), list(links.values()), matches
+    except Exception as e:
+        print(f"Error searching graph: {str(e)}")
+        raise
@@ -0,0 +1,180 @@
+"""
+Keyset (cursor) pagination, sorting and filtering for the list views.
+
+Pages are addressed by the sort value and primary key of the row at the
+page boundary (?after=<cursor> / ?before=<cursor>) instead of an offset, so
+every page costs one indexed range scan however deep it is.
+
+The page query only runs when the rows or the neighbouring-page links are
+first used, so a template that serves them from a {% cache %} block skips it.
+"""
+import base64
+import binascii
+import json
+from functools import cached_property
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+CURSOR_VALUE_TYPES = (str, int, float)
+
+
+class ListFilter:
+    """A query string parameter applied as `queryset.filter(<lookup>=value)`."""
+
+    def __init__(self, param, label, lookup, choices=None):
+        self.param = param
+        self.label = label
+        self.lookup = lookup
+        self.choices = choices
+        self.value = ""
+
+
+class KeysetPage:
+    def __init__(self, load, sort, sort_options, filters):
+        # load() -> (rows, next_query, previous_query), called at most once
+        self._load = load
+        self.sort = sort
+        self.sort_options = sort_options
+        self.filters = filters
+
+    @cached_property
+    def _page(self):
+        return self._load()
+
+    @property
+    def object_list(self):
+        return self._page[0]
+
+    @property
+    def next_query(self):
+        return self._page[1]
+
+    @property
+    def previous_query(self):
+        return self._page[2]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_query is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_query is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def _encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _decode_cursor(token):
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (binascii.Error, ValueError):
+        return None
+    # A sort value and a primary key; anything else (e.g. nested lists or
+    # objects from a tampered cursor) would fail inside the lookups
+    if not isinstance(values, list) or len(values) != 2:
+        return None
+    if not all(value is None or isinstance(value, CURSOR_VALUE_TYPES) for value in values):
+        return None
+    return values
+
+
+def _page_query(request, **params):
+    query = request.GET.copy()
+    for key in ("after", "before"):
+        query.pop(key, None)
+    query.update(params)
+    return query.urlencode()
+
+
+def paginate_keyset(request, queryset, sort_fields, default_sort, filters=(), page_size=None,
+                    max_page_size=MAX_PAGE_SIZE):
+    """
+    Return one KeysetPage of `queryset` for the request.
+
+    sort_fields maps sortable field names (indexed columns) to labels; the
+    `sort` parameter picks one, prefixed with "-" for descending order.
+    The primary key breaks ties, so (sort field, pk) must be unique.
+    """
+    try:
+        page_size = int(request.GET.get("per_page", page_size or DEFAULT_PAGE_SIZE))
+    except ValueError:
+        page_size = DEFAULT_PAGE_SIZE
+    page_size = min(max(page_size, 1), max_page_size)
+
+    sort = request.GET.get("sort", default_sort)
+    if sort.lstrip("-") not in sort_fields:
+        sort = default_sort
+    field = sort.lstrip("-")
+    descending = sort.startswith("-")
+
+    for list_filter in filters:
+        list_filter.value = request.GET.get(list_filter.param, "").strip()
+        if list_filter.value:
+            try:
+                queryset = queryset.filter(**{list_filter.lookup: list_filter.value})
+            except (ValueError, ValidationError):
+                list_filter.value = ""
+
+    after = _decode_cursor(request.GET.get("after"))
+    before = _decode_cursor(request.GET.get("before")) if after is None else None
+    forward = before is None
+    cursor = after if forward else before
+
+    # Walking backwards is the same range scan in the opposite direction
+    ascending = descending != forward
+    by_pk = field in ("id", "pk")
+    if cursor is not None:
+        value, pk = cursor
+        op = "gt" if ascending else "lt"
+        try:
+            if by_pk:
+                queryset = queryset.filter(**{f"pk__{op}": pk})
+            else:
+                queryset = queryset.filter(Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"pk__{op}": pk}))
+        except (ValueError, ValidationError):
+            # Tampered or stale cursor: start from the first page
+            cursor, forward, ascending = None, True, not descending
+
+    prefix = "" if ascending else "-"
+    ordering = [f"{prefix}pk"] if by_pk else [f"{prefix}{field}", f"{prefix}pk"]
+
+    def cursor_for(obj):
+        return _encode_cursor([obj.pk if by_pk else getattr(obj, field), obj.pk])
+
+    def load():
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if not forward:
+            rows.reverse()
+
+        has_next = has_more if forward else True
+        has_previous = cursor is not None if forward else has_more
+        return (
+            rows,
+            _page_query(request, after=cursor_for(rows[-1])) if rows and has_next else None,
+            _page_query(request, before=cursor_for(rows[0])) if rows and has_previous else None,
+        )
+
+    sort_options = []
+    for name, label in sort_fields.items():
+        sort_options += [(name, f"{label} ↑"), (f"-{name}", f"{label} ↓")]
+
+    return KeysetPage(load, sort, sort_options, list(filters))
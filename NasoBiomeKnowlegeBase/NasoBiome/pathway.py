@@ -0,0 +1,200 @@
+"""
+Disease pathways computed from PostgreSQL.
+
+Returns the same {nodes, links} data as the Cypher query in
+neo4j_integration.fetch_disease_pathway, but reads the relational tables
+directly, so it is current even when the last Neo4j export is not.
+
+The pathway of a disease is:
+  - the disease and the body site it affects
+  - species associated with it
+  - interactions causing it, with their species and site
+  - product events causing it, with their product, producing species, site,
+    and the migration or interaction they happened during
+  - migrations causing it, with their species and from/to sites
+plus every relationship the graph export creates between any two of those
+nodes. The pathway has a fixed depth, so instead of a recursive walk it
+takes a fixed number of set-based queries (about one per table), however
+many nodes it has.
+"""
+from django.db.models import Value
+
+from .models import Species, BodySite, Disease, Product, SpeciesInteraction, MigrationPattern, ProductEvent
+from .neo4j_integration import node_key, parse_node_address
+
+# Node properties as written by the push_all_*_to_neo4j exports
+NODE_FIELDS = {
+    "BodySite": (BodySite, {"name": "name", "description": "description"}),
+    "Disease": (Disease, {
+        "name": "name", "description": "description", "mechanism_of_causation": "mechanism_of_causation",
+    }),
+    "Product": (Product, {
+        "name": "name", "description": "description", "mechanism_of_action": "mechanism_of_action",
+    }),
+    "Species": (Species, {
+        "name": "name", "phyla": "phyla", "genus": "genus", "family": "family",
+        "genome_reference_link": "genome_reference_link", "age_range": "age_range", "description": "description",
+    }),
+    "Interaction": (SpeciesInteraction, {"type": "interaction_type", "mechanism": "mechanism", "evidence": "evidence"}),
+    "Migration": (MigrationPattern, {
+        "mechanism": "mechanism", "trigger_conditions": "trigger_conditions", "evidence": "evidence",
+    }),
+    "ProductEvent": (ProductEvent, {"mechanism": "mechanism", "evidence": "evidence"}),
+}
+
+INTERACTION_COLUMNS = ("id", "species_1_id", "species_2_id", "site_id", "associated_disease_id")
+MIGRATION_COLUMNS = ("id", "species_id", "from_site_id", "to_site_id", "resulting_disease_id")
+EVENT_COLUMNS = (
+    "id", "species_id", "interacting_species_id", "site_id", "product_id",
+    "disease_id", "migration_id", "interaction_id",
+)
+
+
+def _rows(queryset, columns):
+    return [dict(zip(columns, values)) for values in queryset.values_list(*columns)]
+
+
+def _load_nodes(label, ids):
+    """One query per label; values are coalesced to "" as in the export."""
+    if not ids:
+        return []
+    model, fields = NODE_FIELDS[label]
+    nodes = []
+    for values in model.objects.filter(pk__in=ids).order_by("pk").values_list("pk", *fields.values()):
+        properties = {"id": values[0]}
+        for name, value in zip(fields, values[1:]):
+            # The export writes `value or ""` for every property except the species phylum
+            properties[name] = value if name == "phyla" else (value or "")
+        nodes.append({
+            "id": node_key(label, values[0]),
+            # COALESCE(n.name, n.type, label)
+            "label": properties.get("name", properties.get("type", label)),
+            "group": label,
+            "properties": properties,
+        })
+    return nodes
+
+
+def disease_pathway(disease_id: str) -> tuple[list, list]:
+    """Return (nodes, links) for the pathway of a "Disease:<id>" node."""
+    label, disease_pk = parse_node_address(disease_id)
+    if label != "Disease":
+        return [], []
+    disease = Disease.objects.filter(pk=disease_pk).values_list("pk", "affected_site_id").first()
+    if disease is None:
+        return [], []
+    affected_site_id = disease[1]
+
+    interactions = {
+        row["id"]: row
+        for row in _rows(SpeciesInteraction.objects.filter(associated_disease=disease_pk), INTERACTION_COLUMNS)
+    }
+    migrations = {
+        row["id"]: row
+        for row in _rows(MigrationPattern.objects.filter(resulting_disease=disease_pk), MIGRATION_COLUMNS)
+    }
+    events = _rows(ProductEvent.objects.filter(disease=disease_pk), EVENT_COLUMNS)
+
+    # Interactions and migrations only reached as the context of an event are
+    # nodes too, and may have relationships to other pathway nodes
+    context_interactions = {row["interaction_id"] for row in events if row["interaction_id"]} - set(interactions)
+    if context_interactions:
+        for row in _rows(SpeciesInteraction.objects.filter(pk__in=context_interactions), INTERACTION_COLUMNS):
+            interactions[row["id"]] = row
+    context_migrations = {row["migration_id"] for row in events if row["migration_id"]} - set(migrations)
+    if context_migrations:
+        for row in _rows(MigrationPattern.objects.filter(pk__in=context_migrations), MIGRATION_COLUMNS):
+            migrations[row["id"]] = row
+
+    causing_interactions = [row for row in interactions.values() if row["associated_disease_id"] == disease_pk]
+    causing_migrations = [row for row in migrations.values() if row["resulting_disease_id"] == disease_pk]
+
+    direct_species = set(
+        Species.diseases.through.objects.filter(disease=disease_pk).values_list("species_id", flat=True)
+    )
+    species = set(direct_species)
+    species |= {row[field] for row in causing_interactions for field in ("species_1_id", "species_2_id")}
+    species |= {row["species_id"] for row in events}
+    species |= {row["species_id"] for row in causing_migrations}
+
+    sites = {row["site_id"] for row in causing_interactions}
+    sites |= {row["site_id"] for row in events}
+    sites |= {row[field] for row in causing_migrations for field in ("from_site_id", "to_site_id")}
+    if affected_site_id:
+        sites.add(affected_site_id)
+
+    products = {row["product_id"] for row in events}
+
+    nodes = [node for label, ids in (
+        ("Disease", [disease_pk]),
+        ("Species", species),
+        ("Interaction", interactions),
+        ("BodySite", sites),
+        ("ProductEvent", [row["id"] for row in events]),
+        ("Product", products),
+        ("Migration", migrations),
+    ) for node in _load_nodes(label, ids)]
+    present = {node["id"] for node in nodes}
+
+    links = {}
+
+    def link(start_label, start_id, rel_type, end_label, end_id, properties=None):
+        start, end = node_key(start_label, start_id), node_key(end_label, end_id)
+        # Only relationships between two distinct pathway nodes, as in the Cypher query
+        if start_id is None or end_id is None or start == end or start not in present or end not in present:
+            return
+        links.setdefault((start, rel_type, end, tuple(sorted((properties or {}).items()))), {
+            "from": start, "to": end, "label": rel_type, "properties": properties or {},
+        })
+
+    link("Disease", disease_pk, "AFFECTS", "BodySite", affected_site_id)
+
+    for species_id, origin_site_id in Species.objects.filter(pk__in=species).values_list("pk", "origin_site_id"):
+        link("Species", species_id, "RESIDES_IN", "BodySite", origin_site_id)
+    for species_id in direct_species:
+        link("Species", species_id, "ASSOCIATED_WITH", "Disease", disease_pk)
+    present_in = (
+        Species.body_sites.through.objects.filter(species__in=species, bodysite__in=sites)
+        .annotate(rel_type=Value("PRESENT_IN"))
+        .values_list("rel_type", "species_id", "bodysite_id")
+    )
+    produces = (
+        Species.products.through.objects.filter(species__in=species, product__in=products)
+        .annotate(rel_type=Value("PRODUCES"))
+        .values_list("rel_type", "species_id", "product_id")
+    )
+    end_labels = {"PRESENT_IN": "BodySite", "PRODUCES": "Product"}
+    for rel_type, species_id, end_id in present_in.union(produces, all=True):
+        link("Species", species_id, rel_type, end_labels[rel_type], end_id)
+
+    # Every interaction in the database links its two species, pathway node or not
+    for interaction_id, species_1_id, species_2_id in SpeciesInteraction.objects.filter(
+        species_1__in=species, species_2__in=species,
+    ).values_list("pk", "species_1_id", "species_2_id"):
+        link("Species", species_1_id, "INTERACTS_WITH", "Species", species_2_id, {"interaction_id": interaction_id})
+
+    for row in interactions.values():
+        link("Interaction", row["id"], "INVOLVES", "Species", row["species_1_id"])
+        link("Interaction", row["id"], "INVOLVES", "Species", row["species_2_id"])
+        link("Interaction", row["id"], "OCCURS_AT", "BodySite", row["site_id"])
+        link("Interaction", row["id"], "CAUSES", "Disease", row["associated_disease_id"])
+
+    for row in migrations.values():
+        link("Migration", row["id"], "INVOLVES_SPECIES", "Species", row["species_id"])
+        link("Migration", row["id"], "STARTS_FROM", "BodySite", row["from_site_id"])
+        link("Migration", row["id"], "MIGRATES_TO", "BodySite", row["to_site_id"])
+        link("Migration", row["id"], "CAUSES", "Disease", row["resulting_disease_id"])
+
+    for row in events:
+        link("Species", row["species_id"], "PRODUCES_EVENT", "ProductEvent", row["id"])
+        link("Species", row["interacting_species_id"], "PARTICIPATES_IN", "ProductEvent", row["id"])
+        link("ProductEvent", row["id"], "AT_SITE", "BodySite", row["site_id"])
+        link("ProductEvent", row["id"], "PRODUCT", "Product", row["product_id"])
+        link("ProductEvent", row["id"], "CAUSES", "Disease", row["disease_id"])
+        link("ProductEvent", row["id"], "DURING_MIGRATION", "Migration", row["migration_id"])
+        link("ProductEvent", row["id"], "DURING_INTERACTION", "Interaction", row["interaction_id"])
+
+    # The Cypher query returns no row, and so nothing, when no relationship joins the nodes
+    if not links:
+        return [], []
+    return nodes, list(links.values())
@@ -0,0 +1,255 @@
+"""
+Ranked full-text search over species, diseases, products, interactions,
+migrations and product events, and typo-tolerant name typeahead.
+
+Each table has a weighted `search_vector` column kept current by a database
+trigger (migration 0010) and covered by a GIN index. Interactions,
+migrations and product events also carry the names of their species, body
+sites and products, refreshed when one of those is renamed (migration 0016). A search first ranks
+the matching (type, id) pairs of all tables in one UNION query and slices
+out the requested page; only the rows on that page are then loaded, with
+highlighted snippets.
+
+Typeahead matches entity names against pg_trgm GIN indexes on UPPER(name)
+(migration 0011) and caches each response briefly, since the same prefixes are asked
+for again and again while people type.
+"""
+import hashlib
+import re
+
+from django.core.cache import cache
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import F, Q, TextField, Value
+from django.db.models.functions import Concat, Upper
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import BodySite, Species, Disease, Product, SpeciesInteraction, MigrationPattern, ProductEvent
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+SEARCH_CONFIG = "english"
+
+# Private-use characters delimit highlights until the snippet has been escaped
+_MARK_START, _MARK_END = "\ue000", "\ue001"
+
+
+class SearchType:
+    def __init__(self, model, label, detail_url, snippet_fields, related=()):
+        self.model = model
+        self.label = label
+        self.detail_url = detail_url
+        self.snippet_fields = snippet_fields
+        self.related = related
+
+
+SEARCH_TYPES = {
+    "species": SearchType(Species, "Species", "get_species_by_id", ["description"]),
+    "disease": SearchType(Disease, "Disease", "get_disease_by_id", ["description", "mechanism_of_causation"]),
+    "product": SearchType(Product, "Product", "get_product_by_id", ["description", "mechanism_of_action"]),
+    "interaction": SearchType(
+        SpeciesInteraction, "Interaction", "get_interaction_by_id", ["mechanism", "evidence"],
+        related=("species_1", "species_2"),
+    ),
+    "migration": SearchType(
+        MigrationPattern, "Migration", "get_migration_by_id", ["mechanism", "trigger_conditions", "evidence"],
+        related=("species", "from_site", "to_site"),
+    ),
+    "product_event": SearchType(
+        ProductEvent, "Product event", "get_product_event_by_id", ["mechanism", "evidence"],
+        related=("species", "interacting_species", "product", "site"),
+    ),
+}
+
+
+class SearchResult:
+    def __init__(self, kind, obj, rank, snippet):
+        self.kind = kind
+        self.label = SEARCH_TYPES[kind].label
+        self.id = obj.pk
+        self.title = str(obj)
+        self.rank = rank
+        self.snippet = snippet
+        self.url = reverse(SEARCH_TYPES[kind].detail_url, args=[obj.pk])
+
+    def to_dict(self):
+        return {
+            "type": self.kind,
+            "id": self.id,
+            "title": self.title,
+            "rank": self.rank,
+            "snippet": str(self.snippet),
+            "url": self.url,
+        }
+
+
+class SearchPage:
+    def __init__(self, query, results, number, per_page, total):
+        self.query = query
+        self.results = results
+        self.number = number
+        self.per_page = per_page
+        self.total = total
+        self.num_pages = max((total + per_page - 1) // per_page, 1)
+        # Query strings of the neighbouring pages, filled in by the view
+        self.previous_query = self.next_query = None
+
+    def __iter__(self):
+        return iter(self.results)
+
+    @property
+    def has_next(self):
+        return self.number < self.num_pages
+
+    @property
+    def has_previous(self):
+        return self.number > 1
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def _snippet(headline):
+    """Escape a ts_headline result and turn its delimiters into <mark> tags."""
+    if not headline:
+        return ""
+    return mark_safe(escape(headline).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>"))
+
+
+def _snippet_source(fields):
+    if len(fields) == 1:
+        return F(fields[0])
+    parts = []
+    for field in fields:
+        parts += [F(field), Value(" ")]
+    return Concat(*parts[:-1], output_field=TextField())
+
+
+def search(text, kinds=None, page=1, per_page=DEFAULT_PAGE_SIZE):
+    """
+    Return one SearchPage of results for `text` (web search syntax: quoted
+    phrases, OR, -exclusion), best matches first. `kinds` limits the search
+    to some keys of SEARCH_TYPES.
+    """
+    per_page = min(max(per_page, 1), MAX_PAGE_SIZE)
+    page = max(page, 1)
+    kinds = [kind for kind in (kinds or SEARCH_TYPES) if kind in SEARCH_TYPES]
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+
+    ranked = [
+        SEARCH_TYPES[kind].model.objects
+        .filter(search_vector=query)
+        .annotate(kind=Value(kind), rank=SearchRank(F("search_vector"), query))
+        .values_list("kind", "pk", "rank")
+        for kind in kinds
+    ]
+    if not ranked:
+        return SearchPage(text, [], page, per_page, 0)
+
+    combined = ranked[0].union(*ranked[1:], all=True)
+    total = combined.count()
+    offset = (page - 1) * per_page
+    hits = list(combined.order_by("-rank", "kind", "pk")[offset:offset + per_page])
+
+    ids_by_kind = {}
+    for kind, pk, _ in hits:
+        ids_by_kind.setdefault(kind, []).append(pk)
+
+    rows = {}
+    for kind, ids in ids_by_kind.items():
+        search_type = SEARCH_TYPES[kind]
+        objects = (
+            search_type.model.objects
+            .filter(pk__in=ids)
+            .select_related(*search_type.related)
+            .annotate(headline=SearchHeadline(
+                _snippet_source(search_type.snippet_fields), query, config=SEARCH_CONFIG,
+                start_sel=_MARK_START, stop_sel=_MARK_END, max_words=30, min_words=10,
+            ))
+        )
+        for obj in objects:
+            rows[kind, obj.pk] = obj
+
+    results = [
+        SearchResult(kind, rows[kind, pk], rank, _snippet(rows[kind, pk].headline))
+        for kind, pk, rank in hits
+        if (kind, pk) in rows
+    ]
+    return SearchPage(text, results, page, per_page, total)
+
+
+# TYPEAHEAD
+
+TYPEAHEAD_MODELS = {
+    "species": Species,
+    "disease": Disease,
+    "product": Product,
+    "body_site": BodySite,
+}
+TYPEAHEAD_MIN_LENGTH = 2
+TYPEAHEAD_DEFAULT_LIMIT = 5
+TYPEAHEAD_MAX_LIMIT = 20
+TYPEAHEAD_CACHE_TIMEOUT = 60
+
+# "S. aureus": genus initial followed by the species epithet
+ABBREVIATED_NAME_RE = re.compile(r"^([A-Za-z])\.\s*(\S.*)$")
+
+
+def _typeahead_filter(text):
+    # Written against UPPER(name) so every branch can use the expression index
+    text = text.upper()
+    condition = Q(upper_name__contains=text) | Q(upper_name__trigram_word_similar=text)
+    abbreviated = ABBREVIATED_NAME_RE.match(text)
+    if abbreviated:
+        initial, rest = abbreviated.groups()
+        condition |= Q(upper_name__startswith=initial, upper_name__contains=f" {rest}")
+    return condition
+
+
+def _typeahead_cache_key(text, kinds, limit):
+    normalized = " ".join(text.lower().split())
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    return f"nasobiome:typeahead:{','.join(kinds)}:{limit}:{digest}"
+
+
+def typeahead(text, kinds=None, limit=TYPEAHEAD_DEFAULT_LIMIT):
+    """
+    Return {type: [{"id", "name", "score"}, ...]} with the `limit` best name
+    matches per type. Substring matches, abbreviated binomials ("S. aureus")
+    and near misses by trigram word similarity all count; results are
+    ordered by similarity.
+    """
+    text = " ".join(text.split())
+    kinds = [kind for kind in (kinds or TYPEAHEAD_MODELS) if kind in TYPEAHEAD_MODELS]
+    limit = min(max(limit, 1), TYPEAHEAD_MAX_LIMIT)
+    matches = {kind: [] for kind in kinds}
+    if len(text) < TYPEAHEAD_MIN_LENGTH or not kinds:
+        return matches
+
+    key = _typeahead_cache_key(text, kinds, limit)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    condition = _typeahead_filter(text)
+    per_type = [
+        TYPEAHEAD_MODELS[kind].objects
+        .alias(upper_name=Upper("name"))
+        .filter(condition)
+        .annotate(kind=Value(kind), score=TrigramWordSimilarity(text, "name"))
+        .order_by("-score", "name")
+        .values_list("kind", "pk", "name", "score")[:limit]
+        for kind in kinds
+    ]
+    # One round trip: the per-type top-k queries are combined with UNION ALL
+    rows = per_type[0].union(*per_type[1:], all=True) if len(per_type) > 1 else per_type[0]
+    for kind, pk, name, score in rows:
+        matches[kind].append({"id": pk, "name": name, "score": round(score, 3)})
+    for items in matches.values():
+        items.sort(key=lambda item: (-item["score"], item["name"]))
+
+    cache.set(key, matches, TYPEAHEAD_CACHE_TIMEOUT)
+    return matches
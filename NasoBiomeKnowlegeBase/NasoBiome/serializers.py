@@ -1,5 +1,14 @@
 # serializers.py
-from .models import Species
+from .models import Species, BodySite, Disease, Product, SpeciesInteraction, MigrationPattern, ProductEvent
+from .summaries import COUNT_FIELDS
+
+
+def _related_name(obj, field):
+    """Name of the object behind a foreign key, or None; callers select_related it."""
+    if getattr(obj, f"{field}_id") is None:
+        return None
+    return getattr(obj, field).name
+
 
 def species_to_dict(species: Species) -> dict:
     """
@@ -14,10 +23,122 @@ def species_to_dict(species: Species) -> dict:
         "genome_reference_link": species.genome_reference_link,
         "age_range": species.age_range,
         "description": species.description,
+        "origin_site_id": species.origin_site_id,
+        "origin_site": _related_name(species, "origin_site"),
+        "created_at": species.created_at,
+        "updated_at": species.updated_at,
     }
 
+def species_with_summary_to_dict(species: Species) -> dict:
+    """
+    species_to_dict plus the counts annotated by summaries.with_summary
+    """
+    record = species_to_dict(species)
+    for field in COUNT_FIELDS:
+        record[field] = getattr(species, field, None)
+    return record
+
 def species_list_to_dict(species_list) -> list:
     """
     Convert a queryset or list of Species instances to a list of dictionaries
     """
     return [species_to_dict(s) for s in species_list]
+
+
+def body_site_to_dict(site: BodySite) -> dict:
+    return {
+        "id": site.id,
+        "name": site.name,
+        "description": site.description,
+        "created_at": site.created_at,
+        "updated_at": site.updated_at,
+    }
+
+
+def disease_to_dict(disease: Disease) -> dict:
+    return {
+        "id": disease.id,
+        "name": disease.name,
+        "description": disease.description,
+        "mechanism_of_causation": disease.mechanism_of_causation,
+        "affected_site_id": disease.affected_site_id,
+        "affected_site": _related_name(disease, "affected_site"),
+        "created_at": disease.created_at,
+        "updated_at": disease.updated_at,
+    }
+
+
+def product_to_dict(product: Product) -> dict:
+    return {
+        "id": product.id,
+        "name": product.name,
+        "description": product.description,
+        "mechanism_of_action": product.mechanism_of_action,
+        "created_at": product.created_at,
+        "updated_at": product.updated_at,
+    }
+
+
+def interaction_to_dict(interaction: SpeciesInteraction) -> dict:
+    return {
+        "id": interaction.id,
+        "species_1_id": interaction.species_1_id,
+        "species_1": _related_name(interaction, "species_1"),
+        "species_2_id": interaction.species_2_id,
+        "species_2": _related_name(interaction, "species_2"),
+        "site_id": interaction.site_id,
+        "site": _related_name(interaction, "site"),
+        "interaction_type": interaction.interaction_type,
+        "mechanism": interaction.mechanism,
+        "evidence": interaction.evidence,
+        "associated_disease_id": interaction.associated_disease_id,
+        "associated_disease": _related_name(interaction, "associated_disease"),
+        "created_at": interaction.created_at,
+        "updated_at": interaction.updated_at,
+    }
+
+
+def migration_to_dict(migration: MigrationPattern) -> dict:
+    return {
+        "id": migration.id,
+        "species_id": migration.species_id,
+        "species": _related_name(migration, "species"),
+        "from_site_id": migration.from_site_id,
+        "from_site": _related_name(migration, "from_site"),
+        "to_site_id": migration.to_site_id,
+        "to_site": _related_name(migration, "to_site"),
+        "mechanism": migration.mechanism,
+        "trigger_conditions": migration.trigger_conditions,
+        "evidence": migration.evidence,
+        "resulting_disease_id": migration.resulting_disease_id,
+        "resulting_disease": _related_name(migration, "resulting_disease"),
+        "created_at": migration.created_at,
+        "updated_at": migration.updated_at,
+    }
+
+
+def product_event_to_dict(event: ProductEvent) -> dict:
+    return {
+        "id": event.id,
+        "species_id": event.species_id,
+        "species": _related_name(event, "species"),
+        "interacting_species_id": event.interacting_species_id,
+        "interacting_species": _related_name(event, "interacting_species"),
+        "site_id": event.site_id,
+        "site": _related_name(event, "site"),
+        "product_id": event.product_id,
+        "product": _related_name(event, "product"),
+        "disease_id": event.disease_id,
+        "disease": _related_name(event, "disease"),
+        "migration_id": event.migration_id,
+        "interaction_id": event.interaction_id,
+        "mechanism": event.mechanism,
+        "evidence": event.evidence,
+        "created_at": event.created_at,
+        "updated_at": event.updated_at,
+    }
+
+
+def related_names_to_list(objects) -> list:
+    """Compact form of an included relation: [{"id", "name"}, ...]"""
+    return [{"id": obj.id, "name": obj.name} for obj in objects]
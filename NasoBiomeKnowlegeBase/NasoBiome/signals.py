@@ -0,0 +1,112 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.utils import timezone
+
+from .fragment_cache import bump_model_versions
+from .kpi import KPI_MODELS, invalidate_kpis
+from .models import Species, BodySite, Disease, Product, SpeciesSummary
+from .summaries import SPECIES_FOREIGN_KEYS, schedule_summary_refresh
+
+
+def invalidate_kpis_on_write(sender, **kwargs):
+    invalidate_kpis()
+
+
+def bump_version_on_write(sender, **kwargs):
+    bump_model_versions(sender)
+
+
+def touch_on_m2m_change(sender, instance, action, model, pk_set, **kwargs):
+    # sender is the through model; both ends of the relation changed
+    if not action.startswith("post_"):
+        return
+    bump_model_versions(type(instance), model)
+    # Link changes save neither end, so move updated_at for conditional GETs
+    now = timezone.now()
+    type(instance).objects.filter(pk=instance.pk).update(updated_at=now)
+    if pk_set:
+        model.objects.filter(pk__in=pk_set).update(updated_at=now)
+
+
+# Species summaries: name the species whose counts a write changes
+
+# Species M2M through model -> column holding the other end
+SUMMARY_LINK_TABLES = {
+    Species.body_sites.through: "bodysite",
+    Species.diseases.through: "disease",
+    Species.products.through: "product",
+}
+
+
+def refresh_summary_of_species(sender, instance, created=False, **kwargs):
+    if created:
+        # The species list inner-joins the summary, so the row has to exist
+        # before the commit; the counts follow on commit
+        SpeciesSummary.objects.bulk_create(
+            [SpeciesSummary(species=instance, phyla=instance.phyla)], ignore_conflicts=True,
+        )
+    schedule_summary_refresh([instance.pk])
+
+
+def remember_species_before_change(sender, instance, **kwargs):
+    # An update may move the row away from its previous species. Outside a
+    # transaction on_commit runs at once, so recount them after the save.
+    if instance.pk is not None:
+        fields = SPECIES_FOREIGN_KEYS[sender]
+        instance._previous_species = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+
+
+def refresh_summaries_after_change(sender, instance, **kwargs):
+    previous = instance.__dict__.pop("_previous_species", None) or ()
+    schedule_summary_refresh(
+        [*previous, *(getattr(instance, field) for field in SPECIES_FOREIGN_KEYS[sender])]
+    )
+
+
+def refresh_summaries_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            schedule_summary_refresh([instance.pk])
+    elif action == "pre_clear":
+        # Which species lose the link is only known before the rows go
+        column = SUMMARY_LINK_TABLES[sender]
+        schedule_summary_refresh(
+            sender.objects.filter(**{column: instance.pk}).values_list("species_id", flat=True)
+        )
+    elif action.startswith("post_"):
+        schedule_summary_refresh(pk_set or ())
+
+
+def refresh_summaries_before_linked_delete(sender, instance, **kwargs):
+    # Deleting a body site, disease or product drops its link rows without m2m_changed
+    for through, column in SUMMARY_LINK_TABLES.items():
+        if through._meta.get_field(column).related_model is sender:
+            schedule_summary_refresh(
+                through.objects.filter(**{column: instance.pk}).values_list("species_id", flat=True)
+            )
+
+
+def connect_signals():
+    for model in KPI_MODELS:
+        post_save.connect(invalidate_kpis_on_write, sender=model, dispatch_uid=f"kpi_save_{model.__name__}")
+        post_delete.connect(invalidate_kpis_on_write, sender=model, dispatch_uid=f"kpi_delete_{model.__name__}")
+        post_save.connect(bump_version_on_write, sender=model, dispatch_uid=f"version_save_{model.__name__}")
+        post_delete.connect(bump_version_on_write, sender=model, dispatch_uid=f"version_delete_{model.__name__}")
+        for field in model._meta.local_many_to_many:
+            m2m_changed.connect(
+                touch_on_m2m_change, sender=field.remote_field.through,
+                dispatch_uid=f"version_m2m_{model.__name__}_{field.name}",
+            )
+
+    post_save.connect(refresh_summary_of_species, sender=Species, dispatch_uid="summary_save_Species")
+    for model in SPECIES_FOREIGN_KEYS:
+        pre_save.connect(remember_species_before_change, sender=model, dispatch_uid=f"summary_pre_save_{model.__name__}")
+        post_save.connect(refresh_summaries_after_change, sender=model, dispatch_uid=f"summary_save_{model.__name__}")
+        post_delete.connect(refresh_summaries_after_change, sender=model, dispatch_uid=f"summary_delete_{model.__name__}")
+    for through in SUMMARY_LINK_TABLES:
+        m2m_changed.connect(
+            refresh_summaries_on_m2m_change, sender=through, dispatch_uid=f"summary_m2m_{through.__name__}"
+        )
+    for model in (BodySite, Disease, Product):
+        pre_delete.connect(
+            refresh_summaries_before_linked_delete, sender=model, dispatch_uid=f"summary_delete_{model.__name__}"
+        )
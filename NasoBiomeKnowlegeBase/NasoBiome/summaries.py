@@ -0,0 +1,121 @@
+"""
+The species summary table: per-species counts of body sites, diseases,
+products, interactions, migrations and product events.
+
+Writes never update the counts in place. The receivers in signals.py (and
+the bulk upsert) name the species a write affects, and after the transaction
+commits each of those species is recounted with one set-based statement.
+Recounting instead of adding and subtracting keeps the table correct when
+receivers miss a write; `manage.py rebuild_species_summaries` recounts
+everything.
+"""
+import threading
+
+from django.db import transaction
+from django.db.models import F, Func, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .fragment_cache import bump_model_versions
+from .models import Species, SpeciesInteraction, MigrationPattern, ProductEvent, SpeciesSummary
+
+COUNT_FIELDS = ("body_site_count", "disease_count", "product_count",
+                "interaction_count", "migration_count", "product_event_count")
+REFRESH_BATCH_SIZE = 1000
+
+# Foreign keys to Species on the counted models; writes to these rows change
+# the counts of the species on both the old and the new values
+SPECIES_FOREIGN_KEYS = {
+    SpeciesInteraction: ("species_1_id", "species_2_id"),
+    MigrationPattern: ("species_id",),
+    ProductEvent: ("species_id", "interacting_species_id"),
+}
+
+_pending = threading.local()
+
+
+def _count(queryset):
+    """COUNT(*) of `queryset` as a subquery, without a GROUP BY."""
+    return Coalesce(Subquery(
+        queryset.order_by().annotate(n=Func(F("pk"), function="COUNT")).values("n")
+    ), Value(0))
+
+
+def _counts():
+    species = OuterRef("pk")
+    return {
+        "body_site_count": _count(Species.body_sites.through.objects.filter(species=species)),
+        "disease_count": _count(Species.diseases.through.objects.filter(species=species)),
+        "product_count": _count(Species.products.through.objects.filter(species=species)),
+        "interaction_count": _count(
+            SpeciesInteraction.objects.filter(Q(species_1=species) | Q(species_2=species))
+        ),
+        "migration_count": _count(MigrationPattern.objects.filter(species=species)),
+        "product_event_count": _count(
+            ProductEvent.objects.filter(Q(species=species) | Q(interacting_species=species))
+        ),
+    }
+
+
+def refresh_species_summaries(species_ids=None):
+    """Recount the given species (all species when None). Returns the number refreshed."""
+    species = Species.objects.order_by("pk")
+    if species_ids is not None:
+        species = species.filter(pk__in=species_ids)
+
+    refreshed = 0
+    rows = species.annotate(**_counts()).values_list("pk", "phyla", *COUNT_FIELDS)
+    with transaction.atomic():
+        batch = []
+        for pk, phyla, *counts in rows.iterator(chunk_size=REFRESH_BATCH_SIZE):
+            batch.append(SpeciesSummary(species_id=pk, phyla=phyla, **dict(zip(COUNT_FIELDS, counts))))
+            if len(batch) >= REFRESH_BATCH_SIZE:
+                refreshed += _write(batch)
+                batch = []
+        refreshed += _write(batch)
+    if refreshed:
+        bump_model_versions(SpeciesSummary)
+    return refreshed
+
+
+def _write(summaries):
+    if not summaries:
+        return 0
+    SpeciesSummary.objects.bulk_create(
+        summaries, update_conflicts=True, unique_fields=["species"],
+        update_fields=["phyla", *COUNT_FIELDS],
+    )
+    return len(summaries)
+
+
+def schedule_summary_refresh(species_ids):
+    """
+    Recount these species once the current transaction commits. Deferring
+    lets a cascade of deletes finish first and recounts each species once.
+    """
+    species_ids = {pk for pk in species_ids if pk is not None}
+    if not species_ids:
+        return
+    if getattr(_pending, "ids", None) is None:
+        _pending.ids = set()
+    _pending.ids |= species_ids
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    # Several callbacks may be queued; the first one does the work
+    species_ids, _pending.ids = getattr(_pending, "ids", None), None
+    if species_ids:
+        refresh_species_summaries(species_ids)
+
+
+def with_summary(queryset):
+    """
+    Annotate a Species queryset with the summary counts, for sorting and
+    filtering. The counts are the summary's own columns over an inner join,
+    so ORDER BY and the keyset predicates can use the summary_*_count_idx
+    indexes. Every species has a summary row: it is created with the species
+    (signals.py, the importer) and was backfilled by migration 0017.
+    """
+    return queryset.filter(summary__isnull=False).annotate(
+        **{name: F(f"summary__{name}") for name in COUNT_FIELDS}
+    )
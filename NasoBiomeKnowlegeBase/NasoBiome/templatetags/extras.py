@@ -1,5 +1,7 @@
 from django import template
 
+from NasoBiome import fragment_cache
+
 register = template.Library()
 
 @register.filter
@@ -21,3 +23,8 @@ def truncate(value, limit = 20):
         return value
     value = str(value)
     return value if len(value) <= limit else value[:limit] + "..."
+
+@register.simple_tag
+def model_versions(*models):
+    """Version key for {% cache %} blocks showing these models (see fragment_cache.py)."""
+    return fragment_cache.model_versions(*models)
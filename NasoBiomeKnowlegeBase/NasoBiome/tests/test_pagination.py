@@ -0,0 +1,44 @@
+import base64
+import json
+
+from django.test import RequestFactory, TestCase
+
+from NasoBiome.models import Species
+from NasoBiome.pagination import _encode_cursor, paginate_keyset
+
+SORT_FIELDS = {"name": "Name", "phyla": "Phyla"}
+
+
+def cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Species.objects.bulk_create(Species(name=f"species {i:02}", phyla="Bacillota") for i in range(5))
+
+    def page(self, **params):
+        request = RequestFactory().get("/species/", {"per_page": 2, **params})
+        return paginate_keyset(request, Species.objects.all(), SORT_FIELDS, default_sort="name")
+
+    def names(self, page):
+        return [species.name for species in page]
+
+    def test_after_cursor_continues_the_sort(self):
+        first = Species.objects.get(name="species 01")
+        page = self.page(after=_encode_cursor([first.name, first.pk]))
+        self.assertEqual(self.names(page), ["species 02", "species 03"])
+        self.assertTrue(page.has_previous)
+
+    def test_tampered_cursor_falls_back_to_the_first_page(self):
+        for values in ([[1], [1]], [{"a": 1}, 1], [1, [2]], [1, 2, 3], {"a": 1}):
+            with self.subTest(cursor=values):
+                page = self.page(after=cursor(values), sort="phyla")
+                self.assertEqual(self.names(page), ["species 00", "species 01"])
+                self.assertFalse(page.has_previous)
+
+    def test_malformed_cursor_falls_back_to_the_first_page(self):
+        for token in ("not base64!", cursor("text"), base64.urlsafe_b64encode(b"{").decode()):
+            with self.subTest(token=token):
+                self.assertEqual(self.names(self.page(after=token)), ["species 00", "species 01"])
@@ -0,0 +1,115 @@
+"""
+The list and detail views run a fixed number of SQL queries however many
+rows the tables hold, and no more than their @query_budget.
+"""
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+from django.template import TemplateDoesNotExist
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from NasoBiome.fragment_cache import bump_model_versions
+from NasoBiome.models import BodySite, Disease, Species, Product, MigrationPattern, SpeciesInteraction, ProductEvent
+from NasoBiome.summaries import refresh_species_summaries
+
+# List and detail views checked against their @query_budget
+VIEWS = [
+    ("get_all_species", None),
+    ("get_species_by_id", Species),
+    ("get_all_body_sites", None),
+    ("get_body_site_by_id", BodySite),
+    ("get_all_diseases", None),
+    ("get_disease_by_id", Disease),
+    ("get_all_products", None),
+    ("get_product_by_id", Product),
+    ("get_all_interactions", None),
+    ("get_interaction_by_id", SpeciesInteraction),
+    ("get_all_migrations", None),
+    ("get_migration_by_id", MigrationPattern),
+    ("get_all_product_events", None),
+    ("get_product_event_by_id", ProductEvent),
+]
+
+SEEDED_MODELS = (BodySite, Disease, Species, Product, SpeciesInteraction, MigrationPattern, ProductEvent)
+SIZES = (10, 100, 1000)
+
+
+def seed(size):
+    """`size` rows per model (fewer body sites), linked the way the views join them."""
+    sites = BodySite.objects.bulk_create(
+        BodySite(name=f"budget site {i}") for i in range(max(size // 10, 2))
+    )
+    diseases = Disease.objects.bulk_create(
+        Disease(name=f"budget disease {i}", affected_site=sites[i % len(sites)]) for i in range(size)
+    )
+    species = Species.objects.bulk_create(
+        Species(name=f"budget species {i}", phyla="Bacillota", origin_site=sites[0]) for i in range(size)
+    )
+    products = Product.objects.bulk_create(
+        Product(name=f"budget product {i}") for i in range(size)
+    )
+    for i, item in enumerate(species[:10]):
+        item.body_sites.add(*sites[:2])
+        item.diseases.add(diseases[i])
+        item.products.add(products[i])
+
+    interactions = SpeciesInteraction.objects.bulk_create(
+        SpeciesInteraction(
+            species_1=species[i], species_2=species[(i + 1) % size], site=sites[i % len(sites)],
+            interaction_type="synergistic", associated_disease=diseases[i],
+        )
+        for i in range(size)
+    )
+    migrations = MigrationPattern.objects.bulk_create(
+        MigrationPattern(
+            species=species[i], from_site=sites[0], to_site=sites[1], resulting_disease=diseases[i],
+        )
+        for i in range(size)
+    )
+    ProductEvent.objects.bulk_create(
+        ProductEvent(
+            species=species[i], interacting_species=species[(i + 1) % size], site=sites[0],
+            product=products[i], disease=diseases[i], migration=migrations[i], interaction=interactions[i],
+        )
+        for i in range(size)
+    )
+    # bulk_create sends no signals, and on_commit never runs inside a TestCase
+    refresh_species_summaries()
+
+
+class QueryBudgetTests(TestCase):
+    factory = RequestFactory()
+
+    def get(self, url):
+        match = resolve(url)
+        request = self.factory.get(url)
+        request.user = AnonymousUser()
+        match.func(request, **match.kwargs)
+        return match.func
+
+    def test_views_run_a_constant_number_of_queries(self):
+        baseline, skipped = {}, set()
+        for size in SIZES:
+            with transaction.atomic():
+                seed(size)
+                for url_name, model in VIEWS:
+                    if url_name in skipped:
+                        continue
+                    url = reverse(url_name, args=[model.objects.first().pk]) if model else reverse(url_name)
+                    # Measure a cold fragment cache
+                    bump_model_versions(*SEEDED_MODELS)
+                    with self.subTest(view=url_name, rows=size):
+                        if url_name not in baseline:
+                            with CaptureQueriesContext(connection) as queries:
+                                try:
+                                    view = self.get(url)
+                                except TemplateDoesNotExist as e:
+                                    skipped.add(url_name)
+                                    self.skipTest(f"template {e} is missing")
+                            baseline[url_name] = len(queries)
+                            self.assertLessEqual(len(queries), view.query_budget)
+                        else:
+                            with self.assertNumQueries(baseline[url_name]):
+                                self.get(url)
+                transaction.set_rollback(True)
@@ -0,0 +1,56 @@
+"""
+The key lookups and filters are answered from their index. Checked against
+PostgreSQL's EXPLAIN output, so a change that turns one of them into a
+sequential scan fails the build.
+"""
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from NasoBiome.models import Species, SpeciesInteraction, MigrationPattern, ProductEvent, SpeciesSummary
+from NasoBiome.summaries import with_summary
+
+# (label, queryset, index expected in the plan): importer get_or_create keys,
+# admin filters, the foreign keys whose own index was dropped in favour of a
+# natural key index, and the species list sorted by a summary count
+KEY_QUERIES = [
+    ("interaction natural key",
+     SpeciesInteraction.objects.filter(species_1=1, species_2=2, site=1), "interaction_natural_key"),
+    ("migration natural key",
+     MigrationPattern.objects.filter(species=1, from_site=1, to_site=2), "migration_natural_key"),
+    ("product event natural key",
+     ProductEvent.objects.filter(species=1, site=1, product=1), "product_event_natural_key"),
+    ("species by phylum", Species.objects.filter(phyla="Bacillota"), "species_phyla_id_idx"),
+    ("species by genus", Species.objects.filter(genus="Staphylococcus"), "species_genus_id_idx"),
+    ("interactions by type",
+     SpeciesInteraction.objects.filter(interaction_type="synergistic"), "interaction_type_id_idx"),
+    # Index name generated by Django; its hash suffix is left out
+    ("migrations by resulting disease",
+     MigrationPattern.objects.filter(resulting_disease=1), "NasoBiome_migrationpattern_resulting_disease_id"),
+    ("interactions of a species", SpeciesInteraction.objects.filter(species_1=1), "interaction_natural_key"),
+    ("migrations of a species", MigrationPattern.objects.filter(species=1), "migration_natural_key"),
+    ("product events of a species", ProductEvent.objects.filter(species=1), "product_event_natural_key"),
+    ("species by disease count",
+     SpeciesSummary.objects.filter(disease_count__gte=3).values("species"), "summary_disease_count_idx"),
+    ("species by interaction count",
+     SpeciesSummary.objects.filter(interaction_count__gte=3).values("species"), "summary_interaction_count_idx"),
+    ("species list sorted by disease count",
+     with_summary(Species.objects.all()).order_by("-disease_count", "-pk")[:26], "summary_disease_count_idx"),
+]
+
+
+@skipUnless(connection.vendor == "postgresql", "query plans are checked on PostgreSQL")
+class KeyQueryPlanTests(TestCase):
+    def setUp(self):
+        # The test tables are nearly empty and cheaper to scan; ask whether
+        # an index can serve each query at all. TestCase runs in a transaction.
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def test_key_queries_use_their_index(self):
+        for label, queryset, index in KEY_QUERIES:
+            with self.subTest(label):
+                plan = queryset.explain()
+                self.assertIn(index, plan)
+                self.assertNotIn("Seq Scan", plan)
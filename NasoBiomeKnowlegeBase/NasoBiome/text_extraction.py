@@ -0,0 +1,233 @@
+"""
+Free-text heuristics used by the spreadsheet importer: diseases and URLs in
+the "infections caused" column, products and species interactions in the
+functions text.
+
+The dictionaries below are plain data, matched through KeywordSet, and
+every regex is compiled once at import time rather than on each call.
+`manage.py benchmark_text_extraction` times the extractors.
+"""
+import re
+
+DISEASE_KEYWORDS = (
+    'sepsis', 'pneumonia', 'meningitis', 'endocarditis', 'bacteremia',
+    'sinusitis', 'otitis', 'osteomyelitis', 'abscess', 'cellulitis',
+    'peritonitis', 'empyema', 'arthritis', 'pyelonephritis',
+    'pharyngitis', 'tonsillitis', 'bronchitis', 'gastroenteritis',
+    'conjunctivitis', 'mastoiditis', 'pericarditis', 'myocarditis',
+    'encephalitis', 'nephritis', 'hepatitis', 'colitis',
+    'enteritis', 'urethritis', 'vaginitis', 'folliculitis',
+    'impetigo', 'erysipelas', 'necrotizing fasciitis',
+    'toxic shock syndrome', 'scarlet fever', 'rheumatic fever',
+)
+
+# Add more as needed
+KNOWN_PRODUCTS = (
+    "lugdunin", "pneumolysin", "salivaricin", "phenol-soluble modulins",
+    "hemolysins", "proteases", "lipases", "biofilm", "siderophore",
+    "bacteriocin", "toxic shock syndrome toxin", "enterotoxins", "exfoliatin",
+    "collagenase", "hyaluronidase", "autolysin", "neuraminidase",
+    "staphyloxanthin", "catalase", "delta-toxin", "sarcinaxanthin",
+)
+
+SPECIES_ABBREVIATIONS = {
+    "S. aureus": "Staphylococcus aureus",
+    "S. epidermidis": "Staphylococcus epidermidis",
+    "C. accolens": "Corynebacterium accolens",
+    "S. pneumoniae": "Streptococcus pneumoniae",
+    "H. influenzae": "Haemophilus influenzae",
+    "M. catarrhalis": "Moraxella catarrhalis",
+    "P. aeruginosa": "Pseudomonas aeruginosa",
+    "F. nucleatum": "Fusobacterium nucleatum",
+}
+
+ANTAGONISTIC_WORDS = ("inhibit", "suppress", "kill", "block", "antagonistic", "reduce growth")
+SYNERGISTIC_WORDS = ("synergistic", "coexist", "co-aggregate", "enhance", "promote", "support", "cooperate")
+
+# Disease name candidates rejected by extract_urls_and_diseases
+NOT_DISEASES = ('infections', 'infection', 'common syndromes include')
+NOT_DISEASE_PREFIXES = ('the ', 'this ', 'these ', 'it ', 'they ')
+
+
+class KeywordSet:
+    """
+    Which of a fixed set of keywords occur in a text, as substrings.
+
+    For dictionaries of a few dozen entries one `in` test per keyword (a C
+    substring search) is about three times faster in CPython than a single
+    alternation regex, which has to try every branch at every position and
+    needs lookaheads to find nested keywords like "enteritis" in
+    "gastroenteritis". Callers only see in_order(), so an automaton can
+    replace the scan if the dictionaries grow to hundreds of entries.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(dict.fromkeys(keywords))
+
+    def in_order(self, text):
+        """The keywords occurring in `text`, in dictionary order."""
+        return [keyword for keyword in self.keywords if keyword in text]
+
+
+DISEASE_KEYWORD_SET = KeywordSet(DISEASE_KEYWORDS)
+PRODUCT_SET = KeywordSet(KNOWN_PRODUCTS)
+# Pattern: up to 5 words before a keyword + keyword + up to 3 words after
+DISEASE_NAME_PATTERNS = {
+    keyword: re.compile(r'\b(?:[\w-]+\s+){0,5}' + re.escape(keyword) + r'(?:\s+[\w-]+){0,3}\b', re.IGNORECASE)
+    for keyword in DISEASE_KEYWORDS
+}
+PRODUCT_NAMES = {product: product.title().replace(" ", "-") for product in KNOWN_PRODUCTS}
+
+URL_PATTERN = r'https?://[^\s\)]+'
+WWW_RE = re.compile(r'^\s*www\.')
+LABEL_RE = re.compile(
+    r'^(Virulence|Antibiotic|Important|Usually|Often|Chronic|Migrates|Direct|Hematogenous):', re.IGNORECASE,
+)
+DESCRIPTIVE_VERB_RE = re.compile(
+    r'\b(causes disease|known for|may allow|can lead|can enter|can cause|producing toxins|inducing|occur in|often occur|resemble)\b',
+    re.IGNORECASE,
+)
+WHITESPACE_RE = re.compile(r'\s+')
+TRIM_RE = re.compile(r'^[^\w\(]+|[^\w\)]+$')
+MEDICAL_SUFFIX_RE = re.compile(r'(itis|emia|osis|pathy|oma|syndrome|disease|disorder|infection)(\s|$|\()')
+REFERENCE_WORD_RE = re.compile(r'\b(include|such as|like|example|note|see|refer)\b')
+
+SENTENCE_SPLIT_RE = re.compile(r'[.\n!;]+')
+# Capital letter + . + space + lowercase word (e.g., S. aureus)
+ABBREVIATED_SPECIES_RE = re.compile(r'\b([A-Z]\.\s+[a-z]\w+)')
+FULL_SPECIES_RE = re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)')
+
+
+def extract_products_from_text(text):
+    """Extract known products like 'lugdunin', 'pneumolysin', etc."""
+    if not text:
+        return []
+    return [PRODUCT_NAMES[product] for product in PRODUCT_SET.in_order(text.lower())]
+
+
+def extract_species_names_from_text(text, exclude=None):
+    """Extract likely species names like 'S. aureus', 'Corynebacterium accolens'."""
+    exclude = exclude or []
+    candidates = set()
+    for match in ABBREVIATED_SPECIES_RE.findall(text):
+        name = match.replace(". ", ".")
+        if name not in exclude:
+            candidates.add(name)
+
+    for match in FULL_SPECIES_RE.findall(text):
+        if len(match.split()) == 2 and match not in exclude:
+            candidates.add(match)
+
+    # Map common abbreviations
+    return list({SPECIES_ABBREVIATIONS.get(name, name) for name in candidates})
+
+
+def extract_interactions_from_text(text, current_species_name):
+    """
+    Parse sentences like:
+    - 'Inhibits S. aureus'
+    - 'Coexists with C. accolens'
+    - 'Competes with Haemophilus influenzae'
+    Returns list of (target_species_name, interaction_type, mechanism_snippet)
+    """
+    if not text:
+        return []
+    interactions = []
+    for sent in SENTENCE_SPLIT_RE.split(str(text)):
+        sent = sent.strip()
+        if not sent:
+            continue
+        sent_lower = sent.lower()
+
+        if any(word in sent_lower for word in ANTAGONISTIC_WORDS):
+            interaction_type = "antagonistic"
+        elif any(word in sent_lower for word in SYNERGISTIC_WORDS):
+            interaction_type = "synergistic"
+        else:
+            # Neutral or unclear → skip
+            continue
+        for target in extract_species_names_from_text(sent, exclude=[current_species_name]):
+            interactions.append((target, interaction_type, sent))
+    return interactions
+
+
+def extract_urls_and_diseases(text):
+    """
+    Extract disease names from text and return (disease_name, description) pairs,
+    plus the URLs found on lines of their own.
+    """
+    if not text:
+        return [], ""
+
+    lines = [line.strip() for line in str(text).split("\n") if line.strip()]
+    urls = []
+    disease_results = []  # List of (disease_name, description) tuples
+    seen_diseases = set()  # Track to avoid duplicates
+
+    for line in lines:
+        # Extract URLs
+        if line.startswith(("http://", "https://")):
+            urls.append(line)
+            continue
+        elif WWW_RE.match(line):
+            urls.append("https://" + line)
+            continue
+
+        # Skip very long descriptive sentences
+        if len(line) > 150:
+            continue
+
+        # Skip obvious non-disease headers/labels
+        if LABEL_RE.match(line):
+            continue
+
+        # Skip sentences with descriptive verbs
+        if DESCRIPTIVE_VERB_RE.search(line):
+            continue
+
+        line_lower = line.lower()
+
+        # Try to extract a clean disease name around each keyword in the line
+        found_in_line = False
+        for keyword in DISEASE_KEYWORD_SET.in_order(line_lower):
+            for match in DISEASE_NAME_PATTERNS[keyword].findall(line):
+                disease_name = TRIM_RE.sub('', WHITESPACE_RE.sub(' ', match.strip()))
+                disease_lower = disease_name.lower()
+                if (disease_name and
+                        len(disease_name) <= 100 and
+                        disease_lower not in NOT_DISEASES and
+                        not disease_lower.startswith(NOT_DISEASE_PREFIXES) and
+                        disease_lower not in seen_diseases):
+                    disease_results.append((disease_name, line))
+                    seen_diseases.add(disease_lower)
+                    found_in_line = True
+                    break  # Only take first disease from each line
+
+        # If no keyword match, check if line itself looks like a disease name
+        if not found_in_line and len(line) <= 100:
+            if (MEDICAL_SUFFIX_RE.search(line_lower) and
+                    line_lower not in seen_diseases and
+                    not REFERENCE_WORD_RE.search(line_lower)):
+                disease_results.append((line, line))
+                seen_diseases.add(line_lower)
+
+    return disease_results, "\n".join(urls)
+
+
+def extract_entries(entries):
+    """
+    Run the extractors over (species name, functions text, infections text)
+    triples and return one (diseases, urls, products, interactions) record per
+    entry. Takes and returns plain data only, so chunks of entries can be
+    handed to worker processes.
+    """
+    records = []
+    for species, description, infections in entries:
+        diseases, urls = extract_urls_and_diseases(infections)
+        records.append((
+            [(name.strip(), line) for name, line in diseases if name.strip()],
+            urls,
+            extract_products_from_text(description),
+            extract_interactions_from_text(description, species),
+        ))
+    return records
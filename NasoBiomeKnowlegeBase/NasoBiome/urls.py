@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, views_api
 
 urlpatterns = [
     
@@ -68,9 +68,32 @@ urlpatterns = [
    
     path('export-all/', views.export_all_to_neo4j, name='export_all_to_neo4j'),
 
+    # Prometheus metrics
+    path('metrics/', views.metrics, name='metrics'),
+
     path('graph/', views.view_graph, name='view_graph'),
     path('api/get_graph_data/', views.get_graph_data, name='get_graph_data'),
     
     # Expanded Graph (D3.js)
     path('api/get_expanded_graph_data/', views.get_expanded_graph_data, name='get_expanded_graph_data'),
+
+    # Incremental graph changes since a graph version
+    path('api/graph-diff/', views.get_graph_diff, name='get_graph_diff'),
+
+    # Full-text node search
+    path('api/search_graph/', views.search_graph, name='search_graph'),
+
+    # Full-text search of the knowledge base
+    path('search/', views.search_page, name='search_page'),
+    path('api/search/', views.search_api, name='search_api'),
+    path('api/typeahead/', views.typeahead_api, name='typeahead_api'),
+
+    # Options for the autocomplete form widgets
+    path('api/lookup/<str:kind>/', views.lookup_records, name='lookup_records'),
+
+    # Read API (v1)
+    path('api/v1/', views_api.api_index, name='api_index'),
+    path('api/v1/bulk/', views_api.bulk_upsert_records, name='api_bulk_upsert'),
+    path('api/v1/<str:resource>/', views_api.list_records, name='api_list_records'),
+    path('api/v1/<str:resource>/<int:id>/', views_api.get_record, name='api_get_record'),
 ]
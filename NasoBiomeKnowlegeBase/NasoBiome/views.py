@@ -4,14 +4,26 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from .neo4j_integration import driver
 
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
 
 from .models import (
     Species, BodySite, Disease, Product,
     SpeciesInteraction, MigrationPattern, ProductEvent
 )
+from .metrics import render_metrics
+from .pagination import ListFilter, paginate_keyset
+from .instrumentation import query_budget
+from .conditional import conditional_on
+from .kpi import get_kpis
+from .pathway import disease_pathway
+from .summaries import with_summary
+from .search import SEARCH_TYPES, search as search_records, typeahead
 from .forms import (
+    AUTOCOMPLETE_LOOKUPS,
     SpeciesForm, BodySiteForm, DiseaseForm,
     ProductForm, SpeciesInteractionForm, MigrationPatternForm, ProductEventForm
 )
@@ -25,41 +37,43 @@ from .neo4j_integration import (
     push_all_product_events_to_neo4j,
     fetch_initial_graph,
     fetch_neighbors,
-    fetch_disease_pathway,
+    fetch_neighbors_batch,
+    fetch_graph_diff,
+    search_nodes,
+    export_all_to_neo4j as export_graph_to_neo4j,
 )
 
 # Home Page
 def home(request):
-    kpi = {
-        'species_count': Species.objects.count(),
-        'body_sites_count': BodySite.objects.count(),
-        'diseases_count': Disease.objects.count(),
-        'products_count': Product.objects.count(),
-        'interactions_count': SpeciesInteraction.objects.count(),
-        'migrations_count': MigrationPattern.objects.count(),
-        'product_events_count': ProductEvent.objects.count(),
-        # Optional: if track total graph stats elsewhere
-        'total_nodes': (
-            Species.objects.count() +
-            BodySite.objects.count() +
-            Disease.objects.count() +
-            Product.objects.count()
-        ),
-        'total_relationships': (
-            SpeciesInteraction.objects.count() +
-            MigrationPattern.objects.count() +
-            ProductEvent.objects.count()
-            # Add other relationship types if needed
-        )
-    }
+    kpi = get_kpis()
     return render(request, 'home.html', {'kpi': kpi})
 
 
 #Speices
+@query_budget(3)
+# Every model the summary counts are taken from
+@conditional_on(Species, BodySite, Disease, Product, SpeciesInteraction, MigrationPattern, ProductEvent)
 def get_all_species(request):
-    species = Species.objects.all()
+    species = paginate_keyset(
+        request, with_summary(Species.objects.all()),
+        sort_fields={
+            "name": "Name", "phyla": "Phyla", "genus": "Genus",
+            "disease_count": "Diseases", "interaction_count": "Interactions",
+            "product_event_count": "Product events",
+        },
+        default_sort="name",
+        filters=[
+            ListFilter("phyla", "Phyla", "phyla"),
+            ListFilter("genus", "Genus", "genus"),
+            ListFilter("site", "Site", "body_sites", choices=BodySite.objects.order_by("name").values_list("id", "name")),
+            ListFilter("min_diseases", "Min. diseases", "disease_count__gte"),
+            ListFilter("min_interactions", "Min. interactions", "interaction_count__gte"),
+        ],
+    )
     return render(request, "species/species_list.html", {"species": species})
 
+@query_budget(9)
+@conditional_on(Species, BodySite, Disease, Product)
 def get_species_by_id(request, id):
     species = get_object_or_404(Species, id=id)
     if request.method == "POST":
@@ -91,10 +105,18 @@ def export_species_to_neo4j(request):
 
 
 #Body sites
+@query_budget(2)
+@conditional_on(BodySite)
 def get_all_body_sites(request):
-    sites = BodySite.objects.all()
+    sites = paginate_keyset(
+        request, BodySite.objects.all(),
+        sort_fields={"name": "Name"},
+        default_sort="name",
+    )
     return render(request, "bodysite/bodysite_list.html", {"sites": sites})
 
+@query_budget(2)
+@conditional_on(BodySite)
 def get_body_site_by_id(request, id):
     site = get_object_or_404(BodySite, id=id)
     if request.method == "POST":
@@ -127,10 +149,21 @@ def export_body_sites_to_neo4j(request):
 
 
 # Diseases
+@query_budget(3)
+@conditional_on(Disease, BodySite)
 def get_all_diseases(request):
-    diseases = Disease.objects.all()
+    diseases = paginate_keyset(
+        request, Disease.objects.select_related("affected_site"),
+        sort_fields={"name": "Name"},
+        default_sort="name",
+        filters=[
+            ListFilter("site", "Affected site", "affected_site", choices=BodySite.objects.order_by("name").values_list("id", "name")),
+        ],
+    )
     return render(request, "disease/disease_list.html", {"diseases": diseases})
 
+@query_budget(3)
+@conditional_on(Disease, BodySite)
 def get_disease_by_id(request, id):
     disease = get_object_or_404(Disease, id=id)
     if request.method == "POST":
@@ -162,10 +195,18 @@ def export_diseases_to_neo4j(request):
 
 
 #Products
+@query_budget(2)
+@conditional_on(Product)
 def get_all_products(request):
-    products = Product.objects.all()
+    products = paginate_keyset(
+        request, Product.objects.all(),
+        sort_fields={"name": "Name"},
+        default_sort="name",
+    )
     return render(request, "product/product_list.html", {"products": products})
 
+@query_budget(2)
+@conditional_on(Product)
 def get_product_by_id(request, id):
     product = get_object_or_404(Product, id=id)
     if request.method == "POST":
@@ -197,12 +238,25 @@ def export_products_to_neo4j(request):
 
 
 #Species Interactions
+@query_budget(3)
+@conditional_on(SpeciesInteraction, Species, BodySite, Disease)
 def get_all_interactions(request):
-    interactions = SpeciesInteraction.objects.all()
+    interactions = paginate_keyset(
+        request,
+        SpeciesInteraction.objects.select_related("species_1", "species_2", "site", "associated_disease"),
+        sort_fields={"id": "Added", "interaction_type": "Interaction type"},
+        default_sort="id",
+        filters=[
+            ListFilter("interaction_type", "Interaction type", "interaction_type", choices=SpeciesInteraction.INTERACTION_TYPES),
+            ListFilter("site", "Site", "site", choices=BodySite.objects.order_by("name").values_list("id", "name")),
+        ],
+    )
     return render(request, "interaction/interaction_list.html", {"interactions": interactions})
 
+@query_budget(6)
+@conditional_on(SpeciesInteraction, Species, BodySite, Disease)
 def get_interaction_by_id(request, id):
-    interaction = get_object_or_404(SpeciesInteraction, id=id)
+    interaction = get_object_or_404(SpeciesInteraction.objects.select_related("species_1", "species_2"), id=id)
     if request.method == "POST":
         if "delete" in request.POST:
             interaction.delete()
@@ -233,12 +287,25 @@ def export_interactions_to_neo4j(request):
 
 # Migration Patterns
 
+@query_budget(4)
+@conditional_on(MigrationPattern, Species, BodySite, Disease)
 def get_all_migrations(request):
-    migrations = MigrationPattern.objects.all()
+    migrations = paginate_keyset(
+        request,
+        MigrationPattern.objects.select_related("species", "from_site", "to_site", "resulting_disease"),
+        sort_fields={"id": "Added"},
+        default_sort="id",
+        filters=[
+            ListFilter("from_site", "From site", "from_site", choices=BodySite.objects.order_by("name").values_list("id", "name")),
+            ListFilter("to_site", "To site", "to_site", choices=BodySite.objects.order_by("name").values_list("id", "name")),
+        ],
+    )
     return render(request, "migration/migration_list.html", {"migrations": migrations})
 
+@query_budget(6)
+@conditional_on(MigrationPattern, Species, BodySite, Disease)
 def get_migration_by_id(request, id):
-    migration = get_object_or_404(MigrationPattern, id=id)
+    migration = get_object_or_404(MigrationPattern.objects.select_related("species", "from_site", "to_site"), id=id)
     if request.method == "POST":
         if "delete" in request.POST:
             migration.delete()
@@ -268,12 +335,30 @@ def export_migrations_to_neo4j(request):
 
 
 # Product events
+@query_budget(3)
+@conditional_on(ProductEvent, Species, BodySite, Product, Disease, MigrationPattern, SpeciesInteraction)
 def get_all_product_events(request):
-    events = ProductEvent.objects.all()
+    events = paginate_keyset(
+        request,
+        ProductEvent.objects.select_related(
+            "species", "interacting_species", "site", "product", "disease",
+            "migration__species", "migration__from_site", "migration__to_site",
+            "interaction__species_1", "interaction__species_2",
+        ),
+        sort_fields={"id": "Added"},
+        default_sort="id",
+        filters=[
+            ListFilter("site", "Site", "site", choices=BodySite.objects.order_by("name").values_list("id", "name")),
+        ],
+    )
     return render(request, "product_event/product_event_list.html", {"events": events})
 
+@query_budget(9)
+@conditional_on(ProductEvent, Species, BodySite, Product, Disease, MigrationPattern, SpeciesInteraction)
 def get_product_event_by_id(request, id):
-    event = get_object_or_404(ProductEvent, id=id)
+    event = get_object_or_404(
+        ProductEvent.objects.select_related("species", "interacting_species", "site", "product"), id=id
+    )
     if request.method == "POST":
         if "delete" in request.POST:
             event.delete()
@@ -304,16 +389,25 @@ def export_product_events_to_neo4j(request):
 
 # Optional: export everything at once
 def export_all_to_neo4j(request):
-    push_all_species_to_neo4j()
-    push_all_body_sites_to_neo4j()
-    push_all_diseases_to_neo4j()
-    push_all_products_to_neo4j()
-    push_all_interactions_to_neo4j()
-    push_all_migrations_to_neo4j()
-    push_all_product_events_to_neo4j()
+    # Full export in dependency order; records one graph version
+    export_graph_to_neo4j()
     return HttpResponse(" All models exported to Neo4j successfully!")
 
 
+# Metrics endpoint
+
+def metrics(request):
+    """
+    Prometheus text-format metrics: request, SQL and Cypher latency
+    histograms and counters, export stage durations and p50/p95/p99 estimates.
+    Only for staff users and the addresses in METRICS_ALLOWED_IPS.
+    """
+    if not (request.user.is_staff or request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS):
+        raise PermissionDenied
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
 # Neo4j graph JSON endpoint
 
 
@@ -347,7 +441,7 @@ def get_graph_data(request):
         nodes, edges = {}, []
 
         with driver.session() as session:
-            result = session.run(cypher)
+            result = session.run(cypher, query_name="graph_data")
             for record in result:
                 # nodes
                 for node_key in ["n", "m"]:
@@ -389,15 +483,30 @@ def get_expanded_graph_data(request):
     """
     Returns nodes and relationships from Neo4j as JSON.
     Supports initial load and expanding neighbors.
+    Nodes are addressed as "Label:id" using the Django primary key
+    (e.g. ?node_id=Species:12), so ids stay valid across re-exports.
+    Several nodes can be expanded at once with `node_ids`, either repeated
+    or comma separated (e.g. ?node_ids=a,b,c).
     """
     try:
         node_id = request.GET.get('node_id')
+        node_ids = [
+            value.strip()
+            for param in request.GET.getlist('node_ids')
+            for value in param.split(',')
+            if value.strip()
+        ]
         mode = request.GET.get('mode')
-        
-        if node_id:
+
+        if node_ids:
+            # Batch expansion: one round trip for the whole selection
+            nodes, links = fetch_neighbors_batch(node_ids)
+            return JsonResponse({"nodes": nodes, "links": links})
+        elif node_id:
             if mode == 'pathway':
-                # Traceback mode for diseases
-                nodes, links = fetch_disease_pathway(node_id)
+                # Traceback mode for diseases, read from Postgres so it does
+                # not depend on how recent the last Neo4j export is
+                nodes, links = disease_pathway(node_id)
             else:
                 # Standard expansion for other nodes
                 nodes, links = fetch_neighbors(node_id)
@@ -412,3 +521,143 @@ def get_expanded_graph_data(request):
         traceback.print_exc()
         return JsonResponse({"error": str(e)}, status=500)
 
+
+
+
+# Graph diff endpoint
+
+@csrf_exempt
+def get_graph_diff(request):
+    """
+    Returns the elements added, changed and removed since the graph version
+    given in `since`, so long-lived graph views can patch their state.
+    """
+    try:
+        since = int(request.GET.get('since', ''))
+        if since < 0:
+            raise ValueError
+    except ValueError:
+        return JsonResponse({"error": "'since' must be a non-negative graph version"}, status=400)
+
+    try:
+        return JsonResponse(fetch_graph_diff(since))
+    except Exception as e:
+        traceback.print_exc()
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+
+# Graph search endpoint
+
+@csrf_exempt
+def search_graph(request):
+    """
+    Full-text search for graph nodes by name or description. Returns the
+    ranked matches with a small neighborhood in the expanded graph format.
+    """
+    text = request.GET.get('q', '').strip()
+    if not text:
+        return JsonResponse({"nodes": [], "links": [], "matches": []})
+
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+
+    try:
+        nodes, links, matches = search_nodes(text, limit=limit)
+        return JsonResponse({"nodes": nodes, "links": links, "matches": matches})
+    except Exception as e:
+        traceback.print_exc()
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+# Full-text search
+
+def _search_params(request):
+    text = request.GET.get('q', '').strip()
+    kinds = [kind for value in request.GET.getlist('type') for kind in value.split(',') if kind]
+    try:
+        page = int(request.GET.get('page', 1))
+        per_page = int(request.GET.get('per_page', 20))
+    except ValueError:
+        page, per_page = 1, 20
+    return text, kinds, page, per_page
+
+
+def search_page(request):
+    text, kinds, page, per_page = _search_params(request)
+    results = search_records(text, kinds, page, per_page) if text else None
+    if results is not None:
+        query = request.GET.copy()
+        if results.has_previous:
+            query['page'] = results.number - 1
+            results.previous_query = query.urlencode()
+        if results.has_next:
+            query['page'] = results.number + 1
+            results.next_query = query.urlencode()
+    return render(request, "search/search_results.html", {
+        "query": text,
+        "results": results,
+        "types": [(kind, search_type.label) for kind, search_type in SEARCH_TYPES.items()],
+        "selected_types": kinds,
+    })
+
+
+def search_api(request):
+    """
+    Ranked full-text search across species, diseases, products,
+    interactions, migrations and product events.
+    ?q=<text>&type=species,disease&page=1&per_page=20
+    """
+    text, kinds, page, per_page = _search_params(request)
+    if not text:
+        return JsonResponse({"error": "Missing 'q' parameter"}, status=400)
+
+    results = search_records(text, kinds, page, per_page)
+    return JsonResponse({
+        "query": text,
+        "page": results.number,
+        "per_page": results.per_page,
+        "total": results.total,
+        "num_pages": results.num_pages,
+        "results": [result.to_dict() for result in results],
+    })
+
+
+def typeahead_api(request):
+    """
+    Name suggestions per entity type, tolerant of typos and abbreviations.
+    ?q=<text>&type=species,disease&limit=5
+    """
+    text = request.GET.get('q', '').strip()
+    kinds = [kind for value in request.GET.getlist('type') for kind in value.split(',') if kind]
+    try:
+        limit = int(request.GET.get('limit', 5))
+    except ValueError:
+        limit = 5
+
+    response = JsonResponse({"query": text, "results": typeahead(text, kinds, limit)})
+    patch_cache_control(response, max_age=60)
+    return response
+
+
+# Autocomplete lookups for form widgets
+
+def lookup_records(request, kind):
+    """
+    One page of options for an autocomplete widget.
+    ?q=<text>, then follow "next" (a query string) for more.
+    """
+    lookup = AUTOCOMPLETE_LOOKUPS.get(kind)
+    if lookup is None:
+        return JsonResponse({"error": f"Unknown lookup '{kind}'"}, status=404)
+
+    page = paginate_keyset(
+        request, lookup.search(request.GET.get('q', '').strip()),
+        sort_fields={lookup.sort: lookup.sort}, default_sort=lookup.sort, page_size=20,
+    )
+    return JsonResponse({
+        "results": [{"id": obj.pk, "text": str(obj)} for obj in page],
+        "next": page.next_query if page.has_next else None,
+    })
@@ -0,0 +1,302 @@
+"""
+JSON API (v1): reads over all seven models and bulk writes.
+
+    GET api/v1/                       resources, their fields and includes
+    GET api/v1/<resource>/            records, cursor paginated by id
+    GET api/v1/<resource>/<id>/       one record
+
+Query parameters:
+    fields=id,name,...      sparse fieldset ("id" is always returned)
+    ids=1,2,3               fetch these records only
+    include=diseases,...    add related objects as [{"id", "name"}] lists
+    per_page=N              page size (default 100, at most 1000)
+    sort=field / sort=-field  order by one of the resource's sort fields
+                            (default id)
+    <filter>=value          resource filters, e.g. min_diseases=3 on species
+    after=/before=          cursors from the "next"/"previous" links
+
+Species records carry the counts from the species summary table
+(body_site_count, disease_count, ...), which can be sorted and filtered on.
+
+Records are flat: foreign keys appear as <field>_id plus <field> (the
+related name), joined in the same query. Each include is one prefetch query.
+List and record responses carry an ETag and Last-Modified; polling with
+If-None-Match / If-Modified-Since returns 304 until the data changes.
+
+    POST api/v1/bulk/                 upsert interactions, migrations and
+                                      product events (see bulk.py)
+"""
+import json
+import traceback
+
+from django.db.models import Prefetch
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+
+from .models import Species, BodySite, Disease, Product, SpeciesInteraction, MigrationPattern, ProductEvent
+from .conditional import conditional_on
+from .bulk import BULK_TYPES, BulkValidationError, bulk_upsert
+from .neo4j_integration import (
+    graph_sync,
+    push_all_interactions_to_neo4j,
+    push_all_migrations_to_neo4j,
+    push_all_product_events_to_neo4j,
+)
+from .pagination import ListFilter, paginate_keyset
+from .summaries import with_summary
+from .serializers import (
+    species_with_summary_to_dict, body_site_to_dict, disease_to_dict, product_to_dict,
+    interaction_to_dict, migration_to_dict, product_event_to_dict, related_names_to_list,
+)
+
+API_VERSION = "v1"
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+MAX_IDS = 1000
+
+
+class Resource:
+    def __init__(self, model, serializer, related=(), includes=None, annotate=None, sort_fields=None,
+                 filters=None, counted_models=()):
+        self.model = model
+        self.serializer = serializer
+        self.related = related
+        # include name -> (relation to prefetch, model of the related objects)
+        self.includes = includes or {}
+        # queryset -> queryset adding the annotations the serializer reads
+        self.annotate = annotate
+        # sort field -> label, besides id
+        self.sort_fields = {"id": "ID", **(sort_fields or {})}
+        # query parameter -> filter lookup
+        self.filters = filters or {}
+        # models the annotations count rows of
+        self.counted_models = counted_models
+
+    @property
+    def source_models(self):
+        """Every model a record of this resource can show data from."""
+        related = [self.model._meta.get_field(name).related_model for name in self.related]
+        included = [related_model for _, related_model in self.includes.values()]
+        return list(dict.fromkeys([self.model, *related, *included, *self.counted_models]))
+
+    @property
+    def fields(self):
+        return list(self.serializer(self.model()).keys())
+
+    def queryset(self, include=()):
+        queryset = self.model.objects.select_related(*self.related)
+        if self.annotate:
+            queryset = self.annotate(queryset)
+        for name in include:
+            relation, related_model = self.includes[name]
+            queryset = queryset.prefetch_related(
+                Prefetch(relation, queryset=related_model.objects.only("id", "name").order_by("name"))
+            )
+        return queryset
+
+
+RESOURCES = {
+    "species": Resource(
+        Species, species_with_summary_to_dict, related=("origin_site",),
+        includes={
+            "body_sites": ("body_sites", BodySite),
+            "diseases": ("diseases", Disease),
+            "products": ("products", Product),
+        },
+        annotate=with_summary, counted_models=(SpeciesInteraction, MigrationPattern, ProductEvent),
+        sort_fields={
+            "disease_count": "Diseases",
+            "interaction_count": "Interactions",
+            "product_event_count": "Product events",
+        },
+        filters={
+            "min_diseases": "disease_count__gte",
+            "min_interactions": "interaction_count__gte",
+            "min_product_events": "product_event_count__gte",
+        },
+    ),
+    "body-sites": Resource(
+        BodySite, body_site_to_dict,
+        includes={"species": ("associated_species", Species)},
+    ),
+    "diseases": Resource(
+        Disease, disease_to_dict, related=("affected_site",),
+        includes={"species": ("associated_species", Species)},
+    ),
+    "products": Resource(
+        Product, product_to_dict,
+        includes={"species": ("producing_species", Species)},
+    ),
+    "interactions": Resource(
+        SpeciesInteraction, interaction_to_dict,
+        related=("species_1", "species_2", "site", "associated_disease"),
+    ),
+    "migrations": Resource(
+        MigrationPattern, migration_to_dict,
+        related=("species", "from_site", "to_site", "resulting_disease"),
+    ),
+    "product-events": Resource(
+        ProductEvent, product_event_to_dict,
+        related=("species", "interacting_species", "site", "product", "disease"),
+    ),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _split(request, param):
+    return [item.strip() for value in request.GET.getlist(param) for item in value.split(",") if item.strip()]
+
+
+def _parse_options(request, resource):
+    fields = _split(request, "fields")
+    unknown = sorted(set(fields) - set(resource.fields))
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+
+    include = _split(request, "include")
+    unknown = sorted(set(include) - set(resource.includes))
+    if unknown:
+        raise ApiError(f"Unknown include: {', '.join(unknown)}")
+
+    try:
+        ids = [int(value) for value in _split(request, "ids")]
+    except ValueError:
+        raise ApiError("ids must be integers")
+    if len(ids) > MAX_IDS:
+        raise ApiError(f"At most {MAX_IDS} ids per request")
+
+    return fields, include, ids
+
+
+def _record(resource, obj, fields, include):
+    record = resource.serializer(obj)
+    if fields:
+        record = {key: value for key, value in record.items() if key == "id" or key in fields}
+    for name in include:
+        relation, _ = resource.includes[name]
+        record[name] = related_names_to_list(getattr(obj, relation).all())
+    return record
+
+
+def _resource_or_error(name):
+    resource = RESOURCES.get(name)
+    if resource is None:
+        raise ApiError(f"Unknown resource '{name}'", status=404)
+    return resource
+
+
+def api_index(request):
+    return JsonResponse({
+        "version": API_VERSION,
+        "resources": {
+            name: {
+                "url": request.build_absolute_uri(f"{request.path}{name}/"),
+                "fields": resource.fields,
+                "includes": list(resource.includes),
+                "sort": list(resource.sort_fields),
+                "filters": list(resource.filters),
+            }
+            for name, resource in RESOURCES.items()
+        },
+    })
+
+
+def _resource_models(request, resource, id=None):
+    return RESOURCES[resource].source_models if resource in RESOURCES else []
+
+
+@conditional_on(models_for=_resource_models)
+def list_records(request, resource):
+    try:
+        resource_name, resource = resource, _resource_or_error(resource)
+        fields, include, ids = _parse_options(request, resource)
+    except ApiError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+
+    queryset = resource.queryset(include)
+    if ids:
+        queryset = queryset.filter(pk__in=ids)
+
+    page = paginate_keyset(
+        request, queryset, sort_fields=resource.sort_fields, default_sort="id",
+        filters=[ListFilter(param, param, lookup) for param, lookup in resource.filters.items()],
+        page_size=API_PAGE_SIZE, max_page_size=API_MAX_PAGE_SIZE,
+    )
+    base_url = request.build_absolute_uri(request.path)
+    return JsonResponse({
+        "version": API_VERSION,
+        "resource": resource_name,
+        "results": [_record(resource, obj, fields, include) for obj in page],
+        "next": f"{base_url}?{page.next_query}" if page.has_next else None,
+        "previous": f"{base_url}?{page.previous_query}" if page.has_previous else None,
+    })
+
+
+@conditional_on(models_for=_resource_models)
+def get_record(request, resource, id):
+    try:
+        resource = _resource_or_error(resource)
+        fields, include, _ = _parse_options(request, resource)
+    except ApiError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+
+    obj = resource.queryset(include).filter(pk=id).first()
+    if obj is None:
+        return JsonResponse({"error": "Not found"}, status=404)
+    return JsonResponse({"version": API_VERSION, "result": _record(resource, obj, fields, include)})
+
+
+# Bulk writes
+
+GRAPH_PUSHES = {
+    "interactions": push_all_interactions_to_neo4j,
+    "migrations": push_all_migrations_to_neo4j,
+    "product_events": push_all_product_events_to_neo4j,
+}
+
+
+@require_POST
+def bulk_upsert_records(request):
+    """
+    Upsert a batch of {"interactions": [...], "migrations": [...],
+    "product_events": [...]} in one transaction, then push the written rows
+    to Neo4j as a single graph version.
+    """
+    try:
+        batch = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Body must be JSON"}, status=400)
+    if not isinstance(batch, dict):
+        return JsonResponse({"error": "Body must be a JSON object"}, status=400)
+
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+    perms = [
+        f"{BULK_TYPES[name].model._meta.app_label}.{action}_{BULK_TYPES[name].model._meta.model_name}"
+        for name in batch if name in BULK_TYPES
+        for action in ("add", "change")
+    ]
+    if not request.user.has_perms(perms):
+        return JsonResponse({"error": "Permission denied"}, status=403)
+
+    try:
+        results = bulk_upsert(batch)
+    except BulkValidationError as e:
+        return JsonResponse({"error": str(e), "errors": e.errors}, status=400)
+
+    graph_synced = True
+    try:
+        with graph_sync("bulk_upsert_records"):
+            for name, written in results.items():
+                GRAPH_PUSHES[name](ids=written["created"] + written["updated"])
+    except Exception:
+        # The rows are committed; the next export picks them up
+        traceback.print_exc()
+        graph_synced = False
+
+    return JsonResponse({"version": API_VERSION, "results": results, "graph_synced": graph_synced})
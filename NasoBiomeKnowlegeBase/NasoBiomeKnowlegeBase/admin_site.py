@@ -2,10 +2,7 @@ from django.contrib.admin import AdminSite
 from django.contrib.admin.models import LogEntry
 from django.views.decorators.cache import never_cache
 from django.utils.decorators import method_decorator
-from NasoBiome.models import (
-    Species, BodySite, Disease, Product,
-    SpeciesInteraction, MigrationPattern, ProductEvent
-)
+from NasoBiome.kpi import get_kpis
 
 class ThesisAdminSite(AdminSite):
     site_header = "Microbiome Knowledgebase Admin"
@@ -14,28 +11,8 @@ class ThesisAdminSite(AdminSite):
 
     @method_decorator(never_cache)
     def index(self, request, extra_context=None):
-        # Calculate KPIs
-        kpi = {
-            'species_count': Species.objects.count(),
-            'body_sites_count': BodySite.objects.count(),
-            'diseases_count': Disease.objects.count(),
-            'products_count': Product.objects.count(),
-            'interactions_count': SpeciesInteraction.objects.count(),
-            'migrations_count': MigrationPattern.objects.count(),
-            'product_events_count': ProductEvent.objects.count(),
-            'total_nodes': (
-                Species.objects.count() +
-                BodySite.objects.count() +
-                Disease.objects.count() +
-                Product.objects.count()
-            ),
-            'total_relationships': (
-                SpeciesInteraction.objects.count() +
-                MigrationPattern.objects.count() +
-                ProductEvent.objects.count()
-            )
-        }
-        
+        kpi = get_kpis()
+
         # Fetch recent activities
         recent_activities = LogEntry.objects.select_related('user', 'content_type').order_by('-action_time')[:10]
 
@@ -37,11 +37,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'NasoBiome',
     'django_lucide_icons',
 ]
 
 MIDDLEWARE = [
+    'NasoBiome.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,7 +57,8 @@ ROOT_URLCONF = 'NasoBiomeKnowlegeBase.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to PerformanceMiddleware
+        'BACKEND': 'NasoBiome.instrumentation.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,6 +89,22 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# File based, so the KPI counts, typeahead results and list-page fragments (and
+# the model version stamps that key them) are shared by all worker processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -127,3 +146,40 @@ LUCIDE_ICONS_DIR = BASE_DIR / 'static/lucide'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Slow Cypher query log
+# Statements slower than NEO4J_SLOW_QUERY_MS are stored as SlowCypherQuery rows;
+# this fraction of the read-only ones is re-run with PROFILE to capture the plan.
+# Both happen on a background thread, after the statement has returned.
+
+NEO4J_SLOW_QUERY_MS = 500
+NEO4J_SLOW_QUERY_PROFILE_RATE = 0.2
+
+
+# Prometheus metrics
+# /metrics/ answers staff users and scrapers connecting from these addresses.
+
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # One JSON line per request from PerformanceMiddleware
+        'NasoBiome.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,154 @@
+// Remote-data autocomplete for <select data-autocomplete-url="...">.
+//
+// The select stays in the form (hidden) and holds the chosen values; a text
+// input above it fetches matching options page by page from the lookup
+// endpoint, and the current selection is shown as removable chips.
+(function () {
+  const INPUT_CLASS = 'w-full px-3 py-2 border border-gray-300 dark:border-gray-700 rounded-lg bg-white dark:bg-gray-800 text-gray-900 dark:text-white placeholder-gray-500 dark:placeholder-gray-400 focus:outline-none focus:ring-2 focus:ring-primary focus:border-transparent';
+  const LIST_CLASS = 'absolute z-20 mt-1 w-full max-h-60 overflow-y-auto rounded-lg border border-gray-200 dark:border-gray-700 bg-white dark:bg-gray-800 shadow-lg hidden';
+  const ITEM_CLASS = 'block w-full text-left px-3 py-2 text-sm text-gray-700 dark:text-gray-200 hover:bg-gray-100 dark:hover:bg-gray-700';
+  const CHIP_CLASS = 'inline-flex items-center gap-1 px-2 py-1 rounded-md bg-gray-100 dark:bg-gray-700 text-sm text-gray-800 dark:text-gray-100';
+
+  function debounce(fn, ms) {
+    let timer;
+    return function (...args) {
+      clearTimeout(timer);
+      timer = setTimeout(() => fn.apply(this, args), ms);
+    };
+  }
+
+  function enhance(select) {
+    if (select.dataset.autocompleteReady) return;
+    select.dataset.autocompleteReady = '1';
+
+    const wrapper = document.createElement('div');
+    wrapper.className = 'relative';
+    const input = document.createElement('input');
+    input.type = 'search';
+    input.autocomplete = 'off';
+    input.placeholder = 'Type to search…';
+    input.className = INPUT_CLASS;
+    const list = document.createElement('ul');
+    list.className = LIST_CLASS;
+    const chips = document.createElement('div');
+    chips.className = 'flex flex-wrap gap-2 mt-2';
+
+    select.parentNode.insertBefore(wrapper, select);
+    wrapper.append(input, list, chips, select);
+    select.classList.add('hidden');
+
+    let nextQuery = null;
+
+    function hideList() {
+      list.classList.add('hidden');
+    }
+
+    function renderChips() {
+      chips.replaceChildren();
+      Array.from(select.options).filter((option) => option.selected && option.value).forEach((option) => {
+        const chip = document.createElement('span');
+        chip.className = CHIP_CLASS;
+        chip.textContent = option.text;
+        const remove = document.createElement('button');
+        remove.type = 'button';
+        remove.className = 'text-gray-500 hover:text-red-600';
+        remove.setAttribute('aria-label', 'Remove ' + option.text);
+        remove.textContent = '×';
+        remove.addEventListener('click', () => {
+          option.selected = false;
+          if (select.multiple) option.remove();
+          renderChips();
+          select.dispatchEvent(new Event('change', { bubbles: true }));
+        });
+        chip.append(remove);
+        chips.append(chip);
+      });
+    }
+
+    function choose(item) {
+      if (!select.multiple) {
+        Array.from(select.options).forEach((option) => { if (option.value) option.remove(); });
+      }
+      let option = Array.from(select.options).find((o) => o.value === String(item.id));
+      if (!option) {
+        option = new Option(item.text, item.id);
+        select.add(option);
+      }
+      option.selected = true;
+      input.value = '';
+      hideList();
+      renderChips();
+      select.dispatchEvent(new Event('change', { bubbles: true }));
+    }
+
+    function addItem(text, onClick, extraClass) {
+      const li = document.createElement('li');
+      const button = document.createElement('button');
+      button.type = 'button';
+      button.className = ITEM_CLASS + (extraClass ? ' ' + extraClass : '');
+      button.textContent = text;
+      // Keep focus in the input so blur does not close the list first
+      button.addEventListener('mousedown', (event) => event.preventDefault());
+      button.addEventListener('click', onClick);
+      li.append(button);
+      list.append(li);
+      return li;
+    }
+
+    async function load(query, append) {
+      const params = append ? nextQuery : new URLSearchParams({ q: query }).toString();
+      let data;
+      try {
+        const response = await fetch(select.dataset.autocompleteUrl + '?' + params, {
+          headers: { Accept: 'application/json' },
+        });
+        if (!response.ok) return;
+        data = await response.json();
+      } catch (error) {
+        return;
+      }
+      // Ignore responses for text the user has since changed
+      if (query !== input.value.trim()) return;
+
+      if (!append) list.replaceChildren();
+      data.results.forEach((item) => addItem(item.text, () => choose(item)));
+      nextQuery = data.next;
+      if (nextQuery) {
+        const more = addItem('More…', () => {
+          more.remove();
+          load(query, true);
+        }, 'text-primary');
+      }
+      if (!list.children.length) {
+        addItem('No matches', () => {}, 'text-gray-400 cursor-default');
+      }
+      list.classList.remove('hidden');
+    }
+
+    input.addEventListener('input', debounce(() => load(input.value.trim(), false), 250));
+    input.addEventListener('focus', () => load(input.value.trim(), false));
+    input.addEventListener('blur', hideList);
+    input.addEventListener('keydown', (event) => {
+      if (event.key === 'Escape') {
+        hideList();
+      } else if (event.key === 'Enter') {
+        // Enter picks the first match instead of submitting the form
+        event.preventDefault();
+        const first = list.querySelector('button');
+        if (first && !list.classList.contains('hidden')) first.click();
+      }
+    });
+
+    renderChips();
+  }
+
+  function init() {
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(enhance);
+  }
+
+  if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', init);
+  } else {
+    init();
+  }
+})();